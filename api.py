@@ -1,26 +1,38 @@
-from functools import wraps
-from fastapi import FastAPI, File, Form, UploadFile, HTTPException, Request
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, File, Form, UploadFile, HTTPException, Request, BackgroundTasks
+from fastapi.responses import JSONResponse, FileResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 import uuid
-from ultralytics import YOLO
 import os
-import shutil
+import json
+import mimetypes
+from typing import List
 import cv2
-import numpy as np
-from fastapi.staticfiles import StaticFiles
-from io import BytesIO
-import requests
 import base64
-from datetime import datetime
-import pytz
 import firebase_admin
 from firebase_admin import credentials, db
-from ultralytics import YOLO
 import asyncio
-
-# Firebase initialization
-firebase_cred_paths = ["./firebaseSDK.json", "../firebaseSDK.json"]
+from executor import BoundedExecutor, ExecutorFull
+from runtime import InferenceRuntime, NotReady
+from detection_cache import DetectionCache
+from esp32cam_watcher import Esp32CamWatcher
+from firebase_writer import FirebaseWriter
+from camera_scheduler import CameraScheduler
+from stream_ingest import StreamIngestor
+from job_queue import JobQueue, check_deadline
+from http_client import FetchError, ImageFetcher
+from lazy_render import LazyRenderer
+from image_store import ImageStore
+from postprocess import boxes_to_detections, ulat_status
+from preprocess import ImageTooLarge, scale_boxes
+import preprocess
+from tiling import TooManyTiles, predict_tiles
+from scene_gate import SceneGate
+import metrics
+from metrics import stage
+import time
+
+# Firebase initialization (FIREBASE_CREDENTIALS: path file kredensial lain, dicek lebih dulu)
+firebase_cred_paths = [os.getenv("FIREBASE_CREDENTIALS", ""), "./firebaseSDK.json", "../firebaseSDK.json"]
 firebase_cred_path = next((path for path in firebase_cred_paths if os.path.exists(path)), None)
 
 if not firebase_cred_path:
@@ -31,8 +43,68 @@ firebase_admin.initialize_app(cred, {
     'databaseURL': 'https://nextgenhidroponik-default-rtdb.asia-southeast1.firebasedatabase.app/'
 })
 
+# Tugas latar (scheduler kamera, stream) hanya berjalan di worker ini
+background_worker = "0"
+
+def worker_index():
+    # Dibaca saat dipanggil: server.py mengisi WORKER_INDEX di tiap worker setelah api diimpor dan di-fork
+    return os.getenv("WORKER_INDEX", "0")
+
+# Claim entri kamera dibagi antar worker lewat CAMERA_STATE_DIR (diisi server.py saat multi-worker),
+# agar /detect_latest_image di worker lain tidak memproses ulang entri yang sedang / sudah diproses scheduler
+camera_state_directory = os.getenv("CAMERA_STATE_DIR") or None
+
+def camera_watcher(node):
+    return Esp32CamWatcher(
+        db.reference(node),
+        claim_dir=os.path.join(camera_state_directory, node) if camera_state_directory else None,
+    )
+
+# Pantau foto baru dari ESP32-CAM secara inkremental
+esp32cam_watcher = camera_watcher('esp32cam')
+
+# Hasil deteksi ditulis ke Firebase secara write-behind: digabung menjadi satu update multi-path
+# setiap FIREBASE_WRITE_BATCH path atau FIREBASE_WRITE_INTERVAL detik, dan di-flush saat shutdown
+result_writer = FirebaseWriter(
+    db.reference('/'),
+    max_batch=int(os.getenv("FIREBASE_WRITE_BATCH", 100)),
+    flush_interval=float(os.getenv("FIREBASE_WRITE_INTERVAL", 1)),
+    max_retries=int(os.getenv("FIREBASE_WRITE_RETRIES", 5)),
+)
+
 app = FastAPI()
 
+metric_endpoints = {"/", "/healthz", "/readyz", "/upload", "/detect_latest_image", "/streams", "/jobs", "/stats", "/metrics", "/detectedImages", "/uploadedFile"}
+
+@app.middleware("http")
+async def timing_middleware(request: Request, call_next):
+    # Kumpulkan durasi tiap tahap untuk header Server-Timing dan histogram Prometheus
+    timings = metrics.start_request()
+    endpoint = "/" + request.url.path.strip("/").split("/")[0]
+    if endpoint not in metric_endpoints:
+        endpoint = "other"  # Batasi kardinalitas label
+    started = time.perf_counter()
+    metrics.IN_FLIGHT.inc()
+    try:
+        response = await call_next(request)
+    finally:
+        metrics.IN_FLIGHT.dec()
+    elapsed = time.perf_counter() - started
+    metrics.REQUEST_SECONDS.labels(endpoint).observe(elapsed)
+    metrics.REQUESTS_TOTAL.labels(endpoint, str(response.status_code)).inc()
+    timings.append(("total", elapsed))
+    response.headers["Server-Timing"] = metrics.server_timing(timings)
+    return response
+
+@app.exception_handler(ExecutorFull)
+@app.exception_handler(NotReady)
+async def service_unavailable_handler(request: Request, exc):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": str(exc.retry_after)})
+
+@app.exception_handler(ImageTooLarge)
+async def image_too_large_handler(request: Request, exc: ImageTooLarge):
+    return JSONResponse(status_code=413, content={"detail": str(exc)})
+
 origins = [
     "http://localhost:3000",  # React
     "http://localhost:8080",  # Vue.js
@@ -47,203 +119,720 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-image_directory = "uploadedFile"  # Store uploaded images in this folder
-output_directory = "detectedImages"  # Store detected images in this folder
+# Direktori datar lama (nama UUID); hanya dibaca agar link lama di Firebase tetap bisa dibuka
+image_directory = "uploadedFile"
+output_directory = "detectedImages"
+
+# Gambar asli (/uploadedFile) dan hasil deteksi (/detectedImages) disimpan content-addressed di IMAGE_STORE_DIR.
+# Kuota per store: IMAGE_STORE_MAX_BYTES (default 10 GiB, 0 = tanpa batas) dan IMAGE_STORE_MAX_AGE detik (0 = tanpa batas).
+image_store_directory = os.getenv("IMAGE_STORE_DIR", "imageStore")
+image_store_options = dict(
+    max_bytes=int(os.getenv("IMAGE_STORE_MAX_BYTES", 10 * 1024 ** 3)),
+    max_age=float(os.getenv("IMAGE_STORE_MAX_AGE", 0)),
+    sweep_interval=float(os.getenv("IMAGE_STORE_SWEEP_INTERVAL", 60)),
+)
+original_store = ImageStore(os.path.join(image_store_directory, "original"), legacy_dirs=[image_directory], **image_store_options)
+detected_store = ImageStore(os.path.join(image_store_directory, "detected"), legacy_dirs=[output_directory], **image_store_options)
+
+model_path = "models/best.pt"
+
+# Backend CPU: pytorch (default), onnx atau openvino; hasil export di-cache di samping best.pt
+inference_backend = os.getenv("INFERENCE_BACKEND", "pytorch").lower()
+inference_int8 = os.getenv("INFERENCE_INT8", "false").lower() in ("1", "true", "yes")
+
+# Model dimuat dan di-warm-up di background saat startup; /readyz baru 200 setelah selesai
+inference_runtime = InferenceRuntime(
+    model_path,
+    backend=inference_backend,
+    int8=inference_int8,
+    calibration_dir=os.getenv("CALIBRATION_DIR") or None,
+    workers=int(os.getenv("INFERENCE_WORKERS", 0)),
+    conf=0.5,
+    batch_max_size=int(os.getenv("BATCH_MAX_SIZE", 8)),
+    batch_max_wait_ms=float(os.getenv("BATCH_MAX_WAIT_MS", 10)),
+    warmup_runs=int(os.getenv("WARMUP_RUNS", 2)),
+)
+
+# Pekerjaan blocking dijalankan di luar event loop: I/O (HTTP, file, Firebase) dan inferensi terpisah
+retry_after = int(os.getenv("RETRY_AFTER_SECONDS", 1))
+io_executor = BoundedExecutor(
+    "io",
+    max_workers=int(os.getenv("IO_WORKERS", 16)),
+    max_pending=int(os.getenv("IO_QUEUE_SIZE", 64)),
+    retry_after=retry_after,
+)
+inference_executor = BoundedExecutor(
+    "inference",
+    max_workers=int(os.getenv("INFERENCE_CONCURRENCY", 8)),
+    max_pending=int(os.getenv("INFERENCE_QUEUE_SIZE", 16)),
+    retry_after=retry_after,
+)
+
+metrics.watch_queue("io", lambda: io_executor.stats()["in_flight"])
+metrics.watch_queue("inference", lambda: inference_executor.stats()["in_flight"])
+metrics.watch_queue("model", inference_runtime.queue_depth)
+
+# Client HTTP bersama (keep-alive per host) untuk image_url dan foto ESP32
+image_fetcher = ImageFetcher(
+    max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", 32)),
+    connect_timeout=float(os.getenv("HTTP_CONNECT_TIMEOUT", 5)),
+    read_timeout=float(os.getenv("HTTP_READ_TIMEOUT", 15)),
+    max_bytes=int(os.getenv("HTTP_MAX_IMAGE_BYTES", 20 * 1024 * 1024)),
+    retries=int(os.getenv("HTTP_RETRIES", 2)),
+)
 
-if not os.path.exists(image_directory):
-    os.makedirs(image_directory)
-if not os.path.exists(output_directory):
-    os.makedirs(output_directory)
+# Simpan gambar asli ke uploadedFile/ (di background, setelah respons dikirim)
+save_original = os.getenv("SAVE_ORIGINAL", "true").lower() in ("1", "true", "yes")
+
+# JPEG besar di-decode langsung pada skala 1/2, 1/4 atau 1/8 (sisi panjang tetap >= ukuran input model),
+# kotak dipetakan kembali ke koordinat asli. Gambar di atas MAX_IMAGE_PIXELS ditolak sebelum decode (413).
+decode_reduce = os.getenv("DECODE_REDUCE", "true").lower() in ("1", "true", "yes")
+decode_target_size = int(os.getenv("DECODE_TARGET_SIZE", 640))
+max_image_pixels = int(os.getenv("MAX_IMAGE_PIXELS", 40_000_000))
+
+# Mode tiling (dipilih per request): gambar dipotong menjadi tile yang tumpang tindih agar objek kecil
+# tidak hilang saat diperkecil ke ukuran input model, lalu kotak digabung dengan NMS lintas tile
+tile_size_default = int(os.getenv("TILE_SIZE", 640))
+tile_overlap_default = float(os.getenv("TILE_OVERLAP", 0.2))
+tile_merge_threshold = float(os.getenv("TILE_MERGE_THRESHOLD", 0.5))
+# Batas jumlah tile per gambar (satu inferensi per tile); di atasnya request ditolak dengan 400
+tile_max_count = int(os.getenv("TILE_MAX_COUNT", 64))
+
+# Gate perubahan adegan per kamera (opt-in): frame yang hampir sama dengan frame terakhir yang diinferensi
+# memakai ulang deteksinya. SCENE_GATE_THRESHOLD = rata-rata selisih piksel (0-1) pada frame 64x48, default 0
+# = nonaktif. Signature 64x48 tidak melihat objek kecil (ulat beberapa puluh piksel hampir tidak mengubah
+# rata-ratanya), jadi aktifkan hanya jika kehilangan ulat yang baru muncul bisa diterima; lihat
+# benchmarks/scene_gate_bench.py. SCENE_GATE_MAX_AGE = detik maksimum sebelum inferensi ulang dipaksa.
+scene_gate = SceneGate(
+    threshold=float(os.getenv("SCENE_GATE_THRESHOLD", 0)),
+    max_age=float(os.getenv("SCENE_GATE_MAX_AGE", 300)),
+)
 
-model = YOLO("models/best.pt")
+# POST /upload/batch: jumlah gambar maksimum per request dan gambar yang diproses bersamaan per batch
+batch_upload_max_items = int(os.getenv("BATCH_UPLOAD_MAX_ITEMS", 32))
+batch_upload_concurrency = int(os.getenv("BATCH_UPLOAD_CONCURRENCY", 4))
+
+# Hasil deteksi untuk gambar yang sama (isi identik) diambil dari cache
+detection_cache = DetectionCache(
+    lambda: inference_runtime.model_version,
+    conf=0.5,
+    tag=(f"{inference_backend}-int8" if inference_runtime.int8 else inference_backend) + ("-reduced" if decode_reduce else ""),
+    max_entries=int(os.getenv("DETECTION_CACHE_SIZE", 256)),
+    ttl=float(os.getenv("DETECTION_CACHE_TTL", 3600)),
+    disk_dir=os.getenv("DETECTION_CACHE_DIR") or None,
+)
 
-def object_detector(source):
-    if source.startswith("http://") or source.startswith("https://"):
-        response = requests.get(source)
-        if response.status_code == 200:
-            # Baca gambar dari BytesIO
-            image_np = np.frombuffer(response.content, np.uint8)
-            img = cv2.imdecode(image_np, cv2.IMREAD_COLOR)
-        else:
-            raise ValueError(f"Gagal mengambil gambar dari URL: {source}")
-    elif source.startswith("data:image"):
-        # Handle base64 encoded image
-        base64_str = source.split(",")[1]
-        # Decode base64 string
-        image_data = base64.b64decode(base64_str)
-        # Read decoded image data using OpenCV
-        nparr = np.frombuffer(image_data, np.uint8)
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+def decode_image(image_data):
+    # Decode resolusi penuh langsung dari bytes di memori tanpa menulis ke disk
+    with stage("decode"):
+        img, _ = preprocess.decode(image_data, max_pixels=max_image_pixels, reduce=False)
+    return img
+
+def prepare_image(image_data, reduce=True):
+    # Decode untuk inferensi: resolusi diturunkan sesuai ukuran input model, beserta skala ke koordinat asli
+    with stage("decode"):
+        return preprocess.decode(image_data, target_size=decode_target_size, max_pixels=max_image_pixels, reduce=decode_reduce and reduce)
+
+def tiling_options(tiled, tile_size=None, tile_overlap=None):
+    if not tiled:
+        return None
+    tile_size = tile_size_default if tile_size is None else tile_size
+    tile_overlap = tile_overlap_default if tile_overlap is None else tile_overlap
+    if not 128 <= tile_size <= 4096:
+        raise HTTPException(status_code=400, detail="tile_size harus di antara 128 dan 4096")
+    if not 0 <= tile_overlap <= 0.5:
+        raise HTTPException(status_code=400, detail="tile_overlap harus di antara 0 dan 0.5")
+    return tile_size, tile_overlap
+
+def predict_tiled(img, tile_size, tile_overlap):
+    try:
+        boxes, _ = predict_tiles(inference_runtime.predict_many, img, tile_size, tile_overlap,
+                                 threshold=tile_merge_threshold, max_tiles=tile_max_count)
+    except TooManyTiles as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return boxes
+
+def draw_detections(original, detections):
+    img = decode_image(original) if isinstance(original, bytes) else original.copy()
+    for d in detections:
+        box = d["box"]
+        score_percentage = d["score"] * 100  # Ubah menjadi persentase
+        cv2.rectangle(img, (box[0], box[1]), (box[2], box[3]), (0, 0, 255), 3)  # Warna merah, garis lebih tebal
+        cv2.putText(img, f"{d['label']} {score_percentage:.2f}%", (box[0], box[1] - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 0, 255), 2)
+    return img
+
+# Gambar hasil deteksi baru digambar dan di-encode saat pertama kali diminta. Gambar asli + deteksi yang belum
+# dirender disimpan di store "pending" (kuota IMAGE_STORE_* yang sama), jadi URL photo_detected / photo_hama yang
+# sudah ditulis ke Firebase tetap bisa dirender setelah entri memori dibuang, setelah restart dan oleh worker mana pun.
+pending_store = ImageStore(os.path.join(image_store_directory, "pending"), **image_store_options)
+lazy_renderer = LazyRenderer(
+    detected_store,
+    draw_detections,
+    max_pending_bytes=int(os.getenv("RENDER_MAX_PENDING_BYTES", 256 * 1024 * 1024)),
+    spool_store=pending_store,
+)
+
+# Frame stream punya anggaran memori sendiri agar tidak mengusir gambar /upload yang belum diminta.
+# Frame RTSP (array) di spool di-encode JPEG: jauh lebih murah daripada PNG untuk frame yang jarang diminta.
+stream_renderer = LazyRenderer(
+    detected_store,
+    draw_detections,
+    max_pending_bytes=int(os.getenv("STREAM_RENDER_MAX_PENDING_BYTES", 32 * 1024 * 1024)),
+    spool_store=pending_store,
+    spool_format=".jpg",
+)
+
+def register_detected(original, detections, renderer=None):
+    # Nama ditentukan oleh gambar asli + kotak deteksi: hasil yang sama selalu mendapat file yang sama
+    if isinstance(original, bytes):
+        filename = detected_store.derived_name(original, json.dumps(detections, sort_keys=True))
     else:
-        # Diasumsikan source adalah jalur file lokal
-        img = cv2.imread(source)
-
-    results = model.predict(source=img, conf=0.5)
-
-    detections = []
-
-    for result in results:
-        for detection in result.boxes:
-            box = detection.xyxy[0].cpu().numpy().astype(int).tolist()  # koordinat kotak pembatas
-            score = detection.conf[0].cpu().numpy()  # skor kepercayaan dalam desimal
-            label = model.names[int(detection.cls[0])]  # label/kelas
-            score_percentage = score * 100  # Ubah menjadi persentase
-            cv2.rectangle(img, (box[0], box[1]), (box[2], box[3]), (0, 0, 255), 3)  # Warna merah, garis lebih tebal
-            cv2.putText(img, f"{label} {score_percentage:.2f}%", (box[0], box[1] - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 0, 255), 2)
-            detections.append({"box": box, "score": float(score), "label": label})  # Konversi skor menjadi float
-            
-    output_filename = f"{uuid.uuid4()}.jpg"
-    output_filepath = os.path.join(output_directory, output_filename)
-    cv2.imwrite(output_filepath, img)
+        filename = detected_store.derived_name(original.shape, original.tobytes(), json.dumps(detections, sort_keys=True))
+    (renderer or lazy_renderer).register(filename, original, detections)
+    return filename
+
+def render_detected(filename):
+    return lazy_renderer.path_for(filename) or stream_renderer.path_for(filename)
+
+def object_detector(img, original=None, scale=(1.0, 1.0), tiling=None, renderer=None):
+    # img sudah berupa array hasil decode; URL dan data URI diambil lebih dulu lewat image_fetcher / read_image_url
+
+    # Context job ikut ke thread (BoundedExecutor), jadi waktu antre di inference_executor juga ikut dicek
+    check_deadline()
+
+    # Array (N, 6): x1, y1, x2, y2, skor, kelas
+    with stage("predict"):
+        boxes = predict_tiled(img, *tiling) if tiling else inference_runtime.predict(img)
+
+    with stage("postprocess"):
+        # Koordinat dari gambar hasil decode tereduksi dikembalikan ke ukuran asli
+        detections = boxes_to_detections(scale_boxes(boxes, scale), inference_runtime.names)
+
+    # Simpan referensi ke gambar asli (bytes terenkode jika ada, lebih hemat memori)
+    output_filename = register_detected(original if original is not None else img, detections, renderer)
 
     return detections, output_filename
 
-def cleanup_old_files(directory, max_files=50):
-    files = [os.path.join(directory, f) for f in os.listdir(directory) if os.path.isfile(os.path.join(directory, f))]
-    if len(files) > max_files:
-        files.sort(key=os.path.getctime)
-        for f in files[:-max_files]:
-            os.remove(f)
+async def scene_gate_check(camera, image, original, renderer=None):
+    """Kembalikan (signature, hasil); hasil = (detections, filename) jika deteksi lama dipakai ulang."""
+    with stage("scene_gate"):
+        sig, previous = await io_executor.run(scene_gate.check, camera, image)
+    if previous is None:
+        return sig, None
+    # Gambar hasil deteksi tetap memakai frame baru, hanya kotaknya yang diambil dari inferensi terakhir
+    detected_image_filename = await io_executor.run(register_detected, original, previous, renderer)
+    return sig, (previous, detected_image_filename)
+
+async def detect_image_bytes(image_data, tiling=None, camera=None, renderer=None):
+    if not inference_runtime.ready.is_set():
+        raise NotReady()
+
+    # Cek cache dulu; entri hanya dipakai jika gambar hasil deteksinya masih bisa disajikan
+    variant = "tiled-{}-{}".format(*tiling) if tiling else ""
+    with stage("cache_lookup"):
+        key, cached = await io_executor.run(detection_cache.lookup, image_data, variant)
+    if cached and (renderer or lazy_renderer).exists(cached["photo_detected"]):
+        return cached["detections"], cached["photo_detected"]
+
+    # Foto dari kamera: lewati inferensi jika adegannya tidak berubah. Request tiling tidak pernah di-gate:
+    # tiling dipakai justru untuk objek kecil yang tidak terlihat di signature 64x48.
+    gate_camera = camera if camera and tiling is None and scene_gate.enabled else None
+    if gate_camera:
+        sig, reused = await scene_gate_check(gate_camera, image_data, image_data, renderer)
+        if reused:
+            return reused
+
+    # Job async yang deadline-nya sudah lewat / dibatalkan berhenti di sini, sebelum decode dan model
+    check_deadline()
+    started = time.perf_counter()
+    # Mode tiling butuh resolusi penuh, decode tereduksi hanya untuk inferensi satu frame
+    img, scale = await io_executor.run(prepare_image, image_data, tiling is None)
+    # Cek lagi: decode bisa antre lama di io_executor, dan job tidak perlu mengantre ke model lagi
+    check_deadline()
+    detections, detected_image_filename = await inference_executor.run(
+        object_detector, img, original=image_data, scale=scale, tiling=tiling, renderer=renderer
+    )
+    if gate_camera:
+        scene_gate.update(gate_camera, sig, detections, time.perf_counter() - started)
+    await io_executor.run(detection_cache.put, key, {"detections": detections, "photo_detected": detected_image_filename})
+    return detections, detected_image_filename
+
+def persist_original(filename, data):
+    with stage("persist_original"):
+        original_store.put(filename, data)
+
+# File di store tidak pernah berubah isinya, jadi boleh di-cache klien / CDN selamanya
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+def parse_range(header, size):
+    """Satu rentang 'bytes=a-b' / 'bytes=a-' / 'bytes=-n' -> (awal, akhir) inklusif; None jika tidak valid."""
+    unit, _, spec = header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        return None
+    start, _, end = spec.strip().partition("-")
+    try:
+        if start:
+            first, last = int(start), int(end) if end else size - 1
+        else:
+            first, last = size - int(end), size - 1
+    except ValueError:
+        return None
+    first, last = max(0, first), min(last, size - 1)
+    return (first, last) if first <= last else None
+
+def read_range(path, first, last):
+    with open(path, "rb") as f:
+        f.seek(first)
+        return f.read(last - first + 1)
+
+async def image_response(request: Request, path, filename):
+    media_type = mimetypes.guess_type(filename)[0] or "image/jpeg"
+    # Nama file = hash isi, jadi bisa langsung dipakai sebagai ETag kuat
+    etag = '"{}"'.format(os.path.splitext(filename)[0])
+    headers = {"ETag": etag, "Cache-Control": IMMUTABLE_CACHE_CONTROL, "Accept-Ranges": "bytes"}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or etag in [t.strip() for t in if_none_match.split(",")]):
+        return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    if range_header and request.headers.get("if-range", etag) == etag:
+        size = (await io_executor.run(os.stat, path)).st_size
+        byte_range = parse_range(range_header, size)
+        if byte_range is None:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+        first, last = byte_range
+        content = await io_executor.run(read_range, path, first, last)
+        return Response(content=content, status_code=206, media_type=media_type,
+                        headers={**headers, "Content-Range": f"bytes {first}-{last}/{size}"})
+
+    return FileResponse(path, media_type=media_type, headers=headers)
 
 @app.get("/")
 async def index():
     return {"message": "Selamat datang di API Model AI Next-Gen Hydroponics!"}
 
+@app.get("/healthz")
+async def liveness():
+    # Liveness: proses hidup dan event loop merespons, tidak bergantung pada model
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readiness():
+    # Readiness: traffic inferensi baru boleh masuk setelah model dimuat dan di-warm-up
+    if not inference_runtime.ready.is_set():
+        status = "error" if inference_runtime.error else "loading"
+        return JSONResponse(status_code=503, content={"status": status, **inference_runtime.stats()}, headers={"Retry-After": "2"})
+    return {"status": "ready", **inference_runtime.stats()}
+
+@app.get("/stats")
+async def stats():
+    return {
+        "model": inference_runtime.stats(),
+        "batching": inference_runtime.batch_engine.stats() if inference_runtime.batch_engine else None,
+        "inference_pool": inference_runtime.inference_pool.stats() if inference_runtime.inference_pool else None,
+        "cache": detection_cache.stats(),
+        "esp32cam_watcher": esp32cam_watcher.stats(),
+        # Di worker selain background_worker scheduler selalu "running": false; lihat worker tersebut untuk statusnya
+        "camera_scheduler": {**camera_scheduler.stats(), "worker": worker_index(), "owner_worker": background_worker},
+        "firebase_writer": result_writer.stats(),
+        "streams": stream_ingestor.stats(),
+        "jobs": job_queue.stats(),
+        "scene_gate": scene_gate.stats(),
+        "http_client": image_fetcher.stats(),
+        "render": lazy_renderer.stats(),
+        "stream_render": stream_renderer.stats(),
+        "image_store": {
+            "original": original_store.stats(),
+            "detected": detected_store.stats(),
+            "pending": pending_store.stats(),
+        },
+        "executors": {
+            "io": io_executor.stats(),
+            "inference": inference_executor.stats(),
+        },
+    }
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    content, content_type = metrics.render_latest()
+    return Response(content=content, media_type=content_type)
+
+@app.get("/detectedImages/{filename}")
+async def detected_image(request: Request, filename: str):
+    path = await io_executor.run(render_detected, filename)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Gambar tidak ditemukan")
+    return await image_response(request, path, filename)
+
+@app.get("/uploadedFile/{filename}")
+async def uploaded_image(request: Request, filename: str):
+    path = await io_executor.run(original_store.locate, filename)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Gambar tidak ditemukan")
+    return await image_response(request, path, filename)
+
+async def read_image_url(image_url):
+    if image_url.startswith("data:image"):
+        # Handle base64 encoded image
+        base64_str = image_url.split(",")[1]
+        with stage("base64_decode"):
+            image_data = base64.b64decode(base64_str)
+        return image_data, f"{uuid.uuid4()}.jpg"
+
+    # Handle regular URL
+    try:
+        with stage("fetch"):
+            image_data = await image_fetcher.fetch(image_url)
+    except FetchError:
+        raise HTTPException(status_code=400, detail="Gagal mengambil file dari URL")
+    file_extension = image_url.split('.')[-1]
+    return image_data, f"{uuid.uuid4()}.{file_extension}"
+
+async def detect_upload(base_url, background_tasks, image_data, temp_filename, tiling=None):
+    # Decode langsung dari bytes request, tanpa tulis lalu baca ulang dari disk
+    detections, detected_image_filename = await detect_image_bytes(image_data, tiling)
+
+    # Gambar asli disimpan setelah respons dikirim (opsional). Namanya hash isi gambar (gambar yang sama
+    # hanya disimpan sekali); temp_filename hanya dipakai untuk ekstensinya.
+    if save_original:
+        filename = await io_executor.run(original_store.name_for, image_data, os.path.splitext(temp_filename)[1])
+        background_tasks.add_task(persist_original, filename, image_data)
+        photo_original = f"{base_url}/uploadedFile/{filename}"
+    else:
+        photo_original = None
+
+    # Generate full URL untuk gambar yang terdeteksi
+    detected_image_url = f"{base_url}/detectedImages/{detected_image_filename}"
+
+    # Tentukan status ulat
+    status_ulat = ulat_status(detections)
+
+    return {
+        "detections": detections,
+        "status_ulat": status_ulat,
+        "photo_detected": detected_image_url,
+        "photo_original": photo_original
+    }
+
 @app.post("/upload")
-async def upload_file(request: Request, file: UploadFile = File(None), image_url: str = Form(None)):
+async def upload_file(request: Request, background_tasks: BackgroundTasks, file: UploadFile = File(None), image_url: str = Form(None),
+                      tiled: bool = Form(False), tile_size: int = Form(None), tile_overlap: float = Form(None)):
     base_url = str(request.base_url).rstrip("/")
     try:
+        tiling = tiling_options(tiled, tile_size, tile_overlap)
         if file:
             # Handle UploadFile
-            file.filename = f"{uuid.uuid4()}.jpg"
-            file_path = os.path.join(image_directory, file.filename)
-
-            with open(file_path, "wb") as f:
-                shutil.copyfileobj(file.file, f)
-
-            photo_original = f"{base_url}/uploadedFile/{file.filename}"
-
+            with stage("read_upload"):
+                image_data = await file.read()
+            temp_filename = f"{uuid.uuid4()}.jpg"
         elif image_url:
-            # Handle URL
-            if image_url.startswith("data:image"):
-                # Handle base64 encoded image
-                base64_str = image_url.split(",")[1]
-                image_data = base64.b64decode(base64_str)
-                temp_filename = f"{uuid.uuid4()}.jpg"
-                file_path = os.path.join(image_directory, temp_filename)
-
-                with open(file_path, "wb") as f:
-                    f.write(image_data)
-                
-                photo_original = f"{base_url}/uploadedFile/{temp_filename}"
-            else:
-                # Handle regular URL
-                response = requests.get(image_url)
-                if response.status_code == 200:
-                    file_extension = image_url.split('.')[-1]
-                    temp_filename = f"{uuid.uuid4()}.{file_extension}"
-                    file_path = os.path.join(image_directory, temp_filename)
-
-                    with open(temp_file_path, 'wb') as f:
-                        f.write(response.content)
-
-                    photo_original = f"{base_url}/uploadedFile/{temp_filename}"
-                else:
-                    raise HTTPException(status_code=400, detail="Gagal mengambil file dari URL")
+            image_data, temp_filename = await read_image_url(image_url)
         else:
             raise HTTPException(status_code=400, detail="Tidak ada file atau URL yang diberikan")
 
-        detections, detected_image_filename = object_detector(file_path)
-        # os.remove(file_path)  # Hapus file yang diunggah/sementara
-        cleanup_old_files(image_directory)
-
-        # Generate full URL untuk gambar yang terdeteksi
-        detected_image_url = f"{base_url}/detectedImages/{detected_image_filename}"
-
-        # Bersihkan file lama di direktori detectedImages
-        cleanup_old_files(output_directory)
-
-        # Tentukan status ulat
-        status_ulat = "true" if any(d["label"] == "ulat" for d in detections) else "false"
-
         # return JSONResponse(content={"detections": detections, "status_ulat": status_ulat, "photo_detected": detected_image_url})
-        return JSONResponse(content={
-                "detections": detections,
-                "status_ulat": status_ulat,
-                "photo_detected": detected_image_url,
-                "photo_original": photo_original
-            })
+        return JSONResponse(content=await detect_upload(base_url, background_tasks, image_data, temp_filename, tiling))
+    except (HTTPException, ExecutorFull, NotReady, ImageTooLarge):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    
-@app.get("/detect_latest_image")
-async def detect_latest_image(request: Request):
-    try:
-        # Ambil data photo_original terbaru dari Firebase Realtime Database
-        ref = db.reference('esp32cam')
-        esp32cam_data = ref.get()
 
-        if not esp32cam_data:
-            raise HTTPException(status_code=404, detail="Tidak ada data ditemukan di Firebase")
-
-        # Ambil data berdasarkan tanggal dan waktu hari ini di zona waktu GMT+8
-        tz = pytz.timezone('Asia/Singapore')  # GMT+8
-        now = datetime.now(tz)
-        today_date = now.strftime('%Y-%m-%d')
-        current_time = now.strftime('%H:%M')
-
-        if today_date not in esp32cam_data:
-            raise HTTPException(status_code=404, detail="Tidak ada data ditemukan untuk tanggal hari ini")
-
-        today_time_data = esp32cam_data[today_date]
+def error_detail(exc):
+    # Bentuk error yang sama dengan respons /upload, untuk hasil yang tidak dikirim sebagai respons HTTP
+    if isinstance(exc, HTTPException):
+        return {"status_code": exc.status_code, "detail": exc.detail}
+    if isinstance(exc, (ExecutorFull, NotReady)):
+        return {"status_code": 503, "detail": str(exc), "retry_after": exc.retry_after}
+    if isinstance(exc, ImageTooLarge):
+        return {"status_code": 413, "detail": str(exc)}
+    return {"status_code": 500, "detail": str(exc)}
+
+def batch_item_error(index, exc):
+    return {"index": index, "status": "error", **error_detail(exc)}
+
+@app.post("/upload/batch")
+async def upload_batch(request: Request, background_tasks: BackgroundTasks, files: List[UploadFile] = File(None),
+                       image_urls: List[str] = Form(None), tiled: bool = Form(False), tile_size: int = Form(None),
+                       tile_overlap: float = Form(None)):
+    base_url = str(request.base_url).rstrip("/")
+    tiling = tiling_options(tiled, tile_size, tile_overlap)
+    files = files or []
+    image_urls = image_urls or []
+
+    total = len(files) + len(image_urls)
+    if total == 0:
+        raise HTTPException(status_code=400, detail="Tidak ada file atau URL yang diberikan")
+    if total > batch_upload_max_items:
+        raise HTTPException(status_code=413, detail=f"Maksimum {batch_upload_max_items} gambar per batch")
+
+    # Isi file dibaca sebelum streaming dimulai, karena file upload bisa sudah ditutup saat body respons dikirim.
+    # Indeks mengikuti urutan input: semua file dulu, lalu image_urls.
+    sources = []
+    with stage("read_upload"):
+        for file in files:
+            sources.append((await file.read(), f"{uuid.uuid4()}.jpg"))
+    sources += image_urls
+
+    semaphore = asyncio.Semaphore(batch_upload_concurrency)
+
+    async def process(index, source):
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                if isinstance(source, str):
+                    image_data, temp_filename = await read_image_url(source)
+                else:
+                    image_data, temp_filename = source
+                # Task tambahan (simpan gambar asli) dijalankan setelah seluruh stream selesai dikirim
+                result = await detect_upload(base_url, background_tasks, image_data, temp_filename, tiling)
+            except Exception as e:
+                return batch_item_error(index, e)
+            return {"index": index, "status": "ok", **result, "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)}
+
+    async def stream():
+        started = time.perf_counter()
+        summary = {"total": total, "succeeded": 0, "failed": 0, "images_with_ulat": 0, "total_ulat": 0}
+        tasks = [asyncio.ensure_future(process(index, source)) for index, source in enumerate(sources)]
+        try:
+            # Satu baris NDJSON per gambar, sesuai urutan selesai
+            for next_done in asyncio.as_completed(tasks):
+                line = await next_done
+                if line["status"] == "ok":
+                    summary["succeeded"] += 1
+                    ulat = sum(1 for d in line["detections"] if d["label"] == "ulat")
+                    summary["total_ulat"] += ulat
+                    summary["images_with_ulat"] += 1 if ulat else 0
+                else:
+                    summary["failed"] += 1
+                yield json.dumps(line) + "\n"
+        finally:
+            # Klien memutus koneksi: batalkan gambar yang belum diproses
+            for task in tasks:
+                task.cancel()
+        summary["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        yield json.dumps({"summary": summary}) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+async def run_upload_job(payload):
+    if isinstance(payload["source"], str):
+        # Simpan hasil fetch di payload: jika job dicoba lagi (antrean penuh), URL tidak diambil ulang
+        payload["source"] = await read_image_url(payload["source"])
+    image_data, temp_filename = payload["source"]
+    background_tasks = BackgroundTasks()
+    result = await detect_upload(payload["base_url"], background_tasks, image_data, temp_filename, payload["tiling"])
+    await background_tasks()
+    return result
+
+# Mode job (POST /jobs): upload langsung dijawab dengan id job, deteksi berjalan di antrean background.
+# JOB_DEFAULT_DEADLINE / JOB_MAX_DEADLINE dalam detik; job yang lewat deadline dibuang sebelum inferensi.
+# JOB_STATE_DIR dipakai server.py (multi-worker) agar GET /jobs/{id} bisa dijawab worker mana pun.
+job_queue = JobQueue(
+    run_upload_job,
+    workers=int(os.getenv("JOB_WORKERS", 4)),
+    max_pending=int(os.getenv("JOB_QUEUE_SIZE", 256)),
+    default_deadline=float(os.getenv("JOB_DEFAULT_DEADLINE", 120)),
+    max_deadline=float(os.getenv("JOB_MAX_DEADLINE", 900)),
+    result_ttl=float(os.getenv("JOB_RESULT_TTL", 600)),
+    retry_after=retry_after,
+    error_fn=error_detail,
+    state_dir=os.getenv("JOB_STATE_DIR") or None,
+)
+metrics.watch_queue("jobs", job_queue.queue_depth)
 
-        # Ambil data berdasarkan waktu terbaru pada hari ini
-        latest_time = max(today_time_data.keys(), key=lambda t: datetime.strptime(t, '%H:%M'))
-        photo_original = today_time_data[latest_time]['photo_original']
+@app.post("/jobs")
+async def submit_job(request: Request, file: UploadFile = File(None), image_url: str = Form(None), tiled: bool = Form(False),
+                     tile_size: int = Form(None), tile_overlap: float = Form(None), deadline: float = Form(None)):
+    base_url = str(request.base_url).rstrip("/")
+    tiling = tiling_options(tiled, tile_size, tile_overlap)
+    if file:
+        # Isi file dibaca sekarang; fetch image_url dilakukan di dalam job
+        with stage("read_upload"):
+            source = (await file.read(), f"{uuid.uuid4()}.jpg")
+    elif image_url:
+        source = image_url
+    else:
+        raise HTTPException(status_code=400, detail="Tidak ada file atau URL yang diberikan")
+
+    job = job_queue.submit({"base_url": base_url, "source": source, "tiling": tiling}, deadline)
+    status_url = f"{base_url}/jobs/{job.id}"
+    return JSONResponse(status_code=202, content={**job.snapshot(), "status_url": status_url}, headers={"Location": status_url})
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str, timeout: float = 0):
+    # Long-poll: dengan ?timeout=<detik> tunggu sampai job selesai (done / failed / expired / cancelled)
+    snapshot = await job_queue.wait(job_id, min(timeout, 60))
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="Job tidak ditemukan")
+    return snapshot
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    # Klien tidak lagi butuh hasilnya: job yang belum mencapai model tidak dijalankan
+    snapshot = await job_queue.cancel(job_id)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="Job tidak ditemukan")
+    return snapshot
+
+async def process_camera_entry(watcher, entry, tiling=None):
+    # Entri harus sudah di-claim oleh pemanggil
+    try:
+        # Lakukan deteksi objek menggunakan YOLO
+        with stage("fetch"):
+            image_data = await image_fetcher.fetch(entry.photo_original)
+        detections, detected_image_filename = await detect_image_bytes(image_data, tiling, camera=watcher.ref.path)
 
-        # Cek apakah tanggal dan waktu dari Firebase sesuai dengan tanggal dan waktu saat ini
-        if today_date == today_date and latest_time == current_time:
-            # Lakukan deteksi objek menggunakan YOLO
-            detections, detected_image_filename = object_detector(photo_original)
+        # Generate full URL untuk gambar yang terdeteksi
+        detected_image_url = f"{base_url}/detectedImages/{detected_image_filename}"
 
-            # Generate full URL untuk gambar yang terdeteksi
-            detected_image_url = f"{base_url}/detectedImages/{detected_image_filename}"
+        # Tentukan status ulat
+        status_ulat = ulat_status(detections)
+
+        # Simpan hasil deteksi kembali ke Firebase (write-behind, tanpa menunggu round-trip)
+        result_writer.update(f"{watcher.ref.path}/{entry.date}/{entry.time}", {
+            "photo_hama": detected_image_url,
+            "status_hama": status_ulat
+        })
+    except (ExecutorFull, NotReady, asyncio.CancelledError):
+        watcher.release(entry)
+        raise
+    except Exception:
+        watcher.mark_failed(entry)
+        raise
+    watcher.mark_processed(entry)
+
+    return {"detections": detections, "status_ulat": status_ulat, "photo_detected": detected_image_url}
+
+async def poll_camera(watcher):
+    with stage("firebase_poll"):
+        return await io_executor.run(watcher.poll)
+
+async def process_scheduled_entry(name, watcher, entry):
+    # Tunggu model siap agar foto yang ditemukan saat startup tidak langsung dihitung gagal
+    while not inference_runtime.ready.is_set():
+        await asyncio.sleep(1)
+    if watcher.claim(entry):
+        await process_camera_entry(watcher, entry)
+
+# Scheduler polling kamera (pengganti run_periodically). CAMERA_NODES berisi node Firebase yang dipantau,
+# misalnya "esp32cam,esp32cam2"; kosong = nonaktif dan foto hanya diproses lewat /detect_latest_image.
+camera_nodes = [node.strip() for node in os.getenv("CAMERA_NODES", "").split(",") if node.strip()]
+camera_scheduler = CameraScheduler(
+    poll_camera,
+    process_scheduled_entry,
+    min_interval=float(os.getenv("CAMERA_POLL_MIN_INTERVAL", 1)),
+    max_interval=float(os.getenv("CAMERA_POLL_MAX_INTERVAL", 30)),
+    backoff=float(os.getenv("CAMERA_POLL_BACKOFF", 2)),
+    concurrency=int(os.getenv("CAMERA_CONCURRENCY", 2)),
+)
+for node in camera_nodes:
+    camera_scheduler.add_camera(node, esp32cam_watcher if node == "esp32cam" else camera_watcher(node))
+metrics.watch_queue("camera", camera_scheduler.queue_depth)
+
+async def detect_stream_frame(name, frame):
+    if isinstance(frame, bytes):
+        # Frame MJPEG (JPEG utuh): jalur yang sama dengan /upload
+        detections, detected_image_filename = await detect_image_bytes(frame, camera=f"stream:{name}", renderer=stream_renderer)
+    else:
+        # Frame RTSP sudah berupa array hasil decode
+        if not inference_runtime.ready.is_set():
+            raise NotReady()
+        sig, reused = await scene_gate_check(f"stream:{name}", frame, frame, stream_renderer) if scene_gate.enabled else (None, None)
+        if reused:
+            detections, detected_image_filename = reused
+        else:
+            started = time.perf_counter()
+            detections, detected_image_filename = await inference_executor.run(object_detector, frame, renderer=stream_renderer)
+            if scene_gate.enabled:
+                scene_gate.update(f"stream:{name}", sig, detections, time.perf_counter() - started)
+    result = {
+        "detections": detections,
+        "status_ulat": ulat_status(detections),
+        "photo_detected": f"{base_url}/detectedImages/{detected_image_filename}",
+    }
+    # Hasil terbaru juga dipublikasikan ke Firebase; penulisan digabung oleh result_writer
+    if stream_results_node:
+        result_writer.update(f"{stream_results_node}/{name}", {**result, "updated_at": int(time.time())})
+    return result
+
+# Stream kamera langsung (MJPEG lewat HTTP atau RTSP): STREAM_SOURCES="bedA=http://192.168.1.20:81/stream,bedB=rtsp://..."
+# Frame yang datang saat inferensi masih berjalan dibuang, model selalu memproses frame terbaru.
+# Stream hanya dibaca worker 0; STREAM_STATE_DIR (diisi server.py saat multi-worker) membagikan hasilnya ke worker lain.
+stream_results_node = os.getenv("STREAM_RESULTS_NODE", "stream_results")
+stream_ingestor = StreamIngestor(
+    detect_stream_frame,
+    min_interval=float(os.getenv("STREAM_MIN_INTERVAL", 0)),
+    read_timeout=float(os.getenv("STREAM_READ_TIMEOUT", 10)),
+    max_frame_bytes=int(os.getenv("STREAM_MAX_FRAME_BYTES", 4 * 1024 * 1024)),
+    state_dir=os.getenv("STREAM_STATE_DIR") or None,
+)
+for source in os.getenv("STREAM_SOURCES", "").split(","):
+    if "=" in source:
+        stream_name, stream_url = source.split("=", 1)
+        stream_ingestor.add_stream(stream_name.strip(), stream_url.strip())
+
+@app.get("/streams")
+async def list_streams():
+    return stream_ingestor.stats()
+
+@app.get("/streams/{name}")
+async def stream_result(name: str, after: int = None, timeout: float = 0):
+    # Long-poll: dengan ?after=<seq>&timeout=<detik> tunggu sampai ada hasil yang lebih baru
+    if name not in stream_ingestor.names():
+        raise HTTPException(status_code=404, detail="Stream tidak ditemukan")
+    result = await stream_ingestor.latest(name, after, min(timeout, 60))
+    if result is None:
+        return JSONResponse(content={"message": "Belum ada hasil deteksi untuk stream ini."})
+    return result
 
-            # Tentukan status ulat
-            status_ulat = "true" if any(d["label"] == "ulat" for d in detections) else "false"
+@app.get("/detect_latest_image")
+async def detect_latest_image(request: Request, tiled: bool = False, tile_size: int = None, tile_overlap: float = None):
+    try:
+        tiling = tiling_options(tiled, tile_size, tile_overlap)
+        # Ambil hanya entri esp32cam yang belum diproses (query terurut dan terbatas di Firebase)
+        with stage("firebase_poll"):
+            entries = await io_executor.run(esp32cam_watcher.poll)
 
-            # Simpan hasil deteksi kembali ke Firebase
-            ref.child(today_date).child(latest_time).update({
-                "photo_hama": detected_image_url,
-                "status_hama": status_ulat
-            })
+        if not entries:
+            return JSONResponse(content={"message": "Tidak ada data terbaru untuk tanggal dan waktu saat ini."})
 
-            return JSONResponse(content={"detections": detections, "status_ulat": status_ulat, "photo_detected": detected_image_url})
-        else:
+        # Proses foto terbaru yang belum sedang diproses (misalnya oleh scheduler kamera);
+        # entri lain tetap antre untuk pemanggilan berikutnya
+        entry = next((e for e in reversed(entries) if esp32cam_watcher.claim(e)), None)
+        if entry is None:
             return JSONResponse(content={"message": "Tidak ada data terbaru untuk tanggal dan waktu saat ini."})
+
+        return JSONResponse(content=await process_camera_entry(esp32cam_watcher, entry, tiling))
+    except (HTTPException, ExecutorFull, NotReady, ImageTooLarge):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 base_url = "http://nextgen.dev.smartgreenovation.com"
 
-# @app.on_event("startup")
-# async def startup_event():
-#     global base_url
-#     # base_url = "http://127.0.0.1:8001"
-#     base_url = "http://nextgen.dev.smartgreenovation.com"
-#     asyncio.create_task(run_periodically())
-
-# async def run_periodically():
-#     while True:
-#         request = Request(scope={"type": "http", "method": "GET", "headers": []})
-#         try:
-#             await detect_latest_image(request)
-#         except Exception as e:
-#             print(f"Error during periodic task: {e}")
-#         await asyncio.sleep(1)
-
-app.mount("/detectedImages", StaticFiles(directory=output_directory), name="detectedImages")
-app.mount("/uploadedFile", StaticFiles(directory=image_directory), name="uploadedFile")
+@app.on_event("startup")
+async def load_model_event():
+    metrics.MODEL_LOAD_SECONDS.set_function(lambda: inference_runtime.load_seconds or 0)
+    original_store.start()
+    detected_store.start()
+    pending_store.start()
+    result_writer.start()
+    job_queue.start()
+    inference_runtime.start_background()
+    # Mode multi-worker (server.py): cukup satu worker yang menjalankan scheduler kamera dan stream
+    if worker_index() == background_worker:
+        camera_scheduler.start()
+        stream_ingestor.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await camera_scheduler.stop()
+    await stream_ingestor.stop()
+    await job_queue.stop()
+    await image_fetcher.aclose()
+    # Kirim hasil yang masih di buffer sebelum proses berhenti
+    await asyncio.get_running_loop().run_in_executor(None, result_writer.close)
 
 if __name__ == "__main__":
     import uvicorn
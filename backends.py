@@ -0,0 +1,140 @@
+import glob
+import os
+import tempfile
+
+import cv2
+import numpy as np
+
+BACKENDS = ("pytorch", "onnx", "openvino")
+
+
+def exported_path(model_path, backend, int8=False):
+    """Lokasi hasil export yang disimpan di samping file model (.pt)."""
+    stem, _ = os.path.splitext(model_path)
+    if backend == "pytorch":
+        return model_path
+    if backend == "onnx":
+        return f"{stem}_int8.onnx" if int8 else f"{stem}.onnx"
+    if backend == "openvino":
+        return f"{stem}_int8_openvino_model" if int8 else f"{stem}_openvino_model"
+    raise ValueError(f"Backend inferensi tidak dikenal: {backend} (pilihan: {', '.join(BACKENDS)})")
+
+
+def effective_int8(backend, int8):
+    """Kembalikan int8 yang benar-benar dipakai: backend pytorch tidak punya varian INT8 dan memakai best.pt apa adanya."""
+    if int8 and backend == "pytorch":
+        print("INFERENCE_INT8 diabaikan untuk backend pytorch (INT8 hanya untuk onnx / openvino)")
+        return False
+    return int8
+
+
+def _is_fresh(path, model_path):
+    # Export ulang jika file model lebih baru dari hasil export
+    return os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(model_path)
+
+
+def calibration_images(calibration_dir, limit=300):
+    paths = []
+    for pattern in ("*.jpg", "*.jpeg", "*.png"):
+        paths += glob.glob(os.path.join(calibration_dir, pattern))
+    if not paths:
+        raise FileNotFoundError(f"Tidak ada gambar kalibrasi di {calibration_dir}")
+    return sorted(paths)[:limit]
+
+
+def letterbox(img, size):
+    h, w = img.shape[:2]
+    scale = min(size / h, size / w)
+    new_w, new_h = int(round(w * scale)), int(round(h * scale))
+    canvas = np.full((size, size, 3), 114, dtype=np.uint8)
+    top, left = (size - new_h) // 2, (size - new_w) // 2
+    canvas[top:top + new_h, left:left + new_w] = cv2.resize(img, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    return canvas
+
+
+def _onnx_input(img, size):
+    # BGR HWC uint8 -> RGB NCHW float32 0..1, sama seperti preprocessing ultralytics
+    x = letterbox(img, size)[:, :, ::-1].transpose(2, 0, 1)
+    return np.ascontiguousarray(x, dtype=np.float32)[None] / 255.0
+
+
+def _quantize_onnx(fp32_path, int8_path, calibration_dir, imgsz):
+    import onnxruntime
+    from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+
+    input_name = onnxruntime.InferenceSession(fp32_path, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+
+    class _Reader(CalibrationDataReader):
+        def __init__(self):
+            self._paths = iter(calibration_images(calibration_dir))
+
+        def get_next(self):
+            for path in self._paths:
+                img = cv2.imread(path)
+                if img is not None:
+                    return {input_name: _onnx_input(img, imgsz)}
+            return None
+
+    quantize_static(
+        fp32_path,
+        int8_path,
+        _Reader(),
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        per_channel=True,
+    )
+
+
+def _openvino_dataset_yaml(calibration_dir, names):
+    # Ultralytics memerlukan file dataset YAML untuk kalibrasi INT8 OpenVINO (NNCF)
+    f = tempfile.NamedTemporaryFile("w", suffix=".yaml", delete=False)
+    with f:
+        f.write(f"path: {os.path.abspath(calibration_dir)}\ntrain: .\nval: .\nnames:\n")
+        for index, name in names.items():
+            f.write(f"  {index}: {name}\n")
+    return f.name
+
+
+def export_model(model_path, backend, int8=False, calibration_dir=None, imgsz=640):
+    """Export model .pt ke ONNX / OpenVINO IR (opsional INT8 terkalibrasi) lalu kembalikan path-nya."""
+    from ultralytics import YOLO
+
+    target = exported_path(model_path, backend, int8)
+    if int8 and not calibration_dir:
+        raise ValueError("Kuantisasi INT8 memerlukan CALIBRATION_DIR berisi gambar hidroponik")
+
+    model = YOLO(model_path)
+    if backend == "onnx":
+        fp32_path = exported_path(model_path, "onnx")
+        if not _is_fresh(fp32_path, model_path):
+            fp32_path = model.export(format="onnx", imgsz=imgsz, dynamic=True, simplify=True)
+        if int8:
+            _quantize_onnx(fp32_path, target, calibration_dir, imgsz)
+        return target
+
+    if backend == "openvino":
+        if int8:
+            data = _openvino_dataset_yaml(calibration_dir, model.names)
+            try:
+                return model.export(format="openvino", imgsz=imgsz, dynamic=True, int8=True, data=data)
+            finally:
+                os.remove(data)
+        return model.export(format="openvino", imgsz=imgsz, dynamic=True)
+
+    return target
+
+
+def resolve_model_path(model_path, backend="pytorch", int8=False, calibration_dir=None, imgsz=640):
+    """Kembalikan path model untuk backend yang dipilih; export sekali jika belum ada di cache."""
+    target = exported_path(model_path, backend, int8)
+    if backend != "pytorch" and not _is_fresh(target, model_path):
+        target = export_model(model_path, backend, int8=int8, calibration_dir=calibration_dir, imgsz=imgsz)
+    return target
+
+
+def load_model(path):
+    from ultralytics import YOLO
+
+    # task perlu diset eksplisit untuk model hasil export (ONNX / OpenVINO)
+    return YOLO(path, task="detect")
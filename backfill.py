@@ -0,0 +1,260 @@
+"""Proses ulang foto esp32cam/<tanggal>/<waktu> yang belum punya photo_hama (misalnya saat API mati).
+
+Entri dibaca per hari dalam rentang tanggal, difetch dan dideteksi paralel (--concurrency), lalu
+hasilnya ditulis kembali ke Firebase dalam update multi-path (--batch-size path per update).
+Setelah semua hasil satu hari tersimpan, hari itu dicatat di file checkpoint; jika proses
+dihentikan, jalankan ulang perintah yang sama dan hari yang sudah selesai dilewati. Entri yang
+hasilnya sudah tertulis juga otomatis dilewati karena sudah punya photo_hama.
+
+    python backfill.py --start-date 2024-05-01 --end-date 2024-05-31 --concurrency 8
+    python backfill.py --fake-db fake_db.json --start-date 2024-01-01   # uji lokal tanpa Firebase asli
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+from firebase_admin import db
+
+from esp32cam_watcher import PhotoEntry, after_day, first_day
+from executor import ExecutorFull
+from firebase_writer import FirebaseWriter
+from metrics import stage
+from postprocess import ulat_status
+from runtime import NotReady
+
+
+def parse_date(value):
+    # Validasi format saja; key Firebase dibandingkan sebagai string 'YYYY-MM-DD'
+    datetime.strptime(value, "%Y-%m-%d")
+    return value
+
+
+class Checkpoint:
+    def __init__(self, path, node):
+        self.path = path
+        self.node = node
+        self.completed_dates = set()
+        self.failed = {}  # 'tanggal/waktu' -> {"attempts": n, "error": pesan}
+        self.processed = 0
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path) as f:
+            data = json.load(f)
+        if data.get("node") != self.node:
+            raise SystemExit(f"Checkpoint {self.path} milik node {data.get('node')}, bukan {self.node}")
+        self.completed_dates = set(data.get("completed_dates", []))
+        self.failed = data.get("failed", {})
+        self.processed = data.get("processed", 0)
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "node": self.node,
+                "completed_dates": sorted(self.completed_dates),
+                "failed": self.failed,
+                "processed": self.processed,
+                "updated_at": time.time(),
+            }, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+class Backfill:
+    def __init__(self, api, ref, writer, checkpoint, base_url, concurrency, max_attempts, tiling=None, on_day_done=None):
+        self.api = api
+        self.ref = ref
+        self.writer = writer
+        self.checkpoint = checkpoint
+        self.base_url = base_url
+        self.concurrency = max(1, concurrency)
+        self.max_attempts = max_attempts
+        self.tiling = tiling
+        self.on_day_done = on_day_done
+        self.counters = {"ok": 0, "failed": 0, "skipped": 0}
+
+    def unprocessed(self, date, times):
+        entries = []
+        for time_key, value in sorted((times or {}).items()):
+            if not isinstance(value, dict) or not value.get("photo_original") or value.get("photo_hama"):
+                continue
+            failed = self.checkpoint.failed.get(f"{date}/{time_key}")
+            if failed and failed["attempts"] >= self.max_attempts:
+                self.counters["skipped"] += 1
+                continue
+            entries.append(PhotoEntry(date, time_key, value["photo_original"]))
+        return entries
+
+    async def process(self, entry):
+        api = self.api
+        key = f"{entry.date}/{entry.time}"
+        while True:
+            try:
+                with stage("fetch"):
+                    image_data = await api.image_fetcher.fetch(entry.photo_original)
+                # Gambar asli + deteksi tersimpan di pending store, jadi API bisa merender photo_hama kapan pun
+                detections, detected_image_filename = await api.detect_image_bytes(image_data, self.tiling)
+            except (ExecutorFull, NotReady) as e:
+                # Antrean internal penuh: tunggu sebentar, bukan kegagalan foto
+                await asyncio.sleep(e.retry_after)
+                continue
+            except Exception as e:
+                failed = self.checkpoint.failed.setdefault(key, {"attempts": 0, "error": None})
+                failed["attempts"] += 1
+                failed["error"] = str(e)
+                self.counters["failed"] += 1
+                print(f"Gagal memproses {key}: {e}")
+                return
+            break
+
+        self.writer.update(f"{self.ref.path}/{entry.date}/{entry.time}", {
+            "photo_hama": f"{self.base_url}/detectedImages/{detected_image_filename}",
+            "status_hama": ulat_status(detections),
+        })
+        self.checkpoint.failed.pop(key, None)
+        self.checkpoint.processed += 1
+        self.counters["ok"] += 1
+
+    async def run_day(self, entries):
+        pending = iter(entries)
+
+        async def worker():
+            for entry in pending:
+                await self.process(entry)
+
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+
+    async def run(self, start_date, end_date, limit=0):
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        cursor = start_date
+        while True:
+            days = await loop.run_in_executor(None, first_day, self.ref, cursor, end_date)
+            if not days:
+                break
+            date, times = next(iter(days.items()))
+            cursor = after_day(date)
+            if date in self.checkpoint.completed_dates:
+                continue
+
+            entries = self.unprocessed(date, times)
+            complete = True
+            if limit:
+                remaining = max(0, limit - self.counters["ok"] - self.counters["failed"])
+                complete = len(entries) <= remaining
+                entries = entries[:remaining]
+            dropped = self.writer.stats()["dropped"]
+            day_started = time.perf_counter()
+            await self.run_day(entries)
+
+            # Hari dianggap selesai hanya jika semua hasilnya sudah tersimpan di Firebase
+            if not await loop.run_in_executor(None, self.writer.flush) or self.writer.stats()["dropped"] > dropped:
+                print(f"{date}: sebagian hasil belum tersimpan, hari ini akan diulang pada run berikutnya")
+            elif complete and not any(key.startswith(date + "/") and failed["attempts"] < self.max_attempts
+                         for key, failed in self.checkpoint.failed.items()):
+                self.checkpoint.completed_dates.add(date)
+            await loop.run_in_executor(None, self.save)
+
+            day_elapsed = time.perf_counter() - day_started
+            print(f"{date}: {len(entries)} foto diproses dalam {day_elapsed:.1f} s "
+                  f"({len(entries) / day_elapsed if day_elapsed else 0:.2f} foto/detik), "
+                  f"total ok {self.counters['ok']}, gagal {self.counters['failed']}")
+            if limit and self.counters["ok"] + self.counters["failed"] >= limit:
+                break
+        return time.perf_counter() - started
+
+    def save(self):
+        self.checkpoint.save()
+        if self.on_day_done:
+            self.on_day_done()
+
+
+async def run_backfill(api, args, fake_db):
+    checkpoint = Checkpoint(args.checkpoint or f"backfill_{args.node.strip('/').replace('/', '_')}.json", args.node)
+    if not args.restart:
+        checkpoint.load()
+
+    writer = FirebaseWriter(
+        db.reference("/"),
+        max_batch=args.batch_size,
+        # Flush utama dilakukan per hari / per batch penuh; interval hanya batas atas latensi tulis
+        flush_interval=args.flush_interval,
+        max_retries=args.write_retries,
+    )
+    writer.start()
+    backfill = Backfill(
+        api,
+        db.reference(args.node),
+        writer,
+        checkpoint,
+        base_url=(args.base_url or api.base_url).rstrip("/"),
+        concurrency=args.concurrency,
+        max_attempts=args.max_attempts,
+        tiling=api.tiling_options(args.tiled),
+        on_day_done=(lambda: fake_db.to_json(args.fake_db)) if fake_db else None,
+    )
+
+    elapsed = 0.0
+    try:
+        elapsed = await backfill.run(args.start_date, args.end_date, args.limit)
+    finally:
+        # Juga saat dihentikan (Ctrl+C): hasil yang sudah ada tetap ditulis, checkpoint disimpan
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, writer.close)
+        await loop.run_in_executor(None, backfill.save)
+        await api.image_fetcher.aclose()
+
+    counters = backfill.counters
+    rate = counters["ok"] / elapsed if elapsed else 0.0
+    print(f"Selesai: {counters['ok']} foto diproses, {counters['failed']} gagal, {counters['skipped']} dilewati "
+          f"(gagal {args.max_attempts}x) dalam {elapsed:.1f} s = {rate:.2f} foto/detik; "
+          f"{writer.stats()['flushes']} update Firebase, checkpoint {checkpoint.path}")
+    return 1 if counters["failed"] else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--node", default="esp32cam", help="Node Firebase kamera")
+    parser.add_argument("--start-date", type=parse_date, default="", help="YYYY-MM-DD (default: paling awal)")
+    parser.add_argument("--end-date", type=parse_date, default=None, help="YYYY-MM-DD, inklusif (default: paling akhir)")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("BACKFILL_CONCURRENCY", 4)))
+    parser.add_argument("--batch-size", type=int, default=100, help="Path per update multi-path Firebase")
+    parser.add_argument("--flush-interval", type=float, default=5.0)
+    parser.add_argument("--write-retries", type=int, default=5)
+    parser.add_argument("--max-attempts", type=int, default=3, help="Lewati foto yang sudah gagal sebanyak ini")
+    parser.add_argument("--limit", type=int, default=0, help="Berhenti setelah N foto (0 = semua)")
+    parser.add_argument("--tiled", action="store_true", help="Deteksi dengan tiling (TILE_SIZE / TILE_OVERLAP)")
+    parser.add_argument("--base-url", default=None, help="Prefix URL photo_hama (default: base_url di api.py)")
+    parser.add_argument("--checkpoint", default=None, help="File checkpoint (default: backfill_<node>.json)")
+    parser.add_argument("--restart", action="store_true", help="Abaikan checkpoint yang ada")
+    parser.add_argument("--fake-db", default=None, help="JSON FakeDatabase sebagai pengganti Firebase; hasil ditulis kembali ke file ini")
+    args = parser.parse_args(argv)
+
+    fake_db = None
+    if args.fake_db:
+        from fake_firebase import FakeDatabase
+
+        fake_db = FakeDatabase.from_json(args.fake_db)
+        fake_db.install()
+        os.environ.setdefault("FIREBASE_CREDENTIALS", os.devnull)
+
+    import api
+
+    started = time.perf_counter()
+    api.inference_runtime.load()
+    print(f"Model siap dalam {time.perf_counter() - started:.2f} detik")
+
+    try:
+        return asyncio.run(run_backfill(api, args, fake_db))
+    except KeyboardInterrupt:
+        print("Dihentikan; jalankan perintah yang sama untuk melanjutkan dari checkpoint")
+        return 130
+
+
+if __name__ == "__main__":
+    sys.exit(main())
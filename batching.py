@@ -0,0 +1,111 @@
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+
+
+class BatchInferenceEngine:
+    """Kumpulkan permintaan inferensi yang datang bersamaan lalu jalankan sebagai satu batch.
+
+    predict_fn menerima list gambar dan harus mengembalikan list hasil dengan urutan yang sama.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=8, max_wait_ms=10):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._batch_sizes = Counter()
+        self._total_requests = 0
+        self._total_batches = 0
+        self._total_queue_wait = 0.0
+        self._max_queue_wait = 0.0
+        self._total_inference = 0.0
+
+        self._thread = threading.Thread(target=self._run, name="batch-inference", daemon=True)
+        self._thread.start()
+
+    def submit(self, img):
+        future = Future()
+        self._queue.put((img, future, time.monotonic()))
+        return future
+
+    def predict(self, img, timeout=None):
+        return self.submit(img).result(timeout=timeout)
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def stop(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+
+            batch = [item]
+            stopping = False
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    # Ambil yang sudah antre tanpa menunggu, sisanya tunggu sampai deadline
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._process(batch)
+            if stopping:
+                return
+
+    def _process(self, batch):
+        started = time.monotonic()
+        images = [img for img, _, _ in batch]
+        try:
+            results = self.predict_fn(images)
+            if len(results) != len(batch):
+                raise RuntimeError(f"Jumlah hasil ({len(results)}) tidak sama dengan jumlah gambar ({len(batch)})")
+        except Exception as e:
+            for _, future, _ in batch:
+                future.set_exception(e)
+        else:
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
+        finished = time.monotonic()
+
+        with self._lock:
+            self._batch_sizes[len(batch)] += 1
+            self._total_batches += 1
+            self._total_requests += len(batch)
+            self._total_inference += finished - started
+            for _, _, enqueued in batch:
+                wait = started - enqueued
+                self._total_queue_wait += wait
+                self._max_queue_wait = max(self._max_queue_wait, wait)
+
+    def stats(self):
+        with self._lock:
+            requests = self._total_requests
+            batches = self._total_batches
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+                "queue_depth": self.queue_depth(),
+                "total_requests": requests,
+                "total_batches": batches,
+                "avg_batch_size": requests / batches if batches else 0.0,
+                "batch_size_histogram": {str(size): count for size, count in sorted(self._batch_sizes.items())},
+                "avg_queue_wait_ms": self._total_queue_wait / requests * 1000 if requests else 0.0,
+                "max_queue_wait_ms": self._max_queue_wait * 1000,
+                "avg_batch_inference_ms": self._total_inference / batches * 1000 if batches else 0.0,
+            }
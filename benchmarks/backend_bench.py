@@ -0,0 +1,95 @@
+"""Bandingkan backend inferensi CPU (PyTorch, ONNX Runtime, OpenVINO, varian INT8).
+
+Melaporkan latensi per gambar, throughput dengan batch, dan kesesuaian deteksi terhadap PyTorch.
+
+    python benchmarks/backend_bench.py --images sampel/ --calibration-dir kalibrasi/
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backends import calibration_images, load_model, resolve_model_path  # noqa: E402
+from inference_pool import result_to_array  # noqa: E402
+
+import cv2  # noqa: E402
+
+
+def iou(a, b):
+    x1, y1 = np.maximum(a[:2], b[:2])
+    x2, y2 = np.minimum(a[2:4], b[2:4])
+    inter = max(0.0, x2 - x1) * max(0.0, y2 - y1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def agreement(reference, candidate, threshold=0.5):
+    """F1 kecocokan kotak (IoU >= threshold, kelas sama) terhadap hasil referensi."""
+    matched = 0
+    total_ref = total_cand = 0
+    for ref, cand in zip(reference, candidate):
+        total_ref += len(ref)
+        total_cand += len(cand)
+        used = set()
+        for r in ref:
+            for j, c in enumerate(cand):
+                if j not in used and r[5] == c[5] and iou(r, c) >= threshold:
+                    used.add(j)
+                    matched += 1
+                    break
+    if total_ref == 0 and total_cand == 0:
+        return 1.0
+    return 2 * matched / (total_ref + total_cand)
+
+
+def run(model, images, batch_size, conf):
+    outputs = []
+    start = time.perf_counter()
+    for i in range(0, len(images), batch_size):
+        results = model.predict(source=images[i:i + batch_size], conf=conf, verbose=False)
+        outputs += [result_to_array(r) for r in results]
+    return outputs, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="models/best.pt")
+    parser.add_argument("--images", required=True, help="Direktori gambar uji")
+    parser.add_argument("--calibration-dir", help="Direktori gambar kalibrasi INT8 (tanpa ini varian INT8 dilewati)")
+    parser.add_argument("--backends", nargs="+", default=["pytorch", "onnx", "openvino"])
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--conf", type=float, default=0.5)
+    args = parser.parse_args()
+
+    images = [cv2.imread(p) for p in calibration_images(args.images, limit=200)]
+    images = [img for img in images if img is not None]
+
+    variants = [(backend, False) for backend in args.backends]
+    if args.calibration_dir:
+        variants += [(backend, True) for backend in args.backends if backend != "pytorch"]
+
+    reference = None
+    print(f"{len(images)} gambar, batch {args.batch_size}")
+    print(f"{'backend':<16}{'latensi ms':>12}{'img/detik':>12}{'kesesuaian':>12}")
+    for backend, int8 in variants:
+        path = resolve_model_path(args.model, backend, int8=int8, calibration_dir=args.calibration_dir)
+        model = load_model(path)
+        run(model, images[:2], 1, args.conf)  # warm-up
+
+        single, single_time = run(model, images, 1, args.conf)
+        _, batch_time = run(model, images, args.batch_size, args.conf)
+        if reference is None:
+            reference = single
+
+        name = f"{backend}-int8" if int8 else backend
+        latency = single_time / len(images) * 1000
+        throughput = len(images) / batch_time
+        print(f"{name:<16}{latency:>12.1f}{throughput:>12.1f}{agreement(reference, single):>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Buat database palsu berisi riwayat esp32cam yang belum diproses, untuk menguji backfill.py secara lokal.
+
+Menulis JSON FakeDatabase dengan --days hari x --per-day foto (photo_original menunjuk ke server
+ini), lalu menyajikan JPEG sintetis sampai dihentikan dengan Ctrl+C:
+
+    python benchmarks/backfill_fixture.py --days 3 --per-day 200 --out fake_db.json --port 8082
+    python backfill.py --fake-db fake_db.json --concurrency 8     # di terminal lain
+
+Hentikan backfill di tengah jalan lalu jalankan ulang untuk menguji resume dari checkpoint.
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from benchmarks.e2e_bench import synthetic_image  # noqa: E402
+from benchmarks.mjpeg_server import with_counter  # noqa: E402
+
+
+def build_database(start, days, per_day, base_url, done_ratio):
+    entries = {}
+    step = max(1, 24 * 60 // per_day)
+    for d in range(days):
+        day = (start + timedelta(days=d)).isoformat()
+        entries[day] = {}
+        for i in range(per_day):
+            minutes = i * step
+            time_key = f"{minutes // 60 % 24:02d}:{minutes % 60:02d}"
+            entry = {"photo_original": f"{base_url}/photos/{day}_{time_key.replace(':', '')}.jpg"}
+            if i < per_day * done_ratio:
+                # Sebagian sudah diproses sebelum API mati
+                entry.update({"photo_hama": f"{base_url}/detectedImages/lama.jpg", "status_hama": "false"})
+            entries[day][time_key] = entry
+    return {"esp32cam": entries}
+
+
+def make_handler(frames):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if not self.path.startswith("/photos/"):
+                self.send_response(404)
+                self.end_headers()
+                return
+            # Bytes unik per foto agar cache deteksi tidak ikut mempercepat backfill
+            body = with_counter(frames[hash(self.path) % len(frames)], self.path)
+            self.send_response(200)
+            self.send_header("Content-Type", "image/jpeg")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", default="fake_db.json")
+    parser.add_argument("--start-date", default="2024-01-01")
+    parser.add_argument("--days", type=int, default=3)
+    parser.add_argument("--per-day", type=int, default=200)
+    parser.add_argument("--done-ratio", type=float, default=0.1, help="Bagian foto per hari yang sudah punya photo_hama")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8082)
+    parser.add_argument("--width", type=int, default=800)
+    parser.add_argument("--height", type=int, default=600)
+    args = parser.parse_args()
+
+    base_url = f"http://{args.host}:{args.port}"
+    data = build_database(date.fromisoformat(args.start_date), args.days, args.per_day, base_url, args.done_ratio)
+    with open(args.out, "w") as f:
+        json.dump(data, f, indent=2)
+    pending = sum(1 for times in data["esp32cam"].values() for entry in times.values() if "photo_hama" not in entry)
+    print(f"{args.out}: {args.days} hari, {pending} foto belum diproses")
+
+    frames = [synthetic_image(args.width, args.height, seed=i) for i in range(8)]
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(frames))
+    print(f"Menyajikan foto di {base_url}/photos/ (Ctrl+C untuk berhenti)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Ukur cold start API: waktu sampai port menerima koneksi, sampai siap (readyz), dan latensi request pertama.
+
+Jalankan untuk commit sekarang dan commit lama (misalnya lewat `git worktree add /tmp/lama <commit>`):
+
+    python benchmarks/cold_start.py
+    python benchmarks/cold_start.py --repo /tmp/lama
+
+Commit lama yang belum punya /healthz dan /readyz diukur lewat GET /; siap = port terbuka.
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import textwrap
+import time
+
+import httpx
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from benchmarks.e2e_bench import synthetic_image  # noqa: E402
+
+SERVER_SCRIPT = textwrap.dedent("""
+    import os, sys
+    repo, workdir, port = sys.argv[1], sys.argv[2], int(sys.argv[3])
+    sys.path.insert(0, repo)
+    sys.path.append({bench_repo!r})  # fake_firebase, tanpa menimpa api.py milik repo yang diukur
+    os.chdir(workdir)
+    from fake_firebase import FakeDatabase
+    FakeDatabase({{"esp32cam": {{}}}}).install()
+    import uvicorn
+    import api
+    uvicorn.run(api.app, host="127.0.0.1", port=port, log_level="warning")
+""")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for(client, url, timeout, ok_statuses=(200,)):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            response = client.get(url)
+            if response.status_code in ok_statuses:
+                return response
+        except httpx.TransportError:
+            pass
+        time.sleep(0.02)
+    raise TimeoutError(f"{url} tidak merespons dalam {timeout} detik")
+
+
+def measure(repo, timeout):
+    workdir = tempfile.mkdtemp(prefix="cold-start-")
+    open(os.path.join(workdir, "firebaseSDK.json"), "w").close()
+    os.symlink(os.path.join(repo, "models"), os.path.join(workdir, "models"))
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    image = synthetic_image(1280, 720, seed=1)
+
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-c", SERVER_SCRIPT.format(bench_repo=REPO_DIR), repo, workdir, str(port)],
+    )
+    try:
+        with httpx.Client(timeout=300) as client:
+            response = wait_for(client, f"{base_url}/healthz", timeout, ok_statuses=(200, 404))
+            if response.status_code == 404:
+                # Versi lama tanpa probe: port terbuka = model sudah dimuat saat import
+                wait_for(client, f"{base_url}/", timeout)
+                listening = ready = time.perf_counter() - started
+            else:
+                listening = time.perf_counter() - started
+                wait_for(client, f"{base_url}/readyz", timeout)
+                ready = time.perf_counter() - started
+
+            first_started = time.perf_counter()
+            client.post(f"{base_url}/upload", files={"file": ("a.jpg", image, "image/jpeg")})
+            first = time.perf_counter() - first_started
+
+            second_started = time.perf_counter()
+            client.post(f"{base_url}/upload", files={"file": ("b.jpg", image + b"\0", "image/jpeg")})
+            second = time.perf_counter() - second_started
+    finally:
+        process.terminate()
+        process.wait()
+
+    return listening, ready, first, second
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repo", default=REPO_DIR, help="Checkout yang diukur (default: repo ini)")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=300)
+    args = parser.parse_args()
+
+    print(f"{'run':>4}{'listen s':>10}{'ready s':>10}{'req #1 ms':>12}{'req #2 ms':>12}")
+    for run in range(args.runs):
+        listening, ready, first, second = measure(os.path.abspath(args.repo), args.timeout)
+        print(f"{run + 1:>4}{listening:>10.2f}{ready:>10.2f}{first * 1000:>12.1f}{second * 1000:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Bandingkan decode resolusi penuh (cv2.IMREAD_COLOR) dengan decode tereduksi dari preprocess.py.
+
+Waktu decode diukur pada JPEG sintetis 2 MP, 5 MP dan 12 MP. Puncak memori (ru_maxrss) diukur
+di subprocess terpisah per kombinasi agar puncak satu mode tidak menutupi mode lain.
+
+    python benchmarks/decode_bench.py --repeat 20 [--samples folder_foto/]
+"""
+import argparse
+import glob
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from benchmarks.e2e_bench import synthetic_image  # noqa: E402
+from preprocess import decode  # noqa: E402
+
+RESOLUTIONS = {"2mp": (1920, 1080), "5mp": (2592, 1944), "12mp": (4000, 3000)}
+MODES = ("full", "reduced")
+
+
+def load_images(samples_dir):
+    images = {name: synthetic_image(w, h, seed=i) for i, (name, (w, h)) in enumerate(RESOLUTIONS.items())}
+    if samples_dir:
+        for path in sorted(glob.glob(os.path.join(samples_dir, "*.jp*g"))):
+            with open(path, "rb") as f:
+                images[f"sample:{os.path.basename(path)}"] = f.read()
+    return images
+
+
+def run_decode(data, mode, target_size):
+    if mode == "full":
+        return cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    img, _ = decode(data, target_size=target_size, max_pixels=0)
+    return img
+
+
+def child(path, mode, target_size):
+    # Dijalankan di subprocess: ukur kenaikan RSS maksimum oleh satu decode
+    with open(path, "rb") as f:
+        data = f.read()
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    run_decode(data, mode, target_size)
+    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"peak_kb": after - before}))
+
+
+def peak_memory_kb(data, mode, target_size):
+    fd, path = tempfile.mkstemp(suffix=".jpg")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    try:
+        output = subprocess.check_output(
+            [sys.executable, os.path.abspath(__file__), "--child", path, mode, "--target-size", str(target_size)], text=True
+        )
+    finally:
+        os.remove(path)
+    return json.loads(output.strip().splitlines()[-1])["peak_kb"]
+
+
+def timeit(data, mode, target_size, repeat):
+    run_decode(data, mode, target_size)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        img = run_decode(data, mode, target_size)
+    return (time.perf_counter() - started) / repeat * 1000, img.shape
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--target-size", type=int, default=640)
+    parser.add_argument("--samples", help="Direktori foto tambahan (*.jpg)")
+    parser.add_argument("--child", nargs=2, metavar=("PATH", "MODE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child[0], args.child[1], args.target_size)
+        return
+
+    print(f"{'gambar':<24}{'mode':<9}{'hasil':>12}{'ms':>9}{'puncak MB':>11}")
+    for name, data in load_images(args.samples).items():
+        for mode in MODES:
+            ms, shape = timeit(data, mode, args.target_size, args.repeat)
+            peak = peak_memory_kb(data, mode, args.target_size) / 1024
+            print(f"{name:<24}{mode:<9}{f'{shape[1]}x{shape[0]}':>12}{ms:>9.1f}{peak:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+"""Benchmark end-to-end API deteksi: /upload (file, data URI, URL) dan /detect_latest_image.
+
+Aplikasi FastAPI dijalankan di proses yang sama (uvicorn di thread terpisah) dengan Firebase palsu
+dan server gambar lokal, sehingga hasilnya bisa diulang tanpa akses jaringan. Hasil disimpan
+sebagai JSON agar bisa dibandingkan antar commit:
+
+    python benchmarks/e2e_bench.py --concurrency 8 --requests 50
+    python benchmarks/e2e_bench.py --compare benchmarks/results/<run-lama>.json
+"""
+import argparse
+import asyncio
+import base64
+import glob
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+import httpx
+import numpy as np
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from fake_firebase import FakeDatabase  # noqa: E402
+
+RESOLUTIONS = {"vga": (640, 480), "hd": (1280, 720), "fhd": (1920, 1080), "5mp": (2592, 1944)}
+INPUT_TYPES = ("file", "data_uri", "url", "latest")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def synthetic_image(width, height, seed):
+    # Gradien + noise + beberapa bentuk agar ukuran JPEG mendekati foto nyata
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    img = np.stack([x + 0 * y, y + 0 * x, (x + y) / 2], axis=-1)
+    img = np.clip(img + rng.normal(0, 25, img.shape), 0, 255).astype(np.uint8)
+    for _ in range(20):
+        center = (int(rng.integers(0, width)), int(rng.integers(0, height)))
+        color = tuple(int(c) for c in rng.integers(0, 255, 3))
+        cv2.circle(img, center, int(rng.integers(10, max(11, width // 10))), color, -1)
+    ok, encoded = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, 90])
+    return encoded.tobytes()
+
+
+def load_images(samples_dir):
+    images = {name: synthetic_image(w, h, seed=i) for i, (name, (w, h)) in enumerate(RESOLUTIONS.items())}
+    if samples_dir:
+        for path in sorted(glob.glob(os.path.join(samples_dir, "*.jp*g"))):
+            with open(path, "rb") as f:
+                images[f"sample:{os.path.basename(path)}"] = f.read()
+    return images
+
+
+def unique(data):
+    # Byte acak setelah marker EOI diabaikan decoder JPEG, tapi membuat hash cache berbeda
+    return data + os.urandom(16)
+
+
+class ImageServer:
+    """Server HTTP lokal yang menyajikan gambar dari memori (pengganti host foto ESP32)."""
+
+    def __init__(self):
+        self.images = {}
+        images = self.images
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                data = images.get(self.path.lstrip("/"))
+                if data is None:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "image/jpeg")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def publish(self, name, data):
+        self.images[name] = data
+        return f"{self.base_url}/{name}"
+
+
+def start_api(workdir, fake_db):
+    # api.py memakai path relatif (firebaseSDK.json, models/, direktori output), jadi jalankan dari workdir
+    os.chdir(workdir)
+    open("firebaseSDK.json", "w").close()
+    if not os.path.exists("models"):
+        os.symlink(os.path.join(REPO_DIR, "models"), "models")
+    fake_db.install()
+    # Skenario "latest" mengirim ulang gambar yang sama dengan byte ekor berbeda; gate akan melewati inferensinya
+    os.environ["SCENE_GATE_THRESHOLD"] = "0"
+
+    import uvicorn
+    import api
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(api.app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    # Model dimuat di background; tunggu sampai siap agar warm-up tidak ikut terukur
+    api.inference_runtime.ready.wait()
+    return server, f"http://127.0.0.1:{port}"
+
+
+class LatestFeeder:
+    """Tambahkan entri esp32cam baru ke Firebase palsu untuk setiap panggilan /detect_latest_image."""
+
+    def __init__(self, fake_db, image_server):
+        self.fake_db = fake_db
+        self.image_server = image_server
+        self.slot = datetime(2024, 1, 1)
+        self.lock = threading.Lock()
+
+    def push(self, name, data):
+        with self.lock:
+            self.slot += timedelta(minutes=1)
+            slot = self.slot
+        url = self.image_server.publish(f"esp32/{slot:%Y%m%d%H%M}.jpg", unique(data))
+        self.fake_db.reference("esp32cam").child(f"{slot:%Y-%m-%d}").child(f"{slot:%H:%M}").set({"photo_original": url})
+
+
+async def send(client, base_url, input_type, name, data, image_server, feeder, make_unique):
+    payload = unique(data) if make_unique else data
+    if input_type == "file":
+        return await client.post(f"{base_url}/upload", files={"file": ("bench.jpg", payload, "image/jpeg")})
+    if input_type == "data_uri":
+        uri = "data:image/jpeg;base64," + base64.b64encode(payload).decode()
+        return await client.post(f"{base_url}/upload", data={"image_url": uri})
+    if input_type == "url":
+        url = image_server.publish(f"upload/{random.getrandbits(64):x}.jpg", payload)
+        return await client.post(f"{base_url}/upload", data={"image_url": url})
+    feeder.push(name, data)
+    return await client.get(f"{base_url}/detect_latest_image")
+
+
+async def run_scenario(base_url, input_type, name, data, args, image_server, feeder):
+    latencies = []
+    errors = 0
+    # /detect_latest_image memproses satu entri per panggilan, jadi dijalankan berurutan
+    concurrency = 1 if input_type == "latest" else args.concurrency
+    remaining = list(range(args.requests))
+
+    async def worker(client):
+        nonlocal errors
+        while remaining:
+            remaining.pop()
+            started = time.perf_counter()
+            try:
+                response = await send(client, base_url, input_type, name, data, image_server, feeder, not args.allow_cache)
+                if response.status_code != 200:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    async with httpx.AsyncClient(timeout=300) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "concurrency": concurrency,
+        "bytes": len(data),
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(current, previous_path):
+    with open(previous_path) as f:
+        previous = json.load(f)
+    print(f"\nDibandingkan dengan {previous['meta']['commit']} ({previous_path}):")
+    for input_type, by_image in current["results"].items():
+        for name, result in by_image.items():
+            old = previous["results"].get(input_type, {}).get(name)
+            if not old:
+                continue
+            delta = (result["p95_ms"] - old["p95_ms"]) / old["p95_ms"] * 100 if old["p95_ms"] else 0.0
+            print(f"  {input_type:<9}{name:<24} p95 {old['p95_ms']:8.1f} -> {result['p95_ms']:8.1f} ms ({delta:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=40, help="Jumlah request per tipe input per gambar")
+    parser.add_argument("--inputs", nargs="+", choices=INPUT_TYPES, default=list(INPUT_TYPES))
+    parser.add_argument("--samples", help="Direktori foto hidroponik tambahan (*.jpg)")
+    parser.add_argument("--allow-cache", action="store_true", help="Kirim bytes identik (cache deteksi ikut diukur)")
+    parser.add_argument("--output", help="File JSON hasil (default benchmarks/results/<waktu>-<commit>.json)")
+    parser.add_argument("--compare", help="File JSON hasil run sebelumnya untuk dibandingkan")
+    args = parser.parse_args()
+
+    commit = git_commit()
+    images = load_images(args.samples)
+    image_server = ImageServer()
+    fake_db = FakeDatabase({"esp32cam": {}})
+    feeder = LatestFeeder(fake_db, image_server)
+
+    workdir = tempfile.mkdtemp(prefix="e2e-bench-")
+    server, base_url = start_api(workdir, fake_db)
+
+    report = {
+        "meta": {
+            "commit": commit,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "allow_cache": args.allow_cache,
+            "env": {k: v for k, v in os.environ.items() if k.isupper() and k.startswith(("INFERENCE_", "BATCH_", "IO_", "DETECTION_", "SCENE_GATE_"))},
+        },
+        "results": {},
+    }
+    try:
+        for input_type in args.inputs:
+            for name, data in images.items():
+                result = asyncio.run(run_scenario(base_url, input_type, name, data, args, image_server, feeder))
+                report["results"].setdefault(input_type, {})[name] = result
+                print(f"{input_type:<9}{name:<24}{result['throughput_rps']:7.2f} req/s  "
+                      f"p50 {result['p50_ms']:8.1f}  p95 {result['p95_ms']:8.1f}  p99 {result['p99_ms']:8.1f} ms  "
+                      f"error {result['errors']}")
+    finally:
+        server.should_exit = True
+
+    output = args.output or os.path.join(REPO_DIR, "benchmarks", "results", f"{datetime.now():%Y%m%d-%H%M%S}-{commit}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nHasil disimpan di {output}")
+
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
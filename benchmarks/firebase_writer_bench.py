@@ -0,0 +1,88 @@
+"""Bandingkan jumlah round-trip Firebase: update per foto (lama) vs FirebaseWriter (write-behind).
+
+Mensimulasikan backfill / capture frekuensi tinggi: --photos hasil deteksi ditulis dari --threads
+thread ke Firebase palsu dengan latensi round-trip --rtt-ms per update.
+
+    python benchmarks/firebase_writer_bench.py --photos 2000 --threads 8 --rtt-ms 80
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from fake_firebase import FakeDatabase  # noqa: E402
+from firebase_writer import FirebaseWriter  # noqa: E402
+
+
+class SlowReference:
+    """Bungkus FakeReference dengan latensi jaringan buatan per update."""
+
+    def __init__(self, ref, rtt):
+        self.ref = ref
+        self.rtt = rtt
+
+    def child(self, path):
+        return SlowReference(self.ref.child(path), self.rtt)
+
+    def update(self, value):
+        time.sleep(self.rtt)
+        self.ref.update(value)
+
+
+def photo_keys(count):
+    start = datetime(2024, 1, 1)
+    return [(f"{t:%Y-%m-%d}", f"{t:%H:%M}") for t in (start + timedelta(minutes=i) for i in range(count))]
+
+
+def result(i):
+    return {"photo_hama": f"http://localhost/detectedImages/{i}.jpg", "status_hama": "true" if i % 7 == 0 else "false"}
+
+
+def run_sync(keys, threads, rtt):
+    db = FakeDatabase({"esp32cam": {}})
+    ref = SlowReference(db.reference("esp32cam"), rtt)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(lambda item: ref.child(item[1][0]).child(item[1][1]).update(result(item[0])), enumerate(keys)))
+    return time.perf_counter() - started, db.counters["updates"]
+
+
+def run_write_behind(keys, threads, rtt, max_batch, flush_interval):
+    db = FakeDatabase({"esp32cam": {}})
+    writer = FirebaseWriter(SlowReference(db.reference("/"), rtt), max_batch=max_batch, flush_interval=flush_interval)
+    writer.start()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(lambda item: writer.update(f"/esp32cam/{item[1][0]}/{item[1][1]}", result(item[0])), enumerate(keys)))
+    enqueued = time.perf_counter() - started
+    writer.close()
+    return enqueued, time.perf_counter() - started, db.counters["updates"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--photos", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--rtt-ms", type=float, default=80)
+    parser.add_argument("--max-batch", type=int, default=100)
+    parser.add_argument("--flush-interval", type=float, default=1.0)
+    args = parser.parse_args()
+
+    keys = photo_keys(args.photos)
+    rtt = args.rtt_ms / 1000
+
+    elapsed, round_trips = run_sync(keys, args.threads, rtt)
+    print(f"update per foto : {round_trips:6d} round-trip, selesai {elapsed:7.2f} s")
+
+    enqueued, elapsed, round_trips = run_write_behind(keys, args.threads, rtt, args.max_batch, args.flush_interval)
+    print(f"write-behind    : {round_trips:6d} round-trip, jalur request {enqueued * 1000:7.1f} ms, "
+          f"tersimpan semua {elapsed:7.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Bandingkan direktori datar (uploadedFile/ lama) dengan ImageStore ber-shard pada jumlah file besar.
+
+Untuk tiap layout diukur: waktu menulis --files file kecil, waktu lookup acak (stat), dan biaya
+"mengetahui isi penyimpanan" saat startup: scan direktori penuh (cara RetentionManager) vs
+membaca total dari indeks SQLite ImageStore.
+
+    python benchmarks/image_store_bench.py --files 200000 --lookups 20000 [--dir /mnt/data/bench]
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from image_store import ImageStore  # noqa: E402
+
+
+def bench_flat(root, payloads, lookups):
+    directory = os.path.join(root, "flat")
+    os.makedirs(directory)
+    names = []
+    started = time.perf_counter()
+    for data in payloads:
+        name = f"{uuid.uuid4()}.jpg"
+        with open(os.path.join(directory, name), "wb") as f:
+            f.write(data)
+        names.append(name)
+    write = time.perf_counter() - started
+
+    sample = random.sample(names, min(lookups, len(names)))
+    started = time.perf_counter()
+    for name in sample:
+        os.path.isfile(os.path.join(directory, name))
+    lookup = (time.perf_counter() - started) / len(sample)
+
+    started = time.perf_counter()
+    with os.scandir(directory) as entries:
+        total = sum(entry.stat().st_size for entry in entries if entry.is_file())
+    inventory = time.perf_counter() - started
+    return write, lookup, inventory, total
+
+
+def bench_store(root, payloads, lookups):
+    store = ImageStore(os.path.join(root, "store"))
+    names = []
+    started = time.perf_counter()
+    for data in payloads:
+        name = store.name_for(data)
+        store.put(name, data)
+        names.append(name)
+    write = time.perf_counter() - started
+
+    sample = random.sample(names, min(lookups, len(names)))
+    started = time.perf_counter()
+    for name in sample:
+        store.locate(name)
+    lookup = (time.perf_counter() - started) / len(sample)
+
+    # Proses baru: indeks dibuka ulang dari disk
+    started = time.perf_counter()
+    total = ImageStore(store.root).stats()["bytes"]
+    inventory = time.perf_counter() - started
+    return write, lookup, inventory, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=200000)
+    parser.add_argument("--lookups", type=int, default=20000)
+    parser.add_argument("--size", type=int, default=2048, help="Ukuran tiap file (byte)")
+    parser.add_argument("--dir", default=None, help="Direktori kerja (default: direktori sementara)")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="image_store_bench_", dir=args.dir)
+    try:
+        # Isi unik per file agar ImageStore tidak men-dedup
+        payloads = [i.to_bytes(8, "big") + os.urandom(8) + b"\0" * max(0, args.size - 16) for i in range(args.files)]
+        for label, fn in (("datar", bench_flat), ("shard", bench_store)):
+            write, lookup, inventory, total = fn(root, payloads, args.lookups)
+            print(f"{label}: tulis {args.files / write:8.0f} file/detik, lookup {lookup * 1e6:6.1f} us, "
+                  f"inventaris ({total / 1e6:.0f} MB) {inventory * 1000:8.1f} ms")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Bandingkan /upload sinkron dengan mode job (POST /jobs + long-poll) untuk klien yang tidak sabar.
+
+Tiap klien butuh --images hasil deteksi. Di mode sinkron, klien memutus koneksi setelah
+--client-timeout detik lalu mengulang (maks. --retries kali), seperti aplikasi mobile di jaringan
+buruk; inferensi untuk request yang sudah ditinggal tetap berjalan di server. Di mode job, klien
+mengirim job dengan deadline = --client-timeout x (retries + 1) lalu long-poll GET /jobs/{id}.
+Kerja server dihitung dari selisih `executors.inference.completed` di GET /stats.
+
+Jalankan server lebih dulu (python api.py), lalu:
+    python benchmarks/jobs_bench.py --image contoh.jpg --clients 16 --images 4 --client-timeout 2
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+import requests
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from benchmarks.mjpeg_server import with_counter  # noqa: E402
+
+
+def inference_completed(base_url):
+    return requests.get(f"{base_url}/stats", timeout=30).json()["executors"]["inference"]["completed"]
+
+
+def sync_client(base_url, frames, client_timeout, retries, outcome):
+    session = requests.Session()
+    for frame in frames:
+        for _ in range(retries + 1):
+            try:
+                response = session.post(f"{base_url}/upload", files={"file": ("bench.jpg", frame, "image/jpeg")},
+                                        timeout=client_timeout)
+            except requests.RequestException:
+                outcome["attempts"] += 1
+                continue
+            outcome["attempts"] += 1
+            if response.status_code == 200:
+                outcome["delivered"] += 1
+                break
+
+
+def job_client(base_url, frames, client_timeout, retries, outcome):
+    session = requests.Session()
+    deadline = client_timeout * (retries + 1)
+    for frame in frames:
+        response = session.post(f"{base_url}/jobs", files={"file": ("bench.jpg", frame, "image/jpeg")},
+                                data={"deadline": deadline}, timeout=30)
+        outcome["attempts"] += 1
+        if response.status_code != 202:
+            continue
+        job_id = response.json()["job_id"]
+        give_up_at = time.monotonic() + deadline
+        while time.monotonic() < give_up_at:
+            try:
+                job = session.get(f"{base_url}/jobs/{job_id}", params={"timeout": client_timeout},
+                                  timeout=client_timeout + 5).json()
+            except requests.RequestException:
+                continue
+            if job["status"] == "done":
+                outcome["delivered"] += 1
+                break
+            if job["status"] in ("failed", "expired", "cancelled"):
+                break
+
+
+def run(mode, base_url, image_bytes, clients, images, client_timeout, retries):
+    client_fn = sync_client if mode == "sync" else job_client
+    outcomes = [{"attempts": 0, "delivered": 0} for _ in range(clients)]
+    threads = [
+        threading.Thread(target=client_fn, args=(
+            base_url,
+            # Tiap gambar unik agar cache deteksi tidak membuat ulangan terlihat gratis
+            [with_counter(image_bytes, f"{mode}-{c}-{i}-{time.time_ns()}") for i in range(images)],
+            client_timeout, retries, outcomes[c],
+        ))
+        for c in range(clients)
+    ]
+    before = inference_completed(base_url)
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    # Beri waktu inferensi yang sudah ditinggal klien untuk selesai sebelum dihitung
+    time.sleep(client_timeout)
+    inferences = inference_completed(base_url) - before
+    delivered = sum(o["delivered"] for o in outcomes)
+    attempts = sum(o["attempts"] for o in outcomes)
+    print(f"{mode:5s}: {delivered:4d}/{clients * images} hasil diterima, {attempts:4d} request, "
+          f"{inferences:4d} inferensi server ({max(0, inferences - delivered)} terbuang), {elapsed:6.1f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8001")
+    parser.add_argument("--image", required=True)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--images", type=int, default=4, help="Jumlah hasil yang dibutuhkan tiap klien")
+    parser.add_argument("--client-timeout", type=float, default=2.0)
+    parser.add_argument("--retries", type=int, default=2)
+    parser.add_argument("--modes", nargs="+", default=["sync", "jobs"], choices=["sync", "jobs"])
+    args = parser.parse_args()
+
+    with open(args.image, "rb") as f:
+        image_bytes = f.read()
+    for mode in args.modes:
+        run(mode, args.base_url, image_bytes, args.clients, args.images, args.client_timeout, args.retries)
+
+
+if __name__ == "__main__":
+    main()
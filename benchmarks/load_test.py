@@ -0,0 +1,98 @@
+"""Load test: pastikan latensi GET / tetap datar saat /upload sedang jenuh.
+
+Jalankan server lebih dulu (python api.py), lalu:
+    python benchmarks/load_test.py --image contoh.jpg --upload-workers 32 --duration 30
+"""
+import argparse
+import statistics
+import threading
+import time
+
+import requests
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def summarize(latencies):
+    return {
+        "count": len(latencies),
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000 if latencies else 0.0,
+    }
+
+
+def probe_index(base_url, stop, latencies, interval):
+    session = requests.Session()
+    while not stop.is_set():
+        started = time.perf_counter()
+        session.get(f"{base_url}/", timeout=30)
+        latencies.append(time.perf_counter() - started)
+        time.sleep(interval)
+
+
+def hammer_upload(base_url, image_bytes, stop, statuses, lock):
+    session = requests.Session()
+    while not stop.is_set():
+        try:
+            response = session.post(
+                f"{base_url}/upload",
+                files={"file": ("load.jpg", image_bytes, "image/jpeg")},
+                timeout=120,
+            )
+            status = response.status_code
+        except requests.RequestException:
+            status = "error"
+        with lock:
+            statuses[status] = statuses.get(status, 0) + 1
+
+
+def run_phase(base_url, image_bytes, upload_workers, duration, probe_interval):
+    stop = threading.Event()
+    index_latencies = []
+    statuses = {}
+    lock = threading.Lock()
+
+    threads = [threading.Thread(target=probe_index, args=(base_url, stop, index_latencies, probe_interval))]
+    threads += [
+        threading.Thread(target=hammer_upload, args=(base_url, image_bytes, stop, statuses, lock))
+        for _ in range(upload_workers)
+    ]
+    for t in threads:
+        t.start()
+    time.sleep(duration)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    return summarize(index_latencies), statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8001")
+    parser.add_argument("--image", required=True, help="Gambar JPEG yang diunggah berulang kali")
+    parser.add_argument("--upload-workers", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--probe-interval", type=float, default=0.05)
+    args = parser.parse_args()
+
+    with open(args.image, "rb") as f:
+        image_bytes = f.read()
+
+    baseline, _ = run_phase(args.base_url, image_bytes, 0, args.duration / 3, args.probe_interval)
+    loaded, statuses = run_phase(args.base_url, image_bytes, args.upload_workers, args.duration, args.probe_interval)
+
+    print(f"GET / tanpa beban : p50={baseline['p50_ms']:.1f}ms p99={baseline['p99_ms']:.1f}ms (n={baseline['count']})")
+    print(f"GET / saat /upload jenuh: p50={loaded['p50_ms']:.1f}ms p99={loaded['p99_ms']:.1f}ms (n={loaded['count']})")
+    print(f"Status /upload: {statuses}")
+
+
+if __name__ == "__main__":
+    main()
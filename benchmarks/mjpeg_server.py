@@ -0,0 +1,99 @@
+"""Server MJPEG lokal yang meniru stream ESP32-CAM (multipart/x-mixed-replace), untuk uji offline.
+
+Frame diambil dari folder JPEG (diputar berulang) atau dibuat sintetis. Jalankan lalu arahkan API:
+
+    python benchmarks/mjpeg_server.py --port 8081 --fps 10 [--images folder_foto/]
+    STREAM_SOURCES="bedA=http://127.0.0.1:8081/stream" python api.py
+
+Setelah itu hasil per kamera bisa dilihat di GET /streams dan GET /streams/bedA?after=0&timeout=10.
+"""
+import argparse
+import glob
+import itertools
+import os
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from benchmarks.e2e_bench import synthetic_image  # noqa: E402
+
+# Boundary yang sama dengan contoh CameraWebServer ESP32
+BOUNDARY = "123456789000000000000987654321"
+
+
+def load_frames(images_dir, width, height, count):
+    if images_dir:
+        frames = []
+        for path in sorted(glob.glob(os.path.join(images_dir, "*.jp*g"))):
+            with open(path, "rb") as f:
+                frames.append(f.read())
+        if frames:
+            return frames
+    return [synthetic_image(width, height, seed=i) for i in range(count)]
+
+
+def with_counter(frame, counter):
+    # Segmen komentar JPEG (COM) berisi nomor frame: diabaikan decoder, tapi membuat tiap frame unik
+    # sehingga cache deteksi API tidak membuat uji terlihat lebih cepat dari kamera sungguhan
+    comment = f"frame {counter}".encode()
+    return frame[:2] + b"\xff\xfe" + (len(comment) + 2).to_bytes(2, "big") + comment + frame[2:]
+
+
+def make_handler(frames, fps, static):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") not in ("/stream", ""):
+                self.send_response(404)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", f"multipart/x-mixed-replace;boundary={BOUNDARY}")
+            self.end_headers()
+            interval = 1 / fps if fps > 0 else 0
+            next_at = time.perf_counter()
+            try:
+                for counter, frame in enumerate(itertools.cycle(frames)):
+                    if not static:
+                        frame = with_counter(frame, counter)
+                    self.wfile.write(
+                        f"\r\n--{BOUNDARY}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(frame)}\r\n\r\n".encode()
+                    )
+                    self.wfile.write(frame)
+                    self.wfile.flush()
+                    next_at += interval
+                    time.sleep(max(0.0, next_at - time.perf_counter()))
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--fps", type=float, default=10)
+    parser.add_argument("--images", help="Folder JPEG yang diputar sebagai frame")
+    parser.add_argument("--width", type=int, default=800)
+    parser.add_argument("--height", type=int, default=600)
+    parser.add_argument("--frames", type=int, default=30, help="Jumlah frame sintetis jika --images tidak diisi")
+    parser.add_argument("--static", action="store_true", help="Kirim bytes frame apa adanya (tanpa nomor frame)")
+    args = parser.parse_args()
+
+    frames = load_frames(args.images, args.width, args.height, args.frames)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(frames, args.fps, args.static))
+    print(f"Stream MJPEG {len(frames)} frame @ {args.fps} fps di http://{args.host}:{args.port}/stream")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
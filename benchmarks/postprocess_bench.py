@@ -0,0 +1,75 @@
+"""Micro-benchmark post-processing hasil YOLO: loop per kotak (lama) vs konversi array (baru).
+
+    python benchmarks/postprocess_bench.py --repeat 2000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import torch
+from ultralytics.engine.results import Boxes
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inference_pool import result_to_array  # noqa: E402
+from postprocess import boxes_to_detections  # noqa: E402
+
+NAMES = {0: "ulat", 1: "daun"}
+
+
+class FakeResult:
+    def __init__(self, boxes):
+        self.boxes = boxes
+
+
+def make_result(num_boxes, seed=0):
+    rng = np.random.default_rng(seed)
+    xy = rng.uniform(0, 600, size=(num_boxes, 2))
+    wh = rng.uniform(5, 80, size=(num_boxes, 2))
+    conf = rng.uniform(0.5, 1.0, size=(num_boxes, 1))
+    cls = rng.integers(0, len(NAMES), size=(num_boxes, 1))
+    data = np.hstack([xy, xy + wh, conf, cls]).astype(np.float32)
+    return FakeResult(Boxes(torch.from_numpy(data), orig_shape=(720, 1280)))
+
+
+def legacy_postprocess(result):
+    detections = []
+    for detection in result.boxes:
+        box = detection.xyxy[0].cpu().numpy().astype(int).tolist()
+        score = detection.conf[0].cpu().numpy()
+        label = NAMES[int(detection.cls[0])]
+        detections.append({"box": box, "score": float(score), "label": label})
+    return detections
+
+
+def vectorized_postprocess(result):
+    return boxes_to_detections(result_to_array(result), NAMES)
+
+
+def timeit(fn, result, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(result)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 50, 300])
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        result = make_result(size)
+        if legacy_postprocess(result) != vectorized_postprocess(result):
+            raise SystemExit(f"Hasil berbeda untuk {size} kotak")
+        repeat = max(1, args.repeat // max(1, size // 10))
+        legacy = timeit(legacy_postprocess, result, repeat)
+        vectorized = timeit(vectorized_postprocess, result, repeat)
+        print(f"{size:4d} kotak: loop per kotak {legacy:9.1f} us | array {vectorized:8.1f} us | {legacy / vectorized:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Ukur berapa ulat kecil yang terlewat oleh SceneGate dan CPU yang dihemat, per threshold.
+
+Urutan frame meniru kamera hidroponik statis: latar daun bertekstur dengan noise sensor, dan tiap
+--change-every frame ada perubahan kecil: ulat baru muncul di posisi acak (ukuran --object-size
+piksel, jauh lebih kecil dari frame) atau ulat yang ada berpindah. Frame yang di-gate padahal ulatnya
+berbeda dari frame terakhir yang diinferensi dihitung sebagai "terlewat": deteksinya memakai ulang
+hasil lama yang tidak memuat ulat tersebut. Inferensi disimulasikan dengan decode penuh ditambah beban
+CPU --infer-ms per frame, sehingga angka bisa dibandingkan tanpa model YOLO.
+
+    python benchmarks/scene_gate_bench.py --frames 300 --change-every 10 --object-size 40x12
+    python benchmarks/scene_gate_bench.py --thresholds 0.002,0.005,0.01 --width 1600 --height 1200
+"""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from scene_gate import SceneGate  # noqa: E402
+
+
+def leaf_background(width, height, rng):
+    # Tekstur daun: noise hijau yang diperhalus, supaya ulat tidak kontras terhadap latar polos
+    texture = cv2.GaussianBlur(rng.normal(0, 1, (height, width)).astype(np.float32), (0, 0), 6)
+    texture = (texture - texture.min()) / (np.ptp(texture) or 1)
+    return np.stack([40 + 30 * texture, 110 + 90 * texture, 50 + 40 * texture], axis=-1)
+
+
+def frame_sequence(count, change_every, noise, width, height, object_size, max_objects, seed=0):
+    """Kembalikan [(jpeg bytes, id keadaan ulat)]; id berubah setiap kali ada ulat muncul / berpindah."""
+    rng = np.random.default_rng(seed)
+    base = leaf_background(width, height, rng)
+    objects = []  # (x, y, sudut)
+    state = 0
+    frames = []
+    for i in range(count):
+        if change_every and i and i % change_every == 0:
+            position = (int(rng.integers(0, width)), int(rng.integers(0, height)), int(rng.integers(0, 180)))
+            if len(objects) < max_objects:
+                objects.append(position)
+            else:
+                objects[int(rng.integers(0, len(objects)))] = position
+            state += 1
+        img = np.clip(base + rng.normal(0, noise, base.shape), 0, 255).astype(np.uint8)
+        for x, y, angle in objects:
+            cv2.ellipse(img, (x, y), (object_size[0] // 2, object_size[1] // 2), angle, 0, 360, (60, 170, 150), -1)
+        ok, encoded = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, 90])
+        frames.append((encoded.tobytes(), state))
+    return frames
+
+
+def simulated_inference(data, infer_ms):
+    img = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    deadline = time.thread_time() + infer_ms / 1000
+    while time.thread_time() < deadline:
+        img = cv2.GaussianBlur(img, (5, 5), 0)
+    return [{"class": 0, "confidence": 0.9, "bbox": [0, 0, 1, 1]}]
+
+
+def run(frames, gate, infer_ms):
+    """Kembalikan (CPU detik, jumlah frame yang memakai ulang hasil dengan keadaan ulat berbeda)."""
+    started = time.process_time()
+    missed = 0
+    inferred_state = None
+    for data, state in frames:
+        if gate is None:
+            simulated_inference(data, infer_ms)
+            continue
+        sig, previous = gate.check("bench", data)
+        if previous is None:
+            inference_started = time.perf_counter()
+            detections = simulated_inference(data, infer_ms)
+            gate.update("bench", sig, detections, time.perf_counter() - inference_started)
+            inferred_state = state
+        elif state != inferred_state:
+            missed += 1
+    return time.process_time() - started, missed
+
+
+def parse_size(value):
+    width, _, height = value.lower().partition("x")
+    return int(width), int(height or width)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--change-every", type=int, default=10, help="Ulat muncul / berpindah tiap N frame (0 = tidak pernah)")
+    parser.add_argument("--object-size", type=parse_size, default=(40, 12), help="Ukuran ulat dalam piksel, LxT")
+    parser.add_argument("--max-objects", type=int, default=5, help="Setelah sebanyak ini, ulat lama berpindah")
+    parser.add_argument("--noise", type=float, default=3.0, help="Simpangan baku noise sensor per piksel (0-255)")
+    parser.add_argument("--thresholds", default="0.002,0.005,0.01,0.02")
+    parser.add_argument("--infer-ms", type=float, default=50, help="Beban CPU simulasi inferensi per frame")
+    parser.add_argument("--width", type=int, default=1600)
+    parser.add_argument("--height", type=int, default=1200)
+    args = parser.parse_args()
+
+    frames = frame_sequence(args.frames, args.change_every, args.noise, args.width, args.height,
+                            args.object_size, args.max_objects)
+    changes = frames[-1][1]
+    thresholds = [float(t) for t in args.thresholds.split(",") if t]
+
+    print(f"{args.frames} frame {args.width}x{args.height}, {changes} perubahan ulat "
+          f"{args.object_size[0]}x{args.object_size[1]} px, noise {args.noise}")
+    baseline, _ = run(frames, None, args.infer_ms)
+    print(f"tanpa gate       : {args.frames:5d} inferensi, CPU {baseline:7.2f} s, 0 frame terlewat")
+    for threshold in thresholds:
+        gate = SceneGate(threshold=threshold, max_age=0)
+        gated, missed = run(frames, gate, args.infer_ms)
+        stats = gate.stats()
+        print(f"threshold {threshold:<7g}: {stats['inferred']:5d} inferensi, CPU {gated:7.2f} s "
+              f"(dilewati {stats['skip_ratio']:.0%}, hemat {1 - gated / baseline:.0%}), "
+              f"{missed} frame terlewat dengan ulat berbeda")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Latensi mode tiling dibandingkan satu frame, untuk beberapa ukuran tile dan overlap.
+
+Model dimuat lewat InferenceRuntime (batching in-process, sama seperti API). Dilaporkan jumlah tile,
+latensi p50/p95 per gambar dan jumlah deteksi setelah NMS lintas tile.
+
+    python benchmarks/tiling_bench.py --tile-sizes 480 640 960 --overlaps 0.1 0.2 0.3 [--samples folder_foto/]
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+import cv2
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from benchmarks.e2e_bench import percentile, synthetic_image  # noqa: E402
+from preprocess import decode  # noqa: E402
+from runtime import InferenceRuntime  # noqa: E402
+from tiling import predict_tiles  # noqa: E402
+
+
+def load_images(samples_dir):
+    images = {"5mp": synthetic_image(2592, 1944, seed=1), "12mp": synthetic_image(4000, 3000, seed=2)}
+    if samples_dir:
+        for path in sorted(glob.glob(os.path.join(samples_dir, "*.jp*g"))):
+            with open(path, "rb") as f:
+                images[f"sample:{os.path.basename(path)}"] = f.read()
+    return {name: decode(data, max_pixels=0, reduce=False)[0] for name, data in images.items()}
+
+
+def measure(fn, repeat):
+    fn()
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        latencies.append(time.perf_counter() - started)
+    return result, percentile(latencies, 50) * 1000, percentile(latencies, 95) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=os.path.join(REPO_DIR, "models", "best.pt"))
+    parser.add_argument("--tile-sizes", type=int, nargs="+", default=[480, 640, 960])
+    parser.add_argument("--overlaps", type=float, nargs="+", default=[0.1, 0.2, 0.3])
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--samples", help="Direktori foto hidroponik (*.jpg)")
+    args = parser.parse_args()
+
+    cv2.setNumThreads(os.cpu_count() or 1)
+    runtime = InferenceRuntime(args.model, batch_max_size=args.batch_size, batch_max_wait_ms=2, warmup_runs=1)
+    runtime.load()
+
+    print(f"{'gambar':<24}{'tile':>6}{'overlap':>9}{'tiles':>7}{'p50 ms':>10}{'p95 ms':>10}{'deteksi':>9}")
+    for name, img in load_images(args.samples).items():
+        boxes, p50, p95 = measure(lambda: runtime.predict(img), args.repeat)
+        print(f"{name:<24}{'-':>6}{'-':>9}{1:>7}{p50:>10.1f}{p95:>10.1f}{len(boxes):>9}")
+        for tile_size in args.tile_sizes:
+            for overlap in args.overlaps:
+                (boxes, tiles), p50, p95 = measure(lambda: predict_tiles(runtime.predict_many, img, tile_size, overlap), args.repeat)
+                print(f"{'':<24}{tile_size:>6}{overlap:>9.2f}{tiles:>7}{p50:>10.1f}{p95:>10.1f}{len(boxes):>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""Bandingkan memori dan throughput server.py untuk beberapa jumlah worker.
+
+Untuk setiap jumlah worker, server dijalankan (Firebase palsu) lalu /upload dibebani selama
+--duration detik. Dilaporkan throughput agregat dan memori per worker: RSS serta PSS (dari
+/proc/<pid>/smaps_rollup, halaman yang dibagi copy-on-write dihitung proporsional).
+
+    python benchmarks/workers_bench.py --workers 1 2 4 --concurrency 16 --duration 30
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import textwrap
+import time
+
+import httpx
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from benchmarks.e2e_bench import synthetic_image, unique  # noqa: E402
+
+SERVER_SCRIPT = textwrap.dedent("""
+    import os, sys
+    repo, workdir, port, workers = sys.argv[1], sys.argv[2], sys.argv[3], sys.argv[4]
+    sys.path.insert(0, repo)
+    os.chdir(workdir)
+    from fake_firebase import FakeDatabase
+    FakeDatabase({"esp32cam": {}}).install()
+    import server
+    server.main(["--port", port, "--workers", workers, "--log-level", "warning"] + sys.argv[5:])
+""")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(base_url, timeout, streak=20):
+    # Koneksi baru per request agar beberapa worker ikut dicek; siap = `streak` kali 200 berturut-turut
+    deadline = time.perf_counter() + timeout
+    ok = 0
+    while time.perf_counter() < deadline:
+        try:
+            with httpx.Client(timeout=5) as client:
+                ok = ok + 1 if client.get(f"{base_url}/readyz").status_code == 200 else 0
+        except httpx.TransportError:
+            ok = 0
+        if ok >= streak:
+            return
+        time.sleep(0.05 if ok else 0.2)
+    raise TimeoutError(f"Server belum siap dalam {timeout} detik")
+
+
+def child_pids(pid):
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(p) for p in f.read().split()]
+    except OSError:
+        return []
+
+
+def memory_kb(pid):
+    rss = pss = 0
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                rss = int(line.split()[1])
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    pss = int(line.split()[1])
+    except OSError:
+        pass
+    return rss, pss
+
+
+async def load(base_url, images, concurrency, duration):
+    completed = errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker(client, i):
+        nonlocal completed, errors
+        while time.perf_counter() < deadline:
+            payload = unique(images[i % len(images)])
+            try:
+                response = await client.post(f"{base_url}/upload", files={"file": ("bench.jpg", payload, "image/jpeg")})
+                if response.status_code == 200:
+                    completed += 1
+                else:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+
+    # Satu client per coroutine agar koneksi tersebar ke beberapa worker
+    clients = [httpx.AsyncClient(timeout=300) for _ in range(concurrency)]
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(worker(client, i) for i, client in enumerate(clients)))
+    finally:
+        for client in clients:
+            await client.aclose()
+    return completed / (time.perf_counter() - started), errors
+
+
+def run(workers, args, images):
+    workdir = tempfile.mkdtemp(prefix="workers-bench-")
+    open(os.path.join(workdir, "firebaseSDK.json"), "w").close()
+    os.symlink(os.path.join(REPO_DIR, "models"), os.path.join(workdir, "models"))
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+
+    extra = ["--threads-per-worker", str(args.threads_per_worker)] if args.threads_per_worker else []
+    process = subprocess.Popen([sys.executable, "-c", SERVER_SCRIPT, REPO_DIR, workdir, str(port), str(workers)] + extra)
+    try:
+        wait_ready(base_url, args.timeout)
+        idle = [memory_kb(pid) for pid in child_pids(process.pid)]
+        throughput, errors = asyncio.run(load(base_url, images, args.concurrency, args.duration))
+        busy = [memory_kb(pid) for pid in child_pids(process.pid)]
+        master = memory_kb(process.pid)
+    finally:
+        process.terminate()
+        process.wait()
+
+    return {
+        "throughput": throughput,
+        "errors": errors,
+        "master": master,
+        "idle": idle,
+        "busy": busy,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--threads-per-worker", type=int, default=0)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--timeout", type=float, default=300)
+    args = parser.parse_args()
+
+    images = [synthetic_image(1280, 720, seed=i) for i in range(4)]
+
+    print(f"{'workers':>8}{'req/s':>9}{'error':>7}{'master RSS':>12}{'RSS/worker':>12}{'PSS/worker':>12}{'PSS total':>11}  (MB, setelah beban)")
+    for workers in args.workers:
+        result = run(workers, args, images)
+        busy = result["busy"] or [(0, 0)]
+        rss = sum(r for r, _ in busy) / len(busy) / 1024
+        pss = sum(p for _, p in busy) / len(busy) / 1024
+        total_pss = (sum(p for _, p in busy) + result["master"][1]) / 1024
+        print(f"{workers:>8}{result['throughput']:>9.2f}{result['errors']:>7}{result['master'][0] / 1024:>12.0f}"
+              f"{rss:>12.0f}{pss:>12.0f}{total_pss:>11.0f}")
+        for i, ((idle_rss, idle_pss), (busy_rss, busy_pss)) in enumerate(zip(result["idle"], result["busy"])):
+            print(f"{'':>8}  worker {i + 1}: RSS {idle_rss / 1024:.0f} -> {busy_rss / 1024:.0f} MB, "
+                  f"PSS {idle_pss / 1024:.0f} -> {busy_pss / 1024:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+import asyncio
+import itertools
+import time
+
+from metrics import CAMERA_LAG_SECONDS
+
+
+def _recency(entry):
+    # Kunci 'YYYY-MM-DD' dan 'HH:MM' zero-padded -> angka yang makin besar untuk foto yang makin baru
+    digits = (entry.date + entry.time).replace("-", "").replace(":", "")
+    return int(digits) if digits.isdigit() else 0
+
+
+class _Camera:
+    def __init__(self, name, watcher, min_interval):
+        self.name = name
+        self.watcher = watcher
+        self.interval = min_interval
+        self.next_poll = 0.0
+        self.last_poll = None
+        self.polls = 0
+        self.empty_polls = 0
+        self.poll_errors = 0
+        self.queued = {}  # key entri -> waktu pertama kali ditemukan
+        self.processed = 0
+        self.failed = 0
+        self.last_lag = None
+
+
+class CameraScheduler:
+    """Polling banyak node kamera (esp32cam, ...) dan umpankan foto baru ke detektor.
+
+    Tiap kamera punya interval polling sendiri: kembali ke min_interval saat ada foto baru dan
+    dikali backoff (sampai max_interval) saat tidak ada perubahan. Foto yang ditemukan masuk
+    antrean prioritas (foto terbaru dulu, lintas kamera), entri yang sudah antre / sedang diproses
+    tidak dimasukkan lagi, dan paling banyak `concurrency` foto diproses bersamaan.
+
+    poll_fn(watcher) dan process_fn(name, watcher, entry) adalah coroutine yang disediakan api.py.
+    """
+
+    def __init__(self, poll_fn, process_fn, min_interval=1, max_interval=30, backoff=2.0, concurrency=2):
+        self.poll_fn = poll_fn
+        self.process_fn = process_fn
+        self.min_interval = float(min_interval)
+        self.max_interval = max(float(max_interval), self.min_interval)
+        self.backoff = max(1.0, float(backoff))
+        self.concurrency = max(1, int(concurrency))
+
+        self._cameras = {}
+        self._queue = None
+        self._seq = itertools.count()
+        self._wakeup = None
+        self._tasks = []
+
+    def add_camera(self, name, watcher):
+        self._cameras[name] = _Camera(name, watcher, self.min_interval)
+
+    def start(self):
+        if self._tasks or not self._cameras:
+            return
+        self._queue = asyncio.PriorityQueue()
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._poll_loop())]
+        self._tasks += [asyncio.create_task(self._process_loop()) for _ in range(self.concurrency)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def poke(self, name=None):
+        """Poll kamera (atau semua kamera) secepatnya, misalnya setelah ada trigger dari luar."""
+        for camera in self._cameras.values():
+            if name is None or camera.name == name:
+                camera.interval = self.min_interval
+                camera.next_poll = 0.0
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _poll_loop(self):
+        while True:
+            now = time.monotonic()
+            due = [camera for camera in self._cameras.values() if camera.next_poll <= now]
+            for camera in due:
+                await self._poll(camera)
+
+            next_poll = min(camera.next_poll for camera in self._cameras.values())
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(0.0, next_poll - time.monotonic()))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _poll(self, camera):
+        camera.last_poll = time.time()
+        camera.polls += 1
+        try:
+            entries = await self.poll_fn(camera.watcher)
+        except Exception as e:
+            camera.poll_errors += 1
+            entries = None
+            print(f"Error saat polling kamera {camera.name}: {e}")
+
+        found = 0
+        for entry in entries or []:
+            key = f"{entry.date}/{entry.time}"
+            if key in camera.queued:
+                continue
+            camera.queued[key] = time.monotonic()
+            self._queue.put_nowait((-_recency(entry), next(self._seq), camera.name, entry))
+            found += 1
+
+        if found:
+            camera.interval = self.min_interval
+        else:
+            camera.empty_polls += 1
+            camera.interval = min(camera.interval * self.backoff, self.max_interval)
+        camera.next_poll = time.monotonic() + camera.interval
+
+    async def _process_loop(self):
+        while True:
+            _, _, name, entry = await self._queue.get()
+            camera = self._cameras[name]
+            key = f"{entry.date}/{entry.time}"
+            try:
+                await self.process_fn(name, camera.watcher, entry)
+                camera.processed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                camera.failed += 1
+                print(f"Gagal memproses foto {name}/{key}: {e}")
+            finally:
+                found_at = camera.queued.pop(key, None)
+                if found_at is not None:
+                    camera.last_lag = time.monotonic() - found_at
+                    CAMERA_LAG_SECONDS.labels(name).observe(camera.last_lag)
+
+    def queue_depth(self):
+        return self._queue.qsize() if self._queue else 0
+
+    def stats(self):
+        now = time.monotonic()
+        return {
+            "running": bool(self._tasks),
+            "concurrency": self.concurrency,
+            "queue_depth": self.queue_depth(),
+            "cameras": {
+                camera.name: {
+                    "interval": camera.interval,
+                    "next_poll_in": max(0.0, camera.next_poll - now),
+                    "last_poll": camera.last_poll,
+                    "polls": camera.polls,
+                    "empty_polls": camera.empty_polls,
+                    "poll_errors": camera.poll_errors,
+                    "queued": len(camera.queued),
+                    "oldest_queued_age": max((now - t for t in camera.queued.values()), default=0.0),
+                    "last_lag": camera.last_lag,
+                    "processed": camera.processed,
+                    "failed": camera.failed,
+                    "watcher": camera.watcher.stats(),
+                }
+                for camera in self._cameras.values()
+            },
+        }
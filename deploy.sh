@@ -6,14 +6,31 @@ git pull origin main
 
 echo "Sedang berada di direktori: $(pwd)"
 
-PIDS=$(ps aux | grep "python api.py" | grep -v grep | awk '{print $2}')
+PIDS=$(ps aux | grep -E "python (api|server).py" | grep -v grep | awk '{print $2}')
 if [ -n "$PIDS" ]; then
   echo "Menghentikan aplikasi dengan PID: $PIDS"
-  kill -9 $PIDS
+  # SIGTERM dulu agar shutdown berjalan: buffer FirebaseWriter dikirim dan job yang sedang berjalan ditandai gagal
+  kill $PIDS 2>/dev/null
+  STOP_TIMEOUT=${STOP_TIMEOUT:-30}
+  for i in $(seq "$STOP_TIMEOUT"); do
+    ALIVE=""
+    for PID in $PIDS; do
+      if kill -0 "$PID" 2>/dev/null; then
+        ALIVE="$ALIVE $PID"
+      fi
+    done
+    [ -z "$ALIVE" ] && break
+    sleep 1
+  done
+  if [ -n "$ALIVE" ]; then
+    echo "Aplikasi belum berhenti setelah ${STOP_TIMEOUT} detik, memaksa berhenti PID:$ALIVE"
+    kill -9 $ALIVE
+  fi
 else
   echo "Tidak ada aplikasi yang berjalan."
 fi
 
-nohup ~/miniconda/bin/python api.py > output.log 2>&1 &
+# Model dimuat sekali di master lalu di-fork ke WEB_WORKERS worker (default 2)
+nohup ~/miniconda/bin/python server.py --workers ${WEB_WORKERS:-2} > output.log 2>&1 &
 
 echo "Deploy selesai. Aplikasi FastAPI sudah berjalan."
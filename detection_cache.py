@@ -0,0 +1,193 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class DetectionCache:
+    """Cache hasil deteksi berdasarkan hash isi gambar, versi model, ambang confidence dan backend.
+
+    Tier memori memakai LRU (OrderedDict); tier disk opsional menyimpan satu file JSON per entri.
+    model_version_fn() mengembalikan versi bobot yang sedang dipakai (dicatat InferenceRuntime saat
+    model dimuat), jadi entri lama otomatis tidak terpakai lagi begitu model lain dimuat.
+    """
+
+    def __init__(self, model_version_fn, conf, max_entries=256, ttl=3600, disk_dir=None, max_disk_entries=10000, tag=""):
+        self.model_version_fn = model_version_fn
+        self.conf = conf
+        self.tag = tag
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = float(ttl) if ttl else None
+        self.disk_dir = disk_dir
+        self.max_disk_entries = max(1, int(max_disk_entries))
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._model_version = model_version_fn()
+        self._counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expired": 0,
+            "invalidations": 0,
+            "disk_errors": 0,
+        }
+
+        self._disk_entries = 0
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self._disk_entries = sum(1 for f in os.listdir(self.disk_dir) if f.endswith(".json"))
+
+    def _check_model_version(self):
+        version = self.model_version_fn()
+        if version != self._model_version:
+            # Model lain dimuat: buang semua entri memori, entri disk tidak akan cocok lagi karena key berubah
+            if self._model_version is not None:
+                self._entries.clear()
+                self._counters["invalidations"] += 1
+            self._model_version = version
+
+    def key(self, image_data, variant=""):
+        h = hashlib.sha256(image_data)
+        h.update(f"|{self._model_version}|{self.conf}|{self.tag}".encode())
+        if variant:
+            # Mode inferensi per request (misalnya tiling) menghasilkan deteksi yang berbeda
+            h.update(f"|{variant}".encode())
+        return h.hexdigest()
+
+    def lookup(self, image_data, variant=""):
+        """Kembalikan (key, nilai) untuk bytes gambar; nilai None jika tidak ada di cache."""
+        with self._lock:
+            self._check_model_version()
+        key = self.key(image_data, variant)
+        return key, self.get(key)
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                if self.ttl is None or now - stored_at <= self.ttl:
+                    self._entries.move_to_end(key)
+                    self._counters["memory_hits"] += 1
+                    return value
+                del self._entries[key]
+                self._counters["expired"] += 1
+
+        value = self._disk_get(key, now)
+        with self._lock:
+            if value is None:
+                self._counters["misses"] += 1
+            else:
+                self._counters["disk_hits"] += 1
+                self._store(key, value, now)
+        return value
+
+    def put(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._store(key, value, now)
+        self._disk_put(key, value)
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.disk_dir:
+            try:
+                os.remove(self._disk_path(key))
+            except OSError:
+                return
+            with self._lock:
+                self._disk_entries -= 1
+
+    def _store(self, key, value, now):
+        self._entries[key] = (now, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _disk_get(self, key, now):
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            if self.ttl is not None and now - os.path.getmtime(path) > self.ttl:
+                return None
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _disk_put(self, key, value):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        # Tier disk hanya optimasi: disk penuh / izin salah tidak boleh menggagalkan request yang inferensinya sudah selesai
+        try:
+            is_new = not os.path.exists(path)
+            with open(tmp_path, "w") as f:
+                json.dump(value, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            with self._lock:
+                self._counters["disk_errors"] += 1
+            print(f"Gagal menulis cache deteksi ke disk {path}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+        with self._lock:
+            if is_new:
+                self._disk_entries += 1
+            prune = self._disk_entries > self.max_disk_entries
+        if prune:
+            self._prune_disk()
+
+    def _prune_disk(self):
+        # Sisakan 90% kuota supaya pemangkasan tidak terjadi di setiap put
+        try:
+            files = [os.path.join(self.disk_dir, f) for f in os.listdir(self.disk_dir) if f.endswith(".json")]
+        except OSError as e:
+            print(f"Gagal membaca direktori cache deteksi {self.disk_dir}: {e}")
+            return
+        keep = int(self.max_disk_entries * 0.9)
+        remaining = len(files)
+        if len(files) > keep:
+            mtimes = {}
+            for f in files:
+                try:
+                    mtimes[f] = os.path.getmtime(f)
+                except OSError:
+                    remaining -= 1
+            ordered = sorted(mtimes, key=mtimes.get)
+            for f in ordered[:-keep] if keep else ordered:
+                try:
+                    os.remove(f)
+                    remaining -= 1
+                except OSError:
+                    pass
+        with self._lock:
+            self._disk_entries = remaining
+
+    def stats(self):
+        with self._lock:
+            hits = self._counters["memory_hits"] + self._counters["disk_hits"]
+            lookups = hits + self._counters["misses"]
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "disk_entries": self._disk_entries if self.disk_dir else None,
+                "model_version": self._model_version,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                **self._counters,
+            }
@@ -0,0 +1,233 @@
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+PhotoEntry = namedtuple("PhotoEntry", ["date", "time", "photo_original"])
+
+
+def after_day(date):
+    """Kursor tepat setelah seluruh hari `date` untuk start_at()."""
+    # ' ' adalah karakter terkecil yang dapat dicetak, jadi date + ' ' tepat setelah date
+    return date + " "
+
+
+def first_day(ref, start="", end_date=None):
+    """Subtree hari pertama dengan key tanggal >= start (dan <= end_date jika diisi): {tanggal: {waktu: nilai}}.
+
+    Key tanggal 'YYYY-MM-DD' zero-padded, jadi urutan key Firebase sama dengan urutan tanggal.
+    """
+    query = ref.order_by_key().start_at(start)
+    if end_date:
+        # '~' lebih besar dari karakter key tanggal mana pun, jadi hari end_date ikut
+        query = query.end_at(end_date + "~")
+    return query.limit_to_first(1).get() or {}
+
+
+class Esp32CamWatcher:
+    """Pantau node esp32cam/<tanggal>/<waktu> secara inkremental.
+
+    Alih-alih ref.get() atas seluruh riwayat, watcher memakai query terurut berdasarkan key
+    dan terbatas: hanya entri mulai dari kursor terakhir pada tanggal yang sama, ditambah
+    tanggal berikutnya (jika ada). Kunci tanggal 'YYYY-MM-DD' dan waktu 'HH:MM' diasumsikan
+    zero-padded sehingga urutan leksikografis Firebase sama dengan urutan waktu.
+
+    Dengan claim_dir (multi-worker, server.py), claim juga berupa file <tanggal>_<waktu>.claim yang
+    dibuat atomik (O_EXCL) sehingga satu entri hanya diproses satu worker, termasuk antara scheduler
+    di worker 0 dan /detect_latest_image di worker lain. Isi file 'done' menandai entri selesai;
+    file yang lebih tua dari claim_ttl detik dihapus (juga claim milik worker yang mati).
+    """
+
+    def __init__(self, ref, max_tracked=10000, max_attempts=3, claim_dir=None, claim_ttl=3600):
+        self.ref = ref
+        self.max_tracked = max_tracked
+        self.max_attempts = max_attempts
+        self.claim_dir = claim_dir
+        self.claim_ttl = float(claim_ttl)
+        if claim_dir:
+            os.makedirs(claim_dir, exist_ok=True)
+        self._claims_swept_at = 0.0
+
+        self._lock = threading.Lock()
+        self._cursor = None
+        self._pending = OrderedDict()
+        self._attempts = {}
+        self._processed = OrderedDict()
+        self._in_progress = set()
+        self._queries = 0
+
+    @staticmethod
+    def _key(date, time):
+        return f"{date}/{time}"
+
+    def _fetch_initial(self):
+        # Hanya tanggal terakhir (satu subtree harian), bukan seluruh riwayat
+        latest = self.ref.order_by_key().limit_to_last(1).get() or {}
+        self._queries += 1
+        return [(date, time, value) for date, times in latest.items() for time, value in (times or {}).items()]
+
+    def _fetch_since_cursor(self):
+        date, time = self._cursor
+        entries = []
+
+        same_day = self.ref.child(date).order_by_key().start_at(time).get() or {}
+        entries += [(date, t, value) for t, value in same_day.items()]
+
+        for d, times in first_day(self.ref, after_day(date)).items():
+            entries += [(d, t, value) for t, value in (times or {}).items()]
+
+        self._queries += 2
+        return entries
+
+    def poll(self):
+        """Kembalikan entri foto yang belum diproses, terurut dari yang terlama ke terbaru."""
+        with self._lock:
+            entries = self._fetch_initial() if self._cursor is None else self._fetch_since_cursor()
+
+            for date, time, value in entries:
+                if self._cursor is None or (date, time) > self._cursor:
+                    self._cursor = (date, time)
+
+                key = self._key(date, time)
+                if key in self._processed or key in self._pending:
+                    continue
+                if not isinstance(value, dict) or not value.get("photo_original"):
+                    continue
+                if value.get("photo_hama"):
+                    # Sudah diproses sebelumnya (misalnya sebelum API di-restart)
+                    self._remember(key)
+                    continue
+                self._pending[key] = PhotoEntry(date, time, value["photo_original"])
+
+            pending = sorted(self._pending.values(), key=lambda e: (e.date, e.time))
+
+        if self.claim_dir:
+            self._sweep_claims()
+        return pending
+
+    def _remember(self, key):
+        self._processed[key] = True
+        while len(self._processed) > self.max_tracked:
+            self._processed.popitem(last=False)
+
+    def claim(self, entry):
+        """Tandai entri sedang diproses; False jika sudah diproses / sedang diproses pemanggil lain."""
+        key = self._key(entry.date, entry.time)
+        with self._lock:
+            if key in self._in_progress or key not in self._pending:
+                return False
+            self._in_progress.add(key)
+        if self.claim_dir is None:
+            return True
+
+        # Claim lintas worker
+        claimed, done = self._claim_file(key)
+        if not claimed:
+            with self._lock:
+                self._in_progress.discard(key)
+                if done:
+                    # Sudah diproses worker lain; photo_hama-nya mungkin belum terbaca di poll
+                    self._pending.pop(key, None)
+                    self._attempts.pop(key, None)
+                    self._remember(key)
+        return claimed
+
+    def release(self, entry):
+        """Lepas claim tanpa menghitung percobaan (misalnya antrean inferensi penuh)."""
+        key = self._key(entry.date, entry.time)
+        with self._lock:
+            self._in_progress.discard(key)
+        self._remove_claim_file(key)
+
+    def mark_processed(self, entry):
+        key = self._key(entry.date, entry.time)
+        with self._lock:
+            self._in_progress.discard(key)
+            self._pending.pop(key, None)
+            self._attempts.pop(key, None)
+            self._remember(key)
+        self._mark_claim_done(key)
+
+    def mark_failed(self, entry):
+        key = self._key(entry.date, entry.time)
+        with self._lock:
+            self._in_progress.discard(key)
+            self._attempts[key] = self._attempts.get(key, 0) + 1
+            exhausted = self._attempts[key] >= self.max_attempts
+            if exhausted:
+                # Jangan dicoba terus-menerus; tandai selesai agar tidak memblokir entri lain
+                self._pending.pop(key, None)
+                self._attempts.pop(key, None)
+                self._remember(key)
+        if exhausted:
+            self._mark_claim_done(key)
+        else:
+            self._remove_claim_file(key)
+
+    def _claim_path(self, key):
+        return os.path.join(self.claim_dir, key.replace("/", "_") + ".claim")
+
+    def _claim_file(self, key):
+        """Kembalikan (berhasil, sudah selesai oleh worker lain)."""
+        path = self._claim_path(key)
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                with open(path) as f:
+                    return False, f.read() == "done"
+            except OSError:
+                return False, False
+        except OSError as e:
+            # Direktori claim bermasalah: lebih baik diproses (mungkin dua kali) daripada tidak sama sekali
+            print(f"Gagal membuat claim {path}: {e}")
+            return True, False
+        with os.fdopen(fd, "w") as f:
+            f.write(str(os.getpid()))
+        return True, False
+
+    def _mark_claim_done(self, key):
+        if self.claim_dir is None:
+            return
+        path = self._claim_path(key)
+        try:
+            with open(f"{path}.{os.getpid()}.tmp", "w") as f:
+                f.write("done")
+            os.replace(f"{path}.{os.getpid()}.tmp", path)
+        except OSError as e:
+            print(f"Gagal menandai claim {path} selesai: {e}")
+
+    def _remove_claim_file(self, key):
+        if self.claim_dir is None:
+            return
+        try:
+            os.remove(self._claim_path(key))
+        except OSError:
+            pass
+
+    def _sweep_claims(self):
+        # Penanda selesai cukup bertahan sampai photo_hama terbaca semua worker; claim tua = worker mati
+        if time.monotonic() - self._claims_swept_at < min(60.0, self.claim_ttl):
+            return
+        self._claims_swept_at = time.monotonic()
+        cutoff = time.time() - self.claim_ttl
+        try:
+            entries = list(os.scandir(self.claim_dir))
+        except OSError:
+            return
+        for entry in entries:
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+            except OSError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            return {
+                "cursor": self._key(*self._cursor) if self._cursor else None,
+                "pending": len(self._pending),
+                "in_progress": len(self._in_progress),
+                "processed_tracked": len(self._processed),
+                "queries": self._queries,
+            }
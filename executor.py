@@ -0,0 +1,69 @@
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ExecutorFull(Exception):
+    """Dilempar jika antrean executor sudah penuh, supaya API bisa membalas 503 + Retry-After."""
+
+    def __init__(self, name, retry_after):
+        super().__init__(f"Antrean {name} penuh, coba lagi dalam {retry_after} detik")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class BoundedExecutor:
+    """Thread pool dengan batas jumlah pekerjaan (berjalan + antre) untuk dipakai dari coroutine.
+
+    Pekerjaan blocking dijalankan di thread sehingga event loop tetap bebas melayani request lain.
+    Jika batas terlampaui, run() langsung melempar ExecutorFull alih-alih menumpuk antrean.
+    """
+
+    def __init__(self, name, max_workers, max_pending, retry_after=1):
+        self.name = name
+        self.max_workers = max(1, int(max_workers))
+        self.max_pending = max(0, int(max_pending))
+        self.retry_after = retry_after
+
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=name)
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.max_pending)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+
+    async def run(self, fn, *args, **kwargs):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise ExecutorFull(self.name, self.retry_after)
+
+        with self._lock:
+            self._in_flight += 1
+        # Slot baru dilepas saat pekerjaan di thread selesai, bukan saat coroutine dibatalkan.
+        # Context disalin agar data per-request (misalnya timing) tetap terbawa ke thread.
+        context = contextvars.copy_context()
+        future = self._pool.submit(context.run, functools.partial(fn, *args, **kwargs))
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def _release(self, _future):
+        with self._lock:
+            self._in_flight -= 1
+            self._completed += 1
+        self._slots.release()
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "in_flight": self._in_flight,
+                "completed": self._completed,
+                "rejected": self._rejected,
+            }
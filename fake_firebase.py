@@ -0,0 +1,142 @@
+import copy
+import json
+import threading
+from collections import OrderedDict
+
+
+class FakeDatabase:
+    """Pengganti Firebase Realtime Database di memori untuk benchmark dan pengujian lokal.
+
+    Hanya mendukung bagian API firebase_admin.db yang dipakai di repo ini: reference(), child(),
+    get(), set(), update() (termasuk multi-path 'a/b/c') dan query order_by_key() dengan
+    start_at / end_at / limit_to_first / limit_to_last.
+    """
+
+    def __init__(self, data=None):
+        self.data = data or {}
+        self.lock = threading.Lock()
+        self.counters = {"gets": 0, "updates": 0}
+
+    @classmethod
+    def from_json(cls, path):
+        with open(path) as f:
+            return cls(json.load(f))
+
+    def to_json(self, path):
+        with self.lock:
+            with open(path, "w") as f:
+                json.dump(self.data, f, indent=2, sort_keys=True)
+
+    def reference(self, path="/"):
+        return FakeReference(self, _split(path))
+
+    def install(self):
+        """Ganti firebase_admin.initialize_app, credentials.Certificate dan db.reference dengan versi palsu."""
+        import firebase_admin
+        from firebase_admin import credentials, db
+
+        firebase_admin.initialize_app = lambda *args, **kwargs: None
+        credentials.Certificate = lambda *args, **kwargs: None
+        db.reference = self.reference
+
+
+def _split(path):
+    return [part for part in str(path).split("/") if part]
+
+
+class FakeReference:
+    def __init__(self, database, parts):
+        self._db = database
+        self._parts = parts
+
+    @property
+    def key(self):
+        return self._parts[-1] if self._parts else None
+
+    @property
+    def path(self):
+        return "/" + "/".join(self._parts)
+
+    def child(self, path):
+        return FakeReference(self._db, self._parts + _split(path))
+
+    def _node(self):
+        node = self._db.data
+        for part in self._parts:
+            if not isinstance(node, dict) or part not in node:
+                return None
+            node = node[part]
+        return node
+
+    def get(self):
+        with self._db.lock:
+            self._db.counters["gets"] += 1
+            return copy.deepcopy(self._node())
+
+    def _set_at(self, parts, value):
+        node = self._db.data
+        for part in parts[:-1]:
+            if not isinstance(node.get(part), dict):
+                node[part] = {}
+            node = node[part]
+        if value is None:
+            node.pop(parts[-1], None)
+        else:
+            node[parts[-1]] = copy.deepcopy(value)
+
+    def set(self, value):
+        with self._db.lock:
+            self._db.counters["updates"] += 1
+            if not self._parts:
+                self._db.data = copy.deepcopy(value) or {}
+            else:
+                self._set_at(self._parts, value)
+
+    def update(self, value):
+        with self._db.lock:
+            self._db.counters["updates"] += 1
+            for key, child_value in value.items():
+                self._set_at(self._parts + _split(key), child_value)
+
+    def order_by_key(self):
+        return FakeQuery(self)
+
+
+class FakeQuery:
+    def __init__(self, reference):
+        self._ref = reference
+        self._start = None
+        self._end = None
+        self._first = None
+        self._last = None
+
+    def start_at(self, value):
+        self._start = value
+        return self
+
+    def end_at(self, value):
+        self._end = value
+        return self
+
+    def limit_to_first(self, limit):
+        self._first = limit
+        return self
+
+    def limit_to_last(self, limit):
+        self._last = limit
+        return self
+
+    def get(self):
+        node = self._ref.get()
+        if not isinstance(node, dict):
+            return OrderedDict()
+        keys = sorted(node)
+        if self._start is not None:
+            keys = [k for k in keys if k >= self._start]
+        if self._end is not None:
+            keys = [k for k in keys if k <= self._end]
+        if self._first is not None:
+            keys = keys[:self._first]
+        if self._last is not None:
+            keys = keys[-self._last:] if self._last else []
+        return OrderedDict((k, node[k]) for k in keys)
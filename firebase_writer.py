@@ -0,0 +1,151 @@
+import threading
+import time
+from collections import OrderedDict
+
+from metrics import stage
+
+
+class FirebaseWriter:
+    """Tulis hasil deteksi ke Firebase secara write-behind, digabung menjadi update multi-path.
+
+    update(path, values) hanya menaruh nilai di buffer (nilai terbaru per field menang) lalu langsung
+    kembali. Thread flusher mengirim isi buffer sebagai satu root.update({"a/b/field": nilai, ...})
+    begitu jumlah path mencapai max_batch atau entri tertua sudah menunggu flush_interval detik.
+    Hanya ada satu flush berjalan, jadi urutan tulis per path terjaga; batch yang gagal dikembalikan
+    ke buffer (di bawah nilai yang lebih baru) dan dicoba lagi dengan backoff sampai max_retries.
+    """
+
+    def __init__(self, root, max_batch=100, flush_interval=1.0, max_retries=5, retry_backoff=1.0):
+        self.root = root
+        self.max_batch = max(1, int(max_batch))
+        self.flush_interval = max(0.0, float(flush_interval))
+        self.max_retries = max(0, int(max_retries))
+        self.retry_backoff = float(retry_backoff)
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._pending = OrderedDict()  # path -> {field: nilai}
+        self._first_queued = None
+        self._attempts = {}
+        self._retry_at = 0.0
+        self._stop = False
+        self._thread = None
+        self._counters = {
+            "writes": 0,
+            "coalesced": 0,
+            "flushes": 0,
+            "paths_flushed": 0,
+            "failures": 0,
+            "dropped": 0,
+        }
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="firebase-writer", daemon=True)
+        self._thread.start()
+
+    def update(self, path, values):
+        path = path.strip("/")
+        with self._lock:
+            self._counters["writes"] += 1
+            if path in self._pending:
+                self._counters["coalesced"] += 1
+                self._pending[path].update(values)
+            else:
+                self._pending[path] = dict(values)
+            if self._first_queued is None:
+                # Buffer sebelumnya kosong: bangunkan flusher agar menghitung ulang batas waktu flush
+                self._first_queued = time.monotonic()
+                self._wakeup.notify()
+            elif len(self._pending) >= self.max_batch:
+                self._wakeup.notify()
+
+    def _due(self, now):
+        if not self._pending or now < self._retry_at:
+            return False
+        return len(self._pending) >= self.max_batch or now - self._first_queued >= self.flush_interval
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._stop and not self._due(time.monotonic()):
+                    if self._pending:
+                        wake_at = max(self._first_queued + self.flush_interval, self._retry_at)
+                        self._wakeup.wait(timeout=max(0.0, wake_at - time.monotonic()))
+                    else:
+                        self._wakeup.wait()
+                if self._stop:
+                    return
+            self.flush()
+
+    def _take_batch(self):
+        with self._lock:
+            batch = OrderedDict()
+            while self._pending and len(batch) < self.max_batch:
+                path, values = self._pending.popitem(last=False)
+                batch[path] = values
+            self._first_queued = time.monotonic() if self._pending else None
+            return batch
+
+    def flush(self):
+        """Kirim isi buffer sekarang (dipanggil flusher, atau saat shutdown). False jika ada batch yang gagal."""
+        with self._flush_lock:
+            while True:
+                batch = self._take_batch()
+                if not batch:
+                    return True
+                update = {f"{path}/{field}": value for path, values in batch.items() for field, value in values.items()}
+                try:
+                    with stage("firebase_update"):
+                        self.root.update(update)
+                except Exception as e:
+                    self._requeue(batch, e)
+                    return False
+                with self._lock:
+                    self._counters["flushes"] += 1
+                    self._counters["paths_flushed"] += len(batch)
+                    for path in batch:
+                        self._attempts.pop(path, None)
+                    self._retry_at = 0.0
+
+    def _requeue(self, batch, error):
+        with self._lock:
+            self._counters["failures"] += 1
+            requeued = OrderedDict()
+            for path, values in batch.items():
+                attempts = self._attempts.get(path, 0) + 1
+                if attempts > self.max_retries:
+                    self._attempts.pop(path, None)
+                    self._counters["dropped"] += 1
+                    print(f"Gagal menulis hasil ke Firebase setelah {attempts} percobaan, dibuang: {path} ({error})")
+                    continue
+                self._attempts[path] = attempts
+                # Nilai yang masuk setelah batch diambil lebih baru, jadi menimpa nilai batch
+                requeued[path] = {**values, **self._pending.pop(path, {})}
+            self._pending = OrderedDict(list(requeued.items()) + list(self._pending.items()))
+            if self._pending and self._first_queued is None:
+                self._first_queued = time.monotonic()
+            self._retry_at = time.monotonic() + self.retry_backoff * 2 ** (min(self._attempts.values(), default=1) - 1)
+        print(f"Gagal menulis hasil ke Firebase, dicoba lagi: {error}")
+
+    def close(self, timeout=10):
+        """Hentikan flusher lalu kirim semua yang tersisa di buffer (dipanggil saat shutdown)."""
+        with self._lock:
+            self._stop = True
+            self._wakeup.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        deadline = time.monotonic() + timeout
+        while not self.flush() and time.monotonic() < deadline:
+            time.sleep(min(self.retry_backoff, max(0.0, deadline - time.monotonic())))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "pending_paths": len(self._pending),
+                "max_batch": self.max_batch,
+                "flush_interval": self.flush_interval,
+                **self._counters,
+            }
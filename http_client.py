@@ -0,0 +1,109 @@
+import asyncio
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import httpx
+
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class FetchError(ValueError):
+    """Gambar tidak bisa diambil dari URL (status bukan 200, timeout, atau terlalu besar)."""
+
+
+class ImageFetcher:
+    """Client HTTP async bersama untuk mengunduh gambar (image_url dan foto ESP32).
+
+    Koneksi keep-alive dipakai ulang per host, timeout connect/read dibatasi, ukuran body
+    dicek selama streaming, dan error sementara dicoba ulang dengan backoff + jitter.
+    """
+
+    def __init__(self, max_connections=32, max_keepalive=16, connect_timeout=5, read_timeout=15,
+                 max_bytes=20 * 1024 * 1024, retries=2, backoff=0.2):
+        self.max_bytes = int(max_bytes)
+        self.retries = max(0, int(retries))
+        self.backoff = backoff
+        self._client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive),
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            follow_redirects=True,
+        )
+
+        self._lock = threading.Lock()
+        self._latency_histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self._per_host = {}
+        self._counters = {"requests": 0, "errors": 0, "retries": 0, "bytes": 0}
+        self._total_latency = 0.0
+
+    async def fetch(self, url):
+        last_error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                with self._lock:
+                    self._counters["retries"] += 1
+                await asyncio.sleep(self.backoff * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5))
+
+            started = time.perf_counter()
+            try:
+                data = await self._fetch_once(url)
+            except FetchError as e:
+                # Status 4xx (kecuali 429) dan body terlalu besar tidak akan berubah jika dicoba ulang
+                last_error = e
+                if not getattr(e, "retryable", False):
+                    break
+            except httpx.TransportError as e:
+                last_error = FetchError(f"Gagal mengambil gambar dari URL: {url} ({e.__class__.__name__})")
+            else:
+                self._record(url, time.perf_counter() - started, len(data))
+                return data
+
+        with self._lock:
+            self._counters["errors"] += 1
+        raise last_error
+
+    async def _fetch_once(self, url):
+        async with self._client.stream("GET", url) as response:
+            if response.status_code != 200:
+                error = FetchError(f"Gagal mengambil gambar dari URL: {url} (status {response.status_code})")
+                error.retryable = response.status_code >= 500 or response.status_code == 429
+                raise error
+
+            content_length = response.headers.get("content-length")
+            if content_length and content_length.isdigit() and int(content_length) > self.max_bytes:
+                raise FetchError(f"Gambar dari URL terlalu besar (maksimal {self.max_bytes} byte)")
+
+            chunks = []
+            received = 0
+            async for chunk in response.aiter_bytes():
+                received += len(chunk)
+                if received > self.max_bytes:
+                    raise FetchError(f"Gambar dari URL terlalu besar (maksimal {self.max_bytes} byte)")
+                chunks.append(chunk)
+            return b"".join(chunks)
+
+    def _record(self, url, latency, size):
+        latency_ms = latency * 1000
+        bucket = next((i for i, limit in enumerate(LATENCY_BUCKETS_MS) if latency_ms <= limit), len(LATENCY_BUCKETS_MS))
+        host = urlsplit(url).netloc
+        with self._lock:
+            self._counters["requests"] += 1
+            self._counters["bytes"] += size
+            self._total_latency += latency
+            self._latency_histogram[bucket] += 1
+            self._per_host[host] = self._per_host.get(host, 0) + 1
+
+    async def aclose(self):
+        await self._client.aclose()
+
+    def stats(self):
+        with self._lock:
+            requests = self._counters["requests"]
+            labels = [f"<={limit}ms" for limit in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+            return {
+                **self._counters,
+                "avg_latency_ms": self._total_latency / requests * 1000 if requests else 0.0,
+                "latency_histogram": dict(zip(labels, self._latency_histogram)),
+                "requests_per_host": dict(self._per_host),
+            }
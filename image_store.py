@@ -0,0 +1,239 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from metrics import stage
+
+_NAME_RE = re.compile(r"^[0-9a-f]{4}[0-9A-Za-z_.-]*$")
+_EXT_RE = re.compile(r"^\.[0-9A-Za-z]{1,5}$")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (name TEXT PRIMARY KEY, size INTEGER NOT NULL, created_at REAL NOT NULL);
+CREATE INDEX IF NOT EXISTS images_created_at ON images (created_at);
+CREATE TABLE IF NOT EXISTS totals (id INTEGER PRIMARY KEY CHECK (id = 0), files INTEGER NOT NULL, bytes INTEGER NOT NULL);
+INSERT OR IGNORE INTO totals VALUES (0, 0, 0);
+CREATE TRIGGER IF NOT EXISTS images_insert AFTER INSERT ON images
+    BEGIN UPDATE totals SET files = files + 1, bytes = bytes + NEW.size WHERE id = 0; END;
+CREATE TRIGGER IF NOT EXISTS images_delete AFTER DELETE ON images
+    BEGIN UPDATE totals SET files = files - 1, bytes = bytes - OLD.size WHERE id = 0; END;
+"""
+
+
+class ImageStore:
+    """Penyimpanan gambar content-addressed di direktori ber-shard.
+
+    Nama file adalah hash isinya (name_for) atau hash semua input pembentuknya untuk gambar turunan
+    (derived_name), jadi gambar yang sama hanya disimpan sekali dan file tidak pernah ditimpa: nama
+    tanpa ekstensi bisa langsung dipakai sebagai ETag kuat dan di-cache selamanya. File disimpan di
+    <root>/<ab>/<cd>/<nama>; 65536 direktori shard menjaga jumlah entri per direktori tetap kecil
+    meski totalnya jutaan file.
+
+    Indeks SQLite (<root>/index.sqlite3: nama, ukuran, waktu simpan, plus total file/byte) dipakai
+    untuk statistik dan retensi (max_bytes / max_age) tanpa listing direktori. Indeks dibuka per
+    proses sehingga aman dipakai bersama oleh worker server.py. legacy_dirs adalah direktori datar
+    lama yang masih dilayani agar link lama di Firebase tetap hidup (tidak diindeks / dihapus).
+    """
+
+    def __init__(self, root, max_bytes=0, max_age=0, sweep_interval=60, legacy_dirs=()):
+        self.root = root
+        self.max_bytes = int(max_bytes) if max_bytes else None
+        self.max_age = float(max_age) if max_age else None
+        self.sweep_interval = sweep_interval
+        self.legacy_dirs = [d for d in legacy_dirs if d]
+        self.index_path = os.path.join(root, "index.sqlite3")
+        os.makedirs(root, exist_ok=True)
+
+        # Skema dibuat dengan koneksi sementara: koneksi tidak boleh ikut terbawa fork (server.py)
+        conn = sqlite3.connect(self.index_path)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+        finally:
+            conn.close()
+
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+        self._counters = {"stored": 0, "deduplicated": 0, "evicted": 0}
+        self._disabled = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def name_for(data, ext=".jpg"):
+        """Nama berdasarkan isi: bytes yang sama selalu mendapat nama yang sama."""
+        return ImageStore.derived_name(data, ext=ext)
+
+    @staticmethod
+    def derived_name(*parts, ext=".jpg"):
+        """Nama untuk gambar yang ditentukan sepenuhnya oleh `parts` (misalnya gambar asli + deteksi)."""
+        h = hashlib.sha256()
+        for part in parts:
+            h.update(part if isinstance(part, (bytes, bytearray, memoryview)) else str(part).encode())
+            h.update(b"\0")
+        return h.hexdigest()[:32] + (ext.lower() if _EXT_RE.match(ext or "") else ".jpg")
+
+    @staticmethod
+    def valid_name(name):
+        return os.path.basename(name) == name and bool(_NAME_RE.match(name)) and ".tmp" not in name
+
+    def path(self, name):
+        return os.path.join(self.root, name[:2], name[2:4], name)
+
+    def _connection(self):
+        # Satu koneksi per proses (dibuka ulang setelah fork), dipakai bergantian di bawah _lock
+        if self._conn is None or self._conn_pid != os.getpid():
+            self._conn = sqlite3.connect(self.index_path, timeout=10, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    def _record(self, name, size):
+        # Nama yang sudah tercatat diperbarui waktunya: gambar yang dirujuk lagi ikut diperpanjang retensinya
+        with self._lock:
+            self._connection().execute(
+                "INSERT INTO images (name, size, created_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET created_at = excluded.created_at",
+                (name, size, time.time()),
+            )
+
+    def touch(self, name):
+        with self._lock:
+            self._connection().execute("UPDATE images SET created_at = ? WHERE name = ?", (time.time(), name))
+
+    def locate(self, name):
+        """Path file untuk nama tersebut (layout shard, lalu direktori lama), atau None."""
+        if not self.valid_name(name):
+            return None
+        path = self.path(name)
+        if os.path.isfile(path):
+            return path
+        for directory in self.legacy_dirs:
+            legacy_path = os.path.join(directory, name)
+            if os.path.isfile(legacy_path):
+                return legacy_path
+        return None
+
+    def contains(self, name):
+        return self.locate(name) is not None
+
+    def temp_path(self, name):
+        """Path sementara di shard yang sama (rename atomik ke path akhir lewat adopt())."""
+        directory = os.path.dirname(self.path(name))
+        os.makedirs(directory, exist_ok=True)
+        # Ekstensi asli dipertahankan di akhir agar cv2.imwrite tetap tahu formatnya
+        return os.path.join(directory, f"{name}.{os.getpid()}.{threading.get_ident()}.tmp{os.path.splitext(name)[1]}")
+
+    def put(self, name, data):
+        """Simpan bytes dengan nama tersebut; jika sudah ada (isi sama), tidak ditulis ulang."""
+        path = self.path(name)
+        if os.path.isfile(path):
+            with self._lock:
+                self._counters["deduplicated"] += 1
+            # Sekaligus mencatat file yang belum sempat tercatat (proses mati di antara rename dan insert)
+            self._record(name, len(data))
+            return path
+        tmp_path = self.temp_path(name)
+        with stage("store_write"):
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        self._record(name, len(data))
+        with self._lock:
+            self._counters["stored"] += 1
+        return path
+
+    def adopt(self, name, tmp_path):
+        """Pindahkan file yang sudah ditulis di temp_path(name) ke path akhirnya."""
+        path = self.path(name)
+        os.replace(tmp_path, path)
+        self._record(name, os.path.getsize(path))
+        with self._lock:
+            self._counters["stored"] += 1
+        return path
+
+    def remove(self, name):
+        with self._lock:
+            self._connection().execute("DELETE FROM images WHERE name = ?", (name,))
+        try:
+            os.remove(self.path(name))
+        except FileNotFoundError:
+            pass
+
+    def start(self):
+        if self._disabled or self._thread is not None or not (self.max_bytes or self.max_age):
+            return
+        self._thread = threading.Thread(target=self._sweep_loop, name=f"store-sweeper-{self.root}", daemon=True)
+        self._thread.start()
+
+    def disable(self):
+        """Matikan sweeper di proses ini (retensi dijalankan proses lain); simpan dan baca tetap jalan."""
+        # Dipanggil di proses anak setelah fork: lock bisa ikut terkunci (sweeper master sedang jalan) dan
+        # koneksi SQLite milik master tidak boleh dipakai, jadi keduanya dibuat ulang
+        self._disabled = True
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+
+    def _victims(self, conn, now, limit=500):
+        files, total_bytes = conn.execute("SELECT files, bytes FROM totals WHERE id = 0").fetchone()
+        cutoff = now - self.max_age if self.max_age else None
+        victims = []
+        for name, size, created_at in conn.execute(
+            "SELECT name, size, created_at FROM images ORDER BY created_at LIMIT ?", (limit,)
+        ):
+            over_bytes = self.max_bytes is not None and total_bytes > self.max_bytes
+            too_old = cutoff is not None and created_at < cutoff
+            if not (over_bytes or too_old):
+                break
+            victims.append(name)
+            total_bytes -= size
+        return victims
+
+    def sweep(self):
+        """Hapus gambar tertua sampai kuota byte dan umur terpenuhi; kembalikan jumlah file yang dihapus."""
+        removed = 0
+        while True:
+            with self._lock:
+                conn = self._connection()
+                victims = self._victims(conn, time.time())
+                if not victims:
+                    return removed
+                conn.executemany("DELETE FROM images WHERE name = ?", [(name,) for name in victims])
+                self._counters["evicted"] += len(victims)
+            for name in victims:
+                try:
+                    os.remove(self.path(name))
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    print(f"Gagal menghapus gambar lama {name}: {e}")
+            removed += len(victims)
+
+    def _sweep_loop(self):
+        while not self._stop.wait(self.sweep_interval):
+            try:
+                with stage("store_sweep"):
+                    self.sweep()
+            except Exception as e:
+                print(f"Error saat membersihkan gambar lama di {self.root}: {e}")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def stats(self):
+        with self._lock:
+            files, total_bytes = self._connection().execute("SELECT files, bytes FROM totals WHERE id = 0").fetchone()
+            return {
+                "root": self.root,
+                "files": files,
+                "bytes": total_bytes,
+                "max_bytes": self.max_bytes,
+                "max_age": self.max_age,
+                **self._counters,
+            }
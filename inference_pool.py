@@ -0,0 +1,271 @@
+import multiprocessing
+import queue
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+
+def result_to_array(result):
+    """Ubah satu hasil YOLO menjadi array float32 (N, 6): x1, y1, x2, y2, skor, kelas."""
+    boxes = result.boxes
+    if boxes is None or len(boxes) == 0:
+        return np.zeros((0, 6), dtype=np.float32)
+    data = boxes.data.cpu().numpy()
+    return np.column_stack((data[:, :4], data[:, -2], data[:, -1])).astype(np.float32)
+
+
+def _attach_shared_memory(name):
+    shm = shared_memory.SharedMemory(name=name)
+    # Segmen milik proses API; jangan sampai resource tracker worker ikut menghapusnya
+    try:
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+    return shm
+
+
+def _worker_main(conn, model_path, conf, warmup_shapes=(), warmup_runs=0):
+    from backends import load_model
+
+    model = load_model(model_path)
+    # Warm-up sebelum melapor siap, supaya request pertama tidak menanggung biaya alokasi awal
+    for _ in range(warmup_runs):
+        for shape in warmup_shapes:
+            model.predict(source=np.zeros(shape, dtype=np.uint8), conf=conf, verbose=False)
+    conn.send(("ready", model.names))
+
+    shm = None
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+        if message[0] == "ping":
+            conn.send(("pong",))
+            continue
+
+        _, shm_name, shape, dtype = message
+        try:
+            if shm is None or shm.name != shm_name:
+                if shm is not None:
+                    shm.close()
+                shm = _attach_shared_memory(shm_name)
+            img = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+            result = model.predict(source=img, conf=conf, verbose=False)[0]
+            conn.send(("ok", result_to_array(result)))
+        except Exception as e:
+            conn.send(("error", repr(e)))
+
+    if shm is not None:
+        shm.close()
+
+
+class _Worker:
+    def __init__(self, ctx, index, model_path, conf, warmup_shapes=(), warmup_runs=0):
+        self.ctx = ctx
+        self.index = index
+        self.model_path = model_path
+        self.conf = conf
+        self.warmup_shapes = warmup_shapes
+        self.warmup_runs = warmup_runs
+        self.lock = threading.Lock()
+        self.shm = None
+        self.process = None
+        self.conn = None
+        self.names = None
+        self.restarts = 0
+        self.jobs = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.started_at = time.monotonic()
+
+    def start(self):
+        parent_conn, child_conn = self.ctx.Pipe()
+        self.process = self.ctx.Process(
+            target=_worker_main,
+            args=(child_conn, self.model_path, self.conf, self.warmup_shapes, self.warmup_runs),
+            name=f"inference-worker-{self.index}",
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+        self.started_at = time.monotonic()
+        self.busy_seconds = 0.0
+
+    def wait_ready(self, timeout):
+        if not self.conn.poll(timeout):
+            raise TimeoutError(f"Worker inferensi {self.index} tidak siap dalam {timeout} detik")
+        status, names = self.conn.recv()
+        if status != "ready":
+            raise RuntimeError(f"Worker inferensi {self.index} gagal dimulai")
+        self.names = names
+
+    def restart(self, timeout):
+        self.stop(graceful=False)
+        self.restarts += 1
+        self.start()
+        self.wait_ready(timeout)
+
+    def stop(self, graceful=True):
+        if self.process is None:
+            return
+        if graceful and self.process.is_alive():
+            try:
+                self.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout=5)
+        self.conn.close()
+
+    def release_memory(self):
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+    def _frame_buffer(self, nbytes):
+        # Segmen shared memory per worker dipakai ulang dan hanya diperbesar bila perlu
+        if self.shm is None or self.shm.size < nbytes:
+            self.release_memory()
+            self.shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        return self.shm
+
+    def run(self, img, timeout, startup_timeout):
+        img = np.ascontiguousarray(img)
+        shm = self._frame_buffer(img.nbytes)
+        np.ndarray(img.shape, dtype=img.dtype, buffer=shm.buf)[...] = img
+
+        started = time.monotonic()
+        try:
+            self.conn.send(("predict", shm.name, img.shape, img.dtype.str))
+            if not self.conn.poll(timeout):
+                self.errors += 1
+                self.restart(startup_timeout)
+                raise TimeoutError(f"Worker inferensi {self.index} tidak merespons dalam {timeout} detik")
+            status, payload = self.conn.recv()
+        except (EOFError, BrokenPipeError, ConnectionResetError):
+            self.errors += 1
+            self.restart(startup_timeout)
+            raise RuntimeError(f"Worker inferensi {self.index} berhenti saat memproses gambar")
+        finally:
+            self.busy_seconds += time.monotonic() - started
+
+        self.jobs += 1
+        if status != "ok":
+            self.errors += 1
+            raise RuntimeError(payload)
+        return payload
+
+    def ping(self, timeout):
+        if not self.process.is_alive():
+            return False
+        try:
+            self.conn.send(("ping",))
+            return self.conn.poll(timeout) and self.conn.recv() == ("pong",)
+        except (EOFError, BrokenPipeError, ConnectionResetError):
+            return False
+
+    def stats(self):
+        uptime = time.monotonic() - self.started_at
+        return {
+            "index": self.index,
+            "pid": self.process.pid if self.process else None,
+            "alive": bool(self.process and self.process.is_alive()),
+            "restarts": self.restarts,
+            "jobs": self.jobs,
+            "errors": self.errors,
+            "busy_seconds": self.busy_seconds,
+            "utilization": self.busy_seconds / uptime if uptime > 0 else 0.0,
+        }
+
+
+class InferencePool:
+    """Kumpulan proses worker yang masing-masing memuat model sekali saat mulai.
+
+    Frame hasil decode dikirim lewat multiprocessing.shared_memory (tanpa pickle array besar),
+    worker mengembalikan array deteksi ringkas (lihat result_to_array). Worker yang mati atau
+    macet otomatis dijalankan ulang oleh health check di background.
+    """
+
+    def __init__(self, model_path, num_workers, conf=0.5, timeout=60, startup_timeout=120, health_interval=5,
+                 warmup_shapes=(), warmup_runs=0):
+        self.timeout = timeout
+        self.startup_timeout = startup_timeout
+        self.health_interval = health_interval
+        # fork: worker tidak perlu mengimpor ulang api.py (yang menginisialisasi Firebase dan server)
+        ctx = multiprocessing.get_context("fork")
+
+        self._workers = [
+            _Worker(ctx, i, model_path, conf, warmup_shapes, warmup_runs) for i in range(max(1, int(num_workers)))
+        ]
+        for worker in self._workers:
+            worker.start()
+        for worker in self._workers:
+            worker.wait_ready(startup_timeout)
+        self.names = self._workers[0].names
+
+        self._idle = queue.Queue()
+        for worker in self._workers:
+            self._idle.put(worker)
+        self._waiting = 0
+        self._waiting_lock = threading.Lock()
+
+        self._stop = threading.Event()
+        self._monitor = threading.Thread(target=self._health_loop, name="inference-health", daemon=True)
+        self._monitor.start()
+
+    def predict(self, img):
+        with self._waiting_lock:
+            self._waiting += 1
+        try:
+            worker = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError("Tidak ada worker inferensi yang tersedia")
+        finally:
+            with self._waiting_lock:
+                self._waiting -= 1
+
+        try:
+            with worker.lock:
+                return worker.run(img, self.timeout, self.startup_timeout)
+        finally:
+            self._idle.put(worker)
+
+    def _health_loop(self):
+        while not self._stop.wait(self.health_interval):
+            for worker in self._workers:
+                # Worker yang sedang memproses gambar diperiksa lewat timeout di run()
+                if not worker.lock.acquire(blocking=False):
+                    continue
+                try:
+                    if not worker.ping(timeout=5):
+                        worker.restart(self.startup_timeout)
+                except Exception as e:
+                    print(f"Gagal menjalankan ulang worker inferensi {worker.index}: {e}")
+                finally:
+                    worker.lock.release()
+
+    def close(self):
+        self._stop.set()
+        self._monitor.join()
+        for worker in self._workers:
+            with worker.lock:
+                worker.stop()
+                worker.release_memory()
+
+    def stats(self):
+        with self._waiting_lock:
+            waiting = self._waiting
+        return {
+            "num_workers": len(self._workers),
+            "queue_depth": waiting,
+            "workers": [worker.stats() for worker in self._workers],
+        }
@@ -0,0 +1,295 @@
+import asyncio
+import contextvars
+import os
+import time
+import uuid
+from collections import OrderedDict
+
+from executor import ExecutorFull
+from state_dir import StateDir
+
+FINISHED = ("done", "failed", "expired", "cancelled")
+
+_current_job = contextvars.ContextVar("current_job", default=None)
+
+
+class JobExpired(Exception):
+    """Deadline job terlewati atau job dibatalkan klien, pekerjaan yang tersisa tidak dijalankan."""
+
+    def __init__(self, cancelled):
+        self.status = "cancelled" if cancelled else "expired"
+        super().__init__("Job dibatalkan klien" if cancelled else "Deadline job terlewati")
+
+
+def check_deadline():
+    """Lempar JobExpired jika dipanggil dari dalam job yang sudah lewat deadline / dibatalkan.
+
+    Dipanggil sebelum decode, sebelum masuk antrean inferensi, dan di awal inferensi. Di luar job tidak melakukan apa-apa.
+    """
+    job = _current_job.get()
+    if job is None:
+        return
+    cancelled = job.cancelled()
+    if cancelled or job.expired():
+        raise JobExpired(cancelled)
+
+
+def write_marker(path):
+    with open(path, "w"):
+        pass
+
+
+class Job:
+    def __init__(self, payload, deadline):
+        self.id = uuid.uuid4().hex
+        self.payload = payload
+        self.status = "queued"
+        self.created_at = time.time()
+        self.deadline = self.created_at + deadline
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self.retries = 0
+        self.cancel_requested = False
+        self.cancel_marker = None
+        self.done = asyncio.Event()
+        self._expires = time.monotonic() + deadline
+
+    def cancelled(self):
+        # Pembatalan lewat worker lain ditandai dengan file <id>.cancel di state_dir
+        if not self.cancel_requested and self.cancel_marker and os.path.exists(self.cancel_marker):
+            self.cancel_requested = True
+        return self.cancel_requested
+
+    def expired(self):
+        return time.monotonic() >= self._expires
+
+    def remaining(self):
+        return max(0.0, self._expires - time.monotonic())
+
+    def snapshot(self):
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "deadline": self.deadline,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "retries": self.retries,
+            "cancel_requested": self.cancel_requested,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobQueue:
+    """Antrean job deteksi di background: submit langsung mengembalikan id, hasil diambil belakangan.
+
+    Paling banyak `workers` job berjalan bersamaan dan `max_pending` job (antre + berjalan) ditampung;
+    di atas itu submit melempar ExecutorFull (503 + Retry-After). Tiap job punya deadline: job yang
+    sudah lewat deadline saat keluar antrean dibuang tanpa dikerjakan, dan run_fn bisa memanggil
+    check_deadline() sebelum tahap mahal. Jika run_fn gagal karena antrean internal penuh / model belum
+    siap (exception dengan atribut retry_after), job dicoba lagi selama deadline belum lewat.
+
+    Hasil disimpan result_ttl detik (maks. max_finished job). Dengan state_dir, status tiap job juga
+    ditulis sebagai <id>.json agar worker lain (server.py) bisa menjawab GET /jobs/{id}.
+    run_fn(payload) dan error_fn(exception) -> dict disediakan api.py.
+    """
+
+    def __init__(self, run_fn, workers=4, max_pending=256, default_deadline=120, max_deadline=900, result_ttl=600,
+                 max_finished=1000, retry_after=1, error_fn=None, state_dir=None):
+        self.run_fn = run_fn
+        self.workers = max(1, int(workers))
+        self.max_pending = max(1, int(max_pending))
+        self.default_deadline = float(default_deadline)
+        self.max_deadline = max(float(max_deadline), self.default_deadline)
+        self.result_ttl = float(result_ttl)
+        self.max_finished = max(1, int(max_finished))
+        self.retry_after = retry_after
+        self.error_fn = error_fn or (lambda e: {"detail": str(e)})
+        self.state_dir = state_dir
+        self._state = StateDir(state_dir, "job") if state_dir else None
+
+        self._jobs = {}
+        self._finished = OrderedDict()  # id -> waktu selesai (monotonic), terlama dulu
+        self._queue = None
+        self._tasks = []
+        self._active = 0
+        self._counters = {
+            "submitted": 0,
+            "rejected": 0,
+            "done": 0,
+            "failed": 0,
+            "expired": 0,
+            "expired_in_queue": 0,
+            "cancelled": 0,
+            "retries": 0,
+        }
+        self._queue_wait_seconds = 0.0
+        self._started_jobs = 0
+
+    def start(self):
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        if self._state is not None:
+            self._state.start()
+            self._state.submit(self._state.remove_older_than, self.max_deadline + self.result_ttl)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        for job in list(self._jobs.values()):
+            if job.status not in FINISHED:
+                self._finish(job, "failed", error={"detail": "Server berhenti sebelum job selesai"})
+        if self._state is not None:
+            self._state.stop()
+
+    def queue_depth(self):
+        return self._queue.qsize() + self._active if self._queue is not None else 0
+
+    def submit(self, payload, deadline=None):
+        self._prune()
+        if self.queue_depth() >= self.max_pending:
+            self._counters["rejected"] += 1
+            raise ExecutorFull("jobs", self.retry_after)
+        deadline = self.default_deadline if deadline is None or deadline <= 0 else min(float(deadline), self.max_deadline)
+        job = Job(payload, deadline)
+        if self._state is not None:
+            job.cancel_marker = self._state.file(f"{job.id}.cancel")
+        self._jobs[job.id] = job
+        self._counters["submitted"] += 1
+        self._queue.put_nowait(job)
+        self._persist(job)
+        return job
+
+    async def cancel(self, job_id):
+        """Tandai job dibatalkan. Job yang masih antre tidak akan dijalankan; yang sedang berjalan
+        berhenti di check_deadline() berikutnya. Kembalikan snapshot, atau None jika id tidak dikenal."""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return await self._cancel_foreign(job_id)
+        if job.status not in FINISHED:
+            job.cancel_requested = True
+            if job.status == "queued":
+                self._finish(job, "cancelled")
+        return job.snapshot()
+
+    async def wait(self, job_id, timeout=0):
+        """Snapshot job; jika belum selesai tunggu (maks. timeout detik). None jika id tidak dikenal."""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return await self._wait_foreign(job_id, timeout)
+        if timeout > 0 and job.status not in FINISHED:
+            try:
+                await asyncio.wait_for(job.done.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return job.snapshot()
+
+    async def _wait_foreign(self, job_id, timeout):
+        # Job milik worker lain: baca file status, ulangi sampai selesai atau timeout habis
+        if self._state is None or os.path.basename(job_id) != job_id:
+            return None
+        return await self._state.poll(f"{job_id}.json", lambda s: s is None or s["status"] in FINISHED, timeout)
+
+    async def _cancel_foreign(self, job_id):
+        if self._state is None or os.path.basename(job_id) != job_id:
+            return None
+        loop = asyncio.get_running_loop()
+        snapshot = await loop.run_in_executor(None, self._state.read, f"{job_id}.json")
+        if snapshot is not None and snapshot["status"] not in FINISHED:
+            await loop.run_in_executor(None, write_marker, self._state.file(f"{job_id}.cancel"))
+            snapshot["cancel_requested"] = True
+        return snapshot
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            if job.status != "queued":
+                continue  # dibatalkan selagi antre
+            if job.cancelled():
+                self._finish(job, "cancelled")
+                continue
+            if job.expired():
+                self._counters["expired_in_queue"] += 1
+                self._finish(job, "expired", error={"detail": "Deadline job terlewati sebelum diproses"})
+                continue
+
+            self._active += 1
+            job.status = "running"
+            job.started_at = time.time()
+            self._started_jobs += 1
+            self._queue_wait_seconds += job.started_at - job.created_at
+            self._persist(job)
+            token = _current_job.set(job)
+            try:
+                result = await self._run(job)
+            except JobExpired as e:
+                self._finish(job, e.status, error={"detail": str(e)})
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._finish(job, "failed", error=self.error_fn(e))
+            else:
+                self._finish(job, "done", result=result)
+            finally:
+                _current_job.reset(token)
+                self._active -= 1
+
+    async def _run(self, job):
+        while True:
+            check_deadline()
+            try:
+                return await self.run_fn(job.payload)
+            except JobExpired:
+                raise
+            except Exception as e:
+                retry_after = getattr(e, "retry_after", None)
+                if retry_after is None or job.remaining() <= retry_after:
+                    raise
+            # Antrean executor penuh / model belum siap: tunggu lalu coba lagi dalam batas deadline
+            job.retries += 1
+            self._counters["retries"] += 1
+            await asyncio.sleep(retry_after)
+
+    def _finish(self, job, status, result=None, error=None):
+        job.status = status
+        job.finished_at = time.time()
+        job.result = result
+        job.error = error
+        job.payload = None  # Lepas bytes gambar secepatnya
+        job.done.set()
+        self._counters[status] += 1
+        self._finished[job.id] = time.monotonic()
+        self._persist(job)
+
+    def _prune(self):
+        now = time.monotonic()
+        while self._finished:
+            job_id, finished_at = next(iter(self._finished.items()))
+            if len(self._finished) <= self.max_finished and now - finished_at < self.result_ttl:
+                break
+            del self._finished[job_id]
+            self._jobs.pop(job_id, None)
+            if self._state is not None:
+                self._state.submit(self._state.remove, f"{job_id}.json", f"{job_id}.cancel")
+
+    def _persist(self, job):
+        if self._state is not None:
+            self._state.submit(self._state.write, f"{job.id}.json", job.snapshot())
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "running": self._active,
+            "tracked": len(self._jobs),
+            **self._counters,
+            "avg_queue_wait_seconds": self._queue_wait_seconds / self._started_jobs if self._started_jobs else 0.0,
+        }
@@ -0,0 +1,150 @@
+import json
+import threading
+from collections import OrderedDict
+
+import cv2
+
+from metrics import stage
+
+
+class LazyRenderer:
+    """Tunda menggambar kotak deteksi dan encode JPEG sampai gambar benar-benar diminta.
+
+    Saat deteksi selesai hanya detections dan referensi ke gambar asli (bytes terenkode atau
+    array hasil decode) yang disimpan. Render pertama menulis hasilnya ke store (ImageStore),
+    permintaan berikutnya langsung membaca file tersebut. Nama yang sudah ada di store tidak
+    didaftarkan ulang.
+
+    Jika spool_store (ImageStore) diisi, gambar asli dan detections juga ditulis ke sana sebagai satu
+    file <nama>.pending, jadi URL yang sudah dibagikan (misalnya photo_hama di Firebase) tetap bisa
+    dirender setelah entri memori dibuang, setelah restart, dan oleh worker lain; umurnya mengikuti
+    kuota store tersebut. Memori hanya cache: jumlah byte yang ditahan dibatasi dan entri tertua
+    dibuang lebih dulu. Gambar yang masih berupa array di-encode dengan spool_format (default PNG).
+    """
+
+    def __init__(self, store, render_fn, max_pending_bytes=256 * 1024 * 1024, spool_store=None, spool_format=".png"):
+        self.store = store
+        self.render_fn = render_fn
+        self.max_pending_bytes = int(max_pending_bytes)
+        self.spool_store = spool_store
+        self.spool_format = spool_format
+
+        self._lock = threading.Lock()
+        self._pending = OrderedDict()
+        self._pending_bytes = 0
+        self._render_locks = {}
+        self._counters = {"registered": 0, "deduplicated": 0, "rendered": 0, "evicted": 0, "served_from_disk": 0}
+
+    @staticmethod
+    def _size(original):
+        return original.nbytes if hasattr(original, "nbytes") else len(original)
+
+    @staticmethod
+    def _spool_name(filename):
+        return f"{filename}.pending"
+
+    def _spool(self, filename, original, detections):
+        if not isinstance(original, bytes):
+            ok, encoded = cv2.imencode(self.spool_format, original)
+            if not ok:
+                raise IOError(f"Gagal menyimpan gambar ke spool: {filename}")
+            original = encoded.tobytes()
+        # Satu file: baris pertama JSON detections, sisanya bytes gambar asli
+        self.spool_store.put(self._spool_name(filename), json.dumps(detections).encode() + b"\n" + original)
+
+    def _load_spooled(self, filename):
+        path = self.spool_store.locate(self._spool_name(filename))
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                header, _, original = f.read().partition(b"\n")
+            return original, json.loads(header)
+        except (OSError, ValueError):
+            return None
+
+    def register(self, filename, original, detections):
+        if self.store.contains(filename):
+            # Gambar hasil yang sama sudah pernah dirender
+            self.store.touch(filename)
+            with self._lock:
+                self._counters["deduplicated"] += 1
+            return
+        if self.spool_store is not None:
+            with stage("spool"):
+                self._spool(filename, original, detections)
+        size = self._size(original)
+        with self._lock:
+            if filename in self._pending:
+                # Gambar + deteksi yang sama sudah menunggu render
+                self._pending.move_to_end(filename)
+                self._counters["deduplicated"] += 1
+                return
+            self._pending[filename] = (original, detections)
+            self._pending_bytes += size
+            self._counters["registered"] += 1
+            while self._pending_bytes > self.max_pending_bytes and len(self._pending) > 1:
+                _, (evicted, _) = self._pending.popitem(last=False)
+                self._pending_bytes -= self._size(evicted)
+                self._counters["evicted"] += 1
+
+    def exists(self, filename):
+        with self._lock:
+            if filename in self._pending:
+                return True
+        if self.spool_store is not None and self.spool_store.contains(self._spool_name(filename)):
+            return True
+        return self.store.contains(filename)
+
+    def path_for(self, filename):
+        """Kembalikan path file hasil render (render dulu jika perlu), atau None jika tidak dikenal."""
+        if not self.store.valid_name(filename):
+            return None
+        with self._lock:
+            render_lock = self._render_locks.setdefault(filename, threading.Lock())
+
+        # Satu render per file meski ada beberapa permintaan bersamaan
+        with render_lock:
+            try:
+                path = self.store.locate(filename)
+                if path is not None:
+                    with self._lock:
+                        self._counters["served_from_disk"] += 1
+                    return path
+
+                with self._lock:
+                    entry = self._pending.get(filename)
+                if entry is None and self.spool_store is not None:
+                    # Didaftarkan oleh worker lain
+                    entry = self._load_spooled(filename)
+                if entry is None:
+                    return None
+
+                original, detections = entry
+                with stage("draw"):
+                    img = self.render_fn(original, detections)
+                tmp_path = self.store.temp_path(filename)
+                with stage("imwrite"):
+                    if not cv2.imwrite(tmp_path, img):
+                        raise IOError(f"Gagal menulis gambar hasil deteksi: {filename}")
+                path = self.store.adopt(filename, tmp_path)
+                if self.spool_store is not None:
+                    self.spool_store.remove(self._spool_name(filename))
+
+                with self._lock:
+                    if self._pending.pop(filename, None) is not None:
+                        self._pending_bytes -= self._size(original)
+                    self._counters["rendered"] += 1
+                return path
+            finally:
+                with self._lock:
+                    self._render_locks.pop(filename, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "pending_bytes": self._pending_bytes,
+                "max_pending_bytes": self.max_pending_bytes,
+                **self._counters,
+            }
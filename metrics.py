@@ -0,0 +1,81 @@
+import contextvars
+import time
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+STAGE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+STAGE_SECONDS = Histogram(
+    "hydroponics_stage_seconds",
+    "Durasi setiap tahap pemrosesan (fetch, decode, predict, render, firebase, ...)",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+REQUEST_SECONDS = Histogram(
+    "hydroponics_request_seconds",
+    "Durasi total request HTTP per endpoint",
+    ["endpoint"],
+    buckets=STAGE_BUCKETS,
+)
+REQUESTS_TOTAL = Counter("hydroponics_requests_total", "Jumlah request HTTP", ["endpoint", "status"])
+STAGE_ERRORS_TOTAL = Counter("hydroponics_stage_errors_total", "Jumlah tahap yang gagal", ["stage"])
+IN_FLIGHT = Gauge("hydroponics_requests_in_flight", "Request HTTP yang sedang diproses")
+QUEUE_DEPTH = Gauge("hydroponics_queue_depth", "Jumlah pekerjaan yang sedang antre / berjalan", ["queue"])
+CAMERA_LAG_SECONDS = Histogram(
+    "hydroponics_camera_lag_seconds",
+    "Waktu dari foto kamera ditemukan scheduler sampai selesai diproses",
+    ["camera"],
+    buckets=STAGE_BUCKETS,
+)
+SCENE_GATE_FRAMES_TOTAL = Counter(
+    "hydroponics_scene_gate_frames_total",
+    "Frame kamera yang melewati gate perubahan adegan (skipped = deteksi lama dipakai ulang)",
+    ["result"],
+)
+MODEL_LOAD_SECONDS = Gauge("hydroponics_model_load_seconds", "Waktu memuat model saat startup")
+
+# Daftar (tahap, durasi) untuk request yang sedang berjalan, dipakai untuk header Server-Timing
+_request_timings = contextvars.ContextVar("request_timings", default=None)
+
+
+class stage:
+    """Ukur durasi satu tahap; bisa dipakai dengan `with` di kode sync maupun async."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self._started
+        STAGE_SECONDS.labels(self.name).observe(elapsed)
+        if exc_type is not None:
+            STAGE_ERRORS_TOTAL.labels(self.name).inc()
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append((self.name, elapsed))
+        return False
+
+
+def start_request():
+    timings = []
+    _request_timings.set(timings)
+    return timings
+
+
+def server_timing(timings):
+    # Tahap yang sama (misalnya beberapa decode) dijumlahkan menjadi satu entri
+    totals = {}
+    for name, elapsed in timings:
+        totals[name] = totals.get(name, 0.0) + elapsed
+    return ", ".join(f"{name};dur={elapsed * 1000:.1f}" for name, elapsed in totals.items())
+
+
+def watch_queue(name, fn):
+    QUEUE_DEPTH.labels(name).set_function(fn)
+
+
+def render_latest():
+    return generate_latest(), CONTENT_TYPE_LATEST
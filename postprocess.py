@@ -0,0 +1,20 @@
+import numpy as np
+
+
+def boxes_to_detections(boxes, names):
+    """Ubah array (N, 6) [x1, y1, x2, y2, skor, kelas] menjadi list detections untuk JSON.
+
+    Semua kolom dikonversi sekaligus dengan operasi array, tanpa akses tensor per kotak.
+    """
+    boxes = np.asarray(boxes)
+    if len(boxes) == 0:
+        return []
+    coords = boxes[:, :4].astype(int).tolist()  # koordinat kotak pembatas (dipotong ke int seperti sebelumnya)
+    scores = boxes[:, 4].astype(np.float32).astype(float).tolist()  # skor kepercayaan dalam desimal
+    labels = [names[c] for c in boxes[:, 5].astype(int).tolist()]  # label/kelas
+    return [{"box": box, "score": score, "label": label} for box, score, label in zip(coords, scores, labels)]
+
+
+def ulat_status(detections):
+    # Nilai string "true"/"false" sesuai format yang sudah dipakai klien dan Firebase
+    return "true" if any(d["label"] == "ulat" for d in detections) else "false"
@@ -0,0 +1,109 @@
+import struct
+
+import cv2
+import numpy as np
+
+# Mode decode JPEG dengan skala DCT (1/2, 1/4, 1/8): libjpeg langsung menghasilkan gambar kecil
+REDUCED_MODES = {2: cv2.IMREAD_REDUCED_COLOR_2, 4: cv2.IMREAD_REDUCED_COLOR_4, 8: cv2.IMREAD_REDUCED_COLOR_8}
+
+# Marker SOF (start of frame) JPEG yang memuat ukuran gambar; C4, C8 dan CC bukan SOF
+_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+class ImageTooLarge(ValueError):
+    """Jumlah piksel gambar melebihi batas, ditolak sebelum di-decode."""
+
+    def __init__(self, width, height, max_pixels):
+        super().__init__(f"Gambar terlalu besar ({width}x{height}), maksimum {max_pixels} piksel")
+        self.width = width
+        self.height = height
+        self.max_pixels = max_pixels
+
+
+def image_header(data):
+    """Baca (format, lebar, tinggi) dari header JPEG / PNG tanpa decode, atau None jika tidak dikenal."""
+    if data[:8] == b"\x89PNG\r\n\x1a\n" and len(data) >= 24:
+        width, height = struct.unpack(">II", data[16:24])
+        return "png", width, height
+
+    if data[:2] != b"\xff\xd8":
+        return None
+    pos = 2
+    while pos + 4 <= len(data):
+        if data[pos] != 0xFF:
+            return None
+        marker = data[pos + 1]
+        if marker == 0xFF:  # byte pengisi
+            pos += 1
+            continue
+        if marker in (0x01, *range(0xD0, 0xD8)):  # marker tanpa panjang segmen
+            pos += 2
+            continue
+        length = struct.unpack(">H", data[pos + 2:pos + 4])[0]
+        if marker in _SOF_MARKERS:
+            if pos + 9 > len(data):
+                return None
+            height, width = struct.unpack(">HH", data[pos + 5:pos + 9])
+            return "jpeg", width, height
+        if marker == 0xDA:  # start of scan tanpa SOF sebelumnya
+            return None
+        pos += 2 + length
+    return None
+
+
+def reduction_factor(width, height, target_size):
+    """Faktor reduksi terbesar (1, 2, 4, 8) yang sisi panjangnya tetap >= target_size.
+
+    YOLO me-letterbox sisi panjang ke ukuran input model, jadi decode pada resolusi yang masih
+    lebih besar dari ukuran tersebut tidak mengubah apa yang dilihat model secara berarti.
+    """
+    long_side = max(width, height)
+    for factor in (8, 4, 2):
+        if long_side / factor >= target_size:
+            return factor
+    return 1
+
+
+def decode(data, target_size=640, max_pixels=40_000_000, reduce=True):
+    """Decode bytes gambar untuk inferensi.
+
+    Kembalikan (img, scale): scale = (sx, sy) untuk memetakan koordinat pada img kembali ke
+    koordinat gambar asli. Gambar di atas max_pixels ditolak berdasarkan header sebelum decode.
+    """
+    header = image_header(data)
+    factor = 1
+    if header is not None:
+        fmt, width, height = header
+        if max_pixels and width * height > max_pixels:
+            raise ImageTooLarge(width, height, max_pixels)
+        if reduce and fmt == "jpeg":
+            factor = reduction_factor(width, height, target_size)
+
+    img = cv2.imdecode(np.frombuffer(data, np.uint8), REDUCED_MODES.get(factor, cv2.IMREAD_COLOR))
+    if img is None:
+        raise ValueError("Data gambar tidak valid atau format tidak didukung")
+
+    if header is None:
+        height, width = img.shape[:2]
+        if max_pixels and width * height > max_pixels:
+            raise ImageTooLarge(width, height, max_pixels)
+        return img, (1.0, 1.0)
+    if factor == 1:
+        return img, (1.0, 1.0)
+
+    # Orientasi EXIF diterapkan saat decode, jadi lebar/tinggi header bisa tertukar
+    out_height, out_width = img.shape[:2]
+    if (out_width > out_height) != (width > height) and width != height:
+        width, height = height, width
+    return img, (width / out_width, height / out_height)
+
+
+def scale_boxes(boxes, scale):
+    """Petakan kotak (N, 6) [x1, y1, x2, y2, skor, kelas] ke koordinat gambar asli."""
+    sx, sy = scale
+    if sx == 1.0 and sy == 1.0 or len(boxes) == 0:
+        return boxes
+    boxes = np.array(boxes, dtype=np.float32)
+    boxes[:, [0, 2]] *= sx
+    boxes[:, [1, 3]] *= sy
+    return boxes
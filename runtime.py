@@ -0,0 +1,171 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from backends import effective_int8, load_model, resolve_model_path
+from batching import BatchInferenceEngine
+from inference_pool import InferencePool, result_to_array
+
+# Ukuran frame dummy untuk warm-up: input model dan resolusi kamera yang umum
+WARMUP_SHAPES = ((640, 640, 3), (720, 1280, 3))
+
+
+def file_version(path):
+    """Ukuran + waktu modifikasi file model pada saat dimuat (bagian dari key cache deteksi)."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return "unknown"
+    return f"{st.st_size}-{st.st_mtime_ns}"
+
+
+class NotReady(Exception):
+    """Model belum selesai dimuat / warm-up, request sebaiknya dicoba lagi."""
+
+    def __init__(self, retry_after=2):
+        super().__init__("Model sedang dimuat, coba lagi sebentar lagi")
+        self.retry_after = retry_after
+
+
+class InferenceRuntime:
+    """Muat model (in-process + batching, atau pool multi-proses) lalu warm-up sebelum menerima traffic.
+
+    load() bisa dipanggil langsung (blocking) atau lewat start_background() supaya port sudah
+    terbuka untuk liveness probe selagi model dimuat. Selama belum siap, predict() melempar NotReady.
+    """
+
+    def __init__(self, model_path, backend="pytorch", int8=False, calibration_dir=None, workers=0, conf=0.5,
+                 batch_max_size=8, batch_max_wait_ms=10, warmup_runs=2):
+        self.model_path = model_path
+        self.backend = backend
+        self.int8 = effective_int8(backend, int8)
+        self.calibration_dir = calibration_dir
+        self.workers = workers
+        self.conf = conf
+        self.batch_max_size = batch_max_size
+        self.batch_max_wait_ms = batch_max_wait_ms
+        self.warmup_runs = warmup_runs
+
+        self.model = None
+        self.names = None
+        self.batch_engine = None
+        self.inference_pool = None
+        self.ready = threading.Event()
+        self.error = None
+        self.load_seconds = None
+        self.warmup_seconds = None
+        self.model_version = None  # Versi file bobot yang benar-benar dimuat, diisi oleh preload() / load()
+        self._load_lock = threading.Lock()
+        self._predict = None
+        self._fanout = None
+
+    def preload(self):
+        """Muat bobot model saja, tanpa inferensi dan tanpa thread.
+
+        Aman dipanggil di proses master sebelum fork (lihat server.py): bobot dibagi ke worker secara
+        copy-on-write, sedangkan warm-up dan thread batching dibuat di masing-masing worker oleh load().
+        """
+        with self._load_lock:
+            if self.model is not None:
+                return
+            if self.workers > 0:
+                raise ValueError("Preload hanya untuk inferensi in-process (INFERENCE_WORKERS=0)")
+            started = time.perf_counter()
+            path = resolve_model_path(self.model_path, self.backend, int8=self.int8, calibration_dir=self.calibration_dir)
+            self.model_version = file_version(path)
+            self.model = load_model(path)
+            self.names = self.model.names
+            self.load_seconds = time.perf_counter() - started
+
+    def load(self):
+        with self._load_lock:
+            if self.ready.is_set():
+                return
+            started = time.perf_counter()
+            path = resolve_model_path(self.model_path, self.backend, int8=self.int8, calibration_dir=self.calibration_dir)
+
+            if self.workers > 0:
+                # Inferensi di beberapa proses worker, frame dikirim lewat shared memory; tiap worker warm-up sendiri
+                self.model_version = file_version(path)
+                self.inference_pool = InferencePool(path, self.workers, conf=self.conf,
+                                                    warmup_shapes=WARMUP_SHAPES, warmup_runs=self.warmup_runs)
+                self.names = self.inference_pool.names
+                self._predict = self.inference_pool.predict
+                self._fanout = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="inference-fanout")
+                self.load_seconds = time.perf_counter() - started
+            else:
+                if self.model is None:
+                    self.model_version = file_version(path)
+                    self.model = load_model(path)
+                    self.names = self.model.names
+                    self.load_seconds = time.perf_counter() - started
+                self._warmup()
+                # Permintaan yang datang bersamaan digabung menjadi satu batch predict
+                self.batch_engine = BatchInferenceEngine(
+                    lambda images: [result_to_array(r) for r in self.model.predict(source=images, conf=self.conf, verbose=False)],
+                    max_batch_size=self.batch_max_size,
+                    max_wait_ms=self.batch_max_wait_ms,
+                )
+                self._predict = self.batch_engine.predict
+
+            self.ready.set()
+
+    def _warmup(self):
+        started = time.perf_counter()
+        frames = [np.zeros(shape, dtype=np.uint8) for shape in WARMUP_SHAPES]
+        for _ in range(self.warmup_runs):
+            for frame in frames:
+                self.model.predict(source=frame, conf=self.conf, verbose=False)
+            # Jalur batch juga di-warm-up agar alokasi untuk ukuran batch maksimum sudah terjadi
+            self.model.predict(source=[frames[0]] * self.batch_max_size, conf=self.conf, verbose=False)
+        self.warmup_seconds = time.perf_counter() - started
+
+    def start_background(self):
+        def run():
+            try:
+                self.load()
+            except Exception as e:
+                self.error = e
+                print(f"Gagal memuat model: {e}")
+
+        thread = threading.Thread(target=run, name="model-loader", daemon=True)
+        thread.start()
+        return thread
+
+    def predict(self, img):
+        if not self.ready.is_set():
+            raise NotReady()
+        return self._predict(img)
+
+    def predict_many(self, images):
+        """Inferensi beberapa gambar sekaligus (misalnya tile), hasil berurutan sesuai input."""
+        if not self.ready.is_set():
+            raise NotReady()
+        if self.batch_engine:
+            # Semua gambar masuk antrean sebelum menunggu, jadi digabung dalam batch sebesar mungkin
+            futures = [self.batch_engine.submit(img) for img in images]
+        else:
+            # Pool multi-proses: gambar dibagi ke worker yang menganggur secara paralel
+            futures = [self._fanout.submit(self._predict, img) for img in images]
+        return [future.result() for future in futures]
+
+    def queue_depth(self):
+        if self.batch_engine:
+            return self.batch_engine.queue_depth()
+        if self.inference_pool:
+            return self.inference_pool.stats()["queue_depth"]
+        return 0
+
+    def stats(self):
+        return {
+            "ready": self.ready.is_set(),
+            "error": str(self.error) if self.error else None,
+            "backend": self.backend,
+            "int8": self.int8,
+            "model_version": self.model_version,
+            "load_seconds": self.load_seconds,
+            "warmup_seconds": self.warmup_seconds,
+        }
@@ -0,0 +1,101 @@
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from metrics import SCENE_GATE_FRAMES_TOTAL
+
+SIGNATURE_SIZE = (64, 48)
+
+
+def signature(image):
+    """Frame abu-abu kecil (64x48, nilai 0-1) untuk membandingkan isi adegan dengan murah.
+
+    Untuk bytes JPEG dipakai decode tereduksi 1/8 langsung ke grayscale, jadi jauh lebih murah
+    daripada decode penuh; array BGR (misalnya frame RTSP) cukup dikonversi dan diperkecil.
+    """
+    if isinstance(image, (bytes, bytearray)):
+        gray = cv2.imdecode(np.frombuffer(image, np.uint8), cv2.IMREAD_REDUCED_GRAYSCALE_8)
+        if gray is None:
+            return None
+    else:
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    small = cv2.resize(gray, SIGNATURE_SIZE, interpolation=cv2.INTER_AREA).astype(np.float32) / 255
+    # Kurangi rata-rata agar perubahan cahaya merata (awan, lampu grow) tidak dianggap perubahan adegan
+    return small - small.mean()
+
+
+class SceneGate:
+    """Lewati inferensi untuk frame kamera yang adegannya praktis tidak berubah.
+
+    Per kamera disimpan signature frame terakhir yang benar-benar diinferensi beserta deteksinya.
+    Frame baru yang rata-rata selisih absolutnya di bawah threshold memakai ulang deteksi tersebut,
+    kecuali hasil terakhir sudah lebih tua dari max_age detik (inferensi ulang paksa).
+    """
+
+    def __init__(self, threshold=0.01, max_age=300, max_cameras=256):
+        self.threshold = float(threshold)
+        self.max_age = float(max_age) if max_age else None
+        self.max_cameras = max_cameras
+
+        self._lock = threading.Lock()
+        self._last = {}  # kamera -> (signature, detections, waktu inferensi)
+        self._counters = {"checked": 0, "skipped": 0, "inferred": 0, "forced": 0}
+        self._gate_seconds = 0.0
+        self._inference_seconds = 0.0
+
+    @property
+    def enabled(self):
+        return self.threshold > 0
+
+    def check(self, camera, image):
+        """Kembalikan (signature, detections lama atau None jika frame harus diinferensi)."""
+        started = time.thread_time()
+        sig = signature(image)
+        now = time.monotonic()
+        with self._lock:
+            self._counters["checked"] += 1
+            self._gate_seconds += time.thread_time() - started
+            last = self._last.get(camera)
+            if sig is None or last is None or last[0].shape != sig.shape:
+                return sig, None
+            previous_sig, detections, inferred_at = last
+            if self.max_age is not None and now - inferred_at >= self.max_age:
+                self._counters["forced"] += 1
+                SCENE_GATE_FRAMES_TOTAL.labels("forced").inc()
+                return sig, None
+            if float(np.abs(sig - previous_sig).mean()) >= self.threshold:
+                return sig, None
+            self._counters["skipped"] += 1
+            SCENE_GATE_FRAMES_TOTAL.labels("skipped").inc()
+            return sig, detections
+
+    def update(self, camera, sig, detections, inference_seconds):
+        if sig is None:
+            return
+        with self._lock:
+            self._counters["inferred"] += 1
+            self._inference_seconds += inference_seconds
+            SCENE_GATE_FRAMES_TOTAL.labels("inferred").inc()
+            self._last.pop(camera, None)
+            self._last[camera] = (sig, detections, time.monotonic())
+            while len(self._last) > self.max_cameras:
+                self._last.pop(next(iter(self._last)))
+
+    def stats(self):
+        with self._lock:
+            checked = self._counters["checked"]
+            inferred = self._counters["inferred"]
+            avg_inference = self._inference_seconds / inferred if inferred else 0.0
+            return {
+                "threshold": self.threshold,
+                "max_age": self.max_age,
+                "cameras": len(self._last),
+                **self._counters,
+                "skip_ratio": self._counters["skipped"] / checked if checked else 0.0,
+                "gate_cpu_seconds": self._gate_seconds,
+                "avg_inference_seconds": avg_inference,
+                # Perkiraan: frame yang dilewati x rata-rata waktu inferensi, dikurangi biaya gate itu sendiri
+                "estimated_saved_seconds": max(0.0, self._counters["skipped"] * avg_inference - self._gate_seconds),
+            }
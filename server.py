@@ -0,0 +1,151 @@
+"""Jalankan API dengan beberapa worker yang berbagi model (preload lalu fork).
+
+Proses master mengimpor api.py dan memuat bobot model sekali, lalu membuka socket dan
+mem-fork N worker uvicorn. Bobot dan library yang sudah dimuat dibagi copy-on-write,
+sehingga worker tambahan hanya menambah memori untuk state per-request. Setiap worker
+memakai anggaran thread sendiri (torch / OpenCV / OpenMP) agar N worker tidak berebut core.
+
+    python server.py --workers 4
+    python server.py --workers 2 --threads-per-worker 2 --port 8001
+"""
+import argparse
+import os
+import signal
+import socket
+import sys
+import time
+
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "NUMEXPR_NUM_THREADS")
+
+
+def set_thread_budget(threads):
+    import cv2
+
+    cv2.setNumThreads(threads)
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Hanya bisa diset sebelum ada pekerjaan paralel pertama
+        pass
+
+
+def bind_socket(host, port):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(api, sock, threads, log_level, index):
+    import uvicorn
+
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    # Tugas latar yang cukup dijalankan sekali (scheduler kamera, stream) hanya aktif di worker 0
+    os.environ["WORKER_INDEX"] = str(index)
+    set_thread_budget(threads)
+    # Penghapusan file lama dikelola master; indeks store dipakai bersama semua worker
+    api.original_store.disable()
+    api.detected_store.disable()
+    api.pending_store.disable()
+
+    config = uvicorn.Config(api.app, log_level=log_level)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def spawn(api, sock, threads, log_level, index):
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            run_worker(api, sock, threads, log_level, index)
+        except BaseException as e:
+            print(f"Worker {os.getpid()} berhenti karena error: {e}")
+            code = 1
+        finally:
+            os._exit(code)
+    return pid
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=os.getenv("HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", 8001)))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_WORKERS", 2)))
+    parser.add_argument("--threads-per-worker", type=int, default=int(os.getenv("THREADS_PER_WORKER", 0)),
+                        help="Thread torch/OpenCV per worker (default: jumlah core / workers)")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+
+    workers = max(1, args.workers)
+    threads = args.threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+
+    # Harus diset sebelum torch / numpy diimpor supaya pool OpenMP dibuat dengan ukuran ini
+    for name in THREAD_ENV_VARS:
+        os.environ[name] = str(threads)
+    if workers > 1:
+        os.environ.setdefault("JOB_STATE_DIR", "jobState")
+        os.environ.setdefault("STREAM_STATE_DIR", "streamState")
+        os.environ.setdefault("CAMERA_STATE_DIR", "cameraState")
+
+    import api
+
+    if api.inference_runtime.workers > 0:
+        raise SystemExit("server.py tidak bisa dipakai bersama INFERENCE_WORKERS > 0, pilih salah satu mode")
+
+    # Hanya muat bobot di master; warm-up (inferensi pertama) dan thread dibuat di tiap worker setelah fork
+    started = time.perf_counter()
+    api.inference_runtime.preload()
+    print(f"Model dimuat di master dalam {time.perf_counter() - started:.2f} detik, "
+          f"menjalankan {workers} worker x {threads} thread di {args.host}:{args.port}")
+
+    sock = bind_socket(args.host, args.port)
+    children = {spawn(api, sock, threads, args.log_level, index): index for index in range(workers)}
+
+    stopping = False
+
+    def stop(signum, _frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    # Sweeper retensi store berjalan di master
+    api.original_store.start()
+    api.detected_store.start()
+    api.pending_store.start()
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        index = children.pop(pid, None)
+        if index is not None and not stopping:
+            print(f"Worker {pid} berhenti (status {status}), menjalankan worker pengganti")
+            time.sleep(1)
+            children[spawn(api, sock, threads, args.log_level, index)] = index
+
+    api.original_store.stop()
+    api.detected_store.stop()
+    api.pending_store.stop()
+    sock.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
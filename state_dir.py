@@ -0,0 +1,82 @@
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class StateDir:
+    """Direktori file status JSON kecil yang dibagi antar worker server.py (job, hasil stream).
+
+    Proses pemilik menulis lewat submit() ke satu thread penulis, sehingga file tertulis sesuai
+    urutan perubahan dan event loop tidak menunggu disk; tiap file diganti secara atomik. Worker
+    lain membaca dengan read() atau menunggu perubahan dengan poll().
+    """
+
+    def __init__(self, path, name="state"):
+        self.path = path
+        self.name = name
+        os.makedirs(path, exist_ok=True)
+        self._writer = None
+
+    def start(self):
+        if self._writer is None:
+            self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"{self.name}-state")
+
+    def stop(self):
+        if self._writer is not None:
+            self._writer.shutdown(wait=True)
+            self._writer = None
+
+    def submit(self, fn, *args):
+        """Jalankan fn(*args) di thread penulis; diabaikan jika start() belum dipanggil."""
+        if self._writer is not None:
+            self._writer.submit(fn, *args)
+
+    def file(self, filename):
+        return os.path.join(self.path, filename)
+
+    def write(self, filename, data):
+        path = self.file(filename)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"Gagal menyimpan status {self.name} {filename}: {e}")
+
+    def read(self, filename):
+        try:
+            with open(self.file(filename)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def remove(self, *filenames):
+        for filename in filenames:
+            try:
+                os.remove(self.file(filename))
+            except OSError:
+                pass
+
+    def remove_older_than(self, seconds):
+        # File dari proses yang sudah mati (tidak pernah dihapus pemiliknya)
+        cutoff = time.time() - seconds
+        for name in os.listdir(self.path):
+            path = os.path.join(self.path, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    async def poll(self, filename, done, timeout):
+        """Baca file berulang kali sampai done(isi) bernilai benar atau timeout habis; kembalikan isi terakhir."""
+        loop = asyncio.get_running_loop()
+        give_up_at = time.monotonic() + max(0.0, timeout)
+        while True:
+            data = await loop.run_in_executor(None, self.read, filename)
+            if done(data) or time.monotonic() >= give_up_at:
+                return data
+            await asyncio.sleep(min(0.25, max(0.0, give_up_at - time.monotonic())))
@@ -0,0 +1,320 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+from state_dir import StateDir
+
+SOI = b"\xff\xd8"
+EOI = b"\xff\xd9"
+
+
+class MjpegParser:
+    """Potong aliran byte MJPEG (multipart/x-mixed-replace) menjadi frame JPEG secara inkremental.
+
+    Frame dicari dari marker SOI (FFD8) sampai EOI (FFD9), jadi header multipart dan boundary
+    apa pun diabaikan. Buffer hanya menampung satu frame yang sedang dibaca; frame yang lebih besar
+    dari max_frame_bytes dibuang. Catatan: JPEG dengan thumbnail EXIF tertanam akan terpotong di
+    EOI thumbnail; frame ESP32-CAM tidak memuat EXIF.
+    """
+
+    def __init__(self, max_frame_bytes=4 * 1024 * 1024):
+        self.max_frame_bytes = max_frame_bytes
+        self._buffer = bytearray()
+        self._in_frame = False
+        self._scan_from = 0
+        self.oversized = 0
+
+    def feed(self, chunk):
+        self._buffer += chunk
+        frames = []
+        while True:
+            if not self._in_frame:
+                start = self._buffer.find(SOI)
+                if start < 0:
+                    # Sisakan satu byte terakhir, bisa jadi awal marker yang terpotong antar chunk
+                    del self._buffer[:-1]
+                    return frames
+                del self._buffer[:start]
+                self._in_frame = True
+                self._scan_from = 2
+
+            end = self._buffer.find(EOI, self._scan_from)
+            if end < 0:
+                if len(self._buffer) > self.max_frame_bytes:
+                    self.oversized += 1
+                    self._buffer.clear()
+                    self._in_frame = False
+                else:
+                    self._scan_from = max(2, len(self._buffer) - 1)
+                return frames
+
+            frames.append(bytes(self._buffer[:end + 2]))
+            del self._buffer[:end + 2]
+            self._in_frame = False
+
+
+class _Stream:
+    def __init__(self, name, url):
+        self.name = name
+        self.url = url
+        self.latest_frame = None
+        self.frame_ready = None
+        # Diset oleh task inferensi saat siap menerima frame; pembaca RTSP baru decode (retrieve) saat itu
+        self.want_frame = threading.Event()
+        self.result_changed = None
+        self.result = None
+        self.connected = False
+        self.connects = 0
+        self.stream_errors = 0
+        self.frames_received = 0
+        self.frames_dropped = 0
+        self.frames_inferred = 0
+        self.inference_errors = 0
+        self.last_frame_at = None
+        self.parser = None
+
+
+class StreamIngestor:
+    """Buka stream kamera (MJPEG lewat HTTP atau RTSP lewat OpenCV) dan deteksi frame terbaru.
+
+    Tiap stream punya task pembaca dan task inferensi. Pembaca hanya menyimpan frame terakhir;
+    jika inferensi belum selesai saat frame baru datang, frame lama dibuang sehingga model selalu
+    memproses frame paling segar. Hasil terakhir per kamera bisa diambil lewat latest() (dengan
+    long-poll). detect_fn(name, frame) adalah coroutine dari api.py; frame berupa bytes JPEG
+    (MJPEG) atau array BGR (RTSP).
+
+    Stream hanya dibaca oleh proses yang memanggil start() (worker 0 di server.py). Dengan state_dir,
+    proses itu juga menulis hasil terakhir tiap stream (<nama>.result.json) dan statistiknya
+    (streams.json, tiap stats_interval detik), sehingga latest() dan stats() di worker lain membaca
+    file tersebut.
+    """
+
+    def __init__(self, detect_fn, min_interval=0, reconnect_delay=1, max_reconnect_delay=30, read_timeout=10,
+                 max_frame_bytes=4 * 1024 * 1024, state_dir=None, stats_interval=1):
+        self.detect_fn = detect_fn
+        self.min_interval = float(min_interval)
+        self.reconnect_delay = float(reconnect_delay)
+        self.max_reconnect_delay = float(max_reconnect_delay)
+        self.read_timeout = float(read_timeout)
+        self.max_frame_bytes = int(max_frame_bytes)
+        self.state_dir = state_dir
+        self.stats_interval = float(stats_interval)
+        self._state = StateDir(state_dir, "stream") if state_dir else None
+
+        self._streams = {}
+        self._client = None
+        self._tasks = []
+        self._rtsp_readers = None
+        self._stopping = False
+
+    def add_stream(self, name, url):
+        self._streams[name] = _Stream(name, url)
+
+    def names(self):
+        return list(self._streams)
+
+    def start(self):
+        if self._tasks or not self._streams:
+            return
+        self._client = httpx.AsyncClient(timeout=httpx.Timeout(5, read=self.read_timeout))
+        rtsp_streams = sum(1 for stream in self._streams.values() if stream.url.startswith("rtsp://"))
+        if rtsp_streams:
+            # Pembaca RTSP memblokir satu thread selama stream hidup; executor sendiri agar tidak
+            # menghabiskan default executor yang dipakai run_in_executor(None, ...) di api.py
+            self._rtsp_readers = ThreadPoolExecutor(max_workers=rtsp_streams, thread_name_prefix="rtsp-reader")
+        for stream in self._streams.values():
+            stream.frame_ready = asyncio.Event()
+            stream.result_changed = asyncio.Condition()
+            self._tasks.append(asyncio.create_task(self._read_loop(stream)))
+            self._tasks.append(asyncio.create_task(self._infer_loop(stream)))
+        if self._state is not None:
+            self._state.start()
+            self._tasks.append(asyncio.create_task(self._stats_loop()))
+
+    def _owner(self):
+        # True jika stream dibaca di proses ini; False berarti hasil diambil dari state_dir
+        return bool(self._tasks) or not self.state_dir
+
+    async def stop(self):
+        self._stopping = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        if self._rtsp_readers is not None:
+            # Thread pembaca berhenti sendiri setelah grab() berikutnya (_stopping)
+            self._rtsp_readers.shutdown(wait=False)
+            self._rtsp_readers = None
+        if self._state is not None:
+            self._state.submit(self._state.write, "streams.json", self._local_stats())
+            self._state.stop()
+
+    def _offer(self, stream, frame):
+        stream.frames_received += 1
+        stream.last_frame_at = time.time()
+        if stream.latest_frame is not None:
+            stream.frames_dropped += 1
+        stream.latest_frame = frame
+        stream.frame_ready.set()
+
+    def _skip(self, stream):
+        # Frame RTSP yang di-grab tapi tidak di-decode karena inferensi masih berjalan
+        stream.frames_received += 1
+        stream.frames_dropped += 1
+        stream.last_frame_at = time.time()
+
+    async def _read_loop(self, stream):
+        delay = self.reconnect_delay
+        while True:
+            received = stream.frames_received
+            try:
+                if stream.url.startswith("rtsp://"):
+                    await self._read_rtsp(stream)
+                else:
+                    await self._read_mjpeg(stream)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                stream.stream_errors += 1
+                print(f"Stream {stream.name} terputus: {e}")
+            finally:
+                stream.connected = False
+            # Backoff hanya bertambah jika koneksi sebelumnya tidak menghasilkan frame sama sekali
+            delay = self.reconnect_delay if stream.frames_received > received else min(delay * 2, self.max_reconnect_delay)
+            await asyncio.sleep(delay)
+
+    async def _read_mjpeg(self, stream):
+        stream.parser = MjpegParser(self.max_frame_bytes)
+        async with self._client.stream("GET", stream.url) as response:
+            response.raise_for_status()
+            stream.connected = True
+            stream.connects += 1
+            async for chunk in response.aiter_raw():
+                for frame in stream.parser.feed(chunk):
+                    self._offer(stream, frame)
+
+    async def _read_rtsp(self, stream):
+        import cv2
+
+        loop = asyncio.get_running_loop()
+
+        def read_blocking():
+            capture = cv2.VideoCapture(stream.url)
+            if not capture.isOpened():
+                raise IOError(f"Gagal membuka stream RTSP {stream.url}")
+            stream.connected = True
+            stream.connects += 1
+            try:
+                while not self._stopping:
+                    # grab() tetap menguras stream agar frame yang di-decode selalu yang terbaru;
+                    # retrieve() (konversi ke BGR) hanya untuk frame yang benar-benar akan diinferensi
+                    if not capture.grab():
+                        raise IOError("Stream RTSP berhenti mengirim frame")
+                    if not stream.want_frame.is_set():
+                        loop.call_soon_threadsafe(self._skip, stream)
+                        continue
+                    ok, frame = capture.retrieve()
+                    if not ok:
+                        raise IOError("Gagal men-decode frame RTSP")
+                    stream.want_frame.clear()
+                    loop.call_soon_threadsafe(self._offer, stream, frame)
+            finally:
+                capture.release()
+
+        # Satu thread khusus per stream RTSP; demux dan decode H.264 dilakukan FFmpeg di dalam OpenCV
+        await loop.run_in_executor(self._rtsp_readers, read_blocking)
+
+    async def _infer_loop(self, stream):
+        while True:
+            stream.want_frame.set()
+            await stream.frame_ready.wait()
+            stream.frame_ready.clear()
+            frame, stream.latest_frame = stream.latest_frame, None
+            if frame is None:
+                continue
+
+            started = time.perf_counter()
+            try:
+                result = await self.detect_fn(stream.name, frame)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                stream.inference_errors += 1
+                print(f"Gagal mendeteksi frame dari stream {stream.name}: {e}")
+                await asyncio.sleep(self.reconnect_delay)
+                continue
+
+            stream.frames_inferred += 1
+            async with stream.result_changed:
+                stream.result = {
+                    "seq": stream.frames_inferred,
+                    "captured_at": stream.last_frame_at,
+                    "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+                    **result,
+                }
+                stream.result_changed.notify_all()
+            if self._state is not None:
+                self._state.submit(self._state.write, f"{stream.name}.result.json", stream.result)
+
+            remaining = self.min_interval - (time.perf_counter() - started)
+            if remaining > 0:
+                await asyncio.sleep(remaining)
+
+    async def latest(self, name, after=None, timeout=0):
+        """Hasil terbaru kamera; jika `after` diisi, tunggu (maks. timeout detik) hasil dengan seq > after."""
+        if not self._owner():
+            return await self._latest_foreign(name, after, timeout)
+        stream = self._streams[name]
+        if after is None or timeout <= 0 or stream.result_changed is None:
+            return stream.result
+        async with stream.result_changed:
+            try:
+                await asyncio.wait_for(
+                    stream.result_changed.wait_for(lambda: stream.result is not None and stream.result["seq"] > after),
+                    timeout=timeout,
+                )
+            except asyncio.TimeoutError:
+                pass
+        return stream.result
+
+    async def _latest_foreign(self, name, after, timeout):
+        # Stream dibaca worker lain: baca file hasilnya, ulangi sampai ada seq > after atau timeout habis
+        return await self._state.poll(
+            f"{name}.result.json",
+            lambda result: after is None or (result is not None and result["seq"] > after),
+            timeout if after is not None else 0,
+        )
+
+    async def _stats_loop(self):
+        while True:
+            self._state.submit(self._state.write, "streams.json", self._local_stats())
+            await asyncio.sleep(self.stats_interval)
+
+    def stats(self):
+        if not self._owner():
+            stats = self._state.read("streams.json") or {}
+            return {name: stats.get(name) for name in self._streams}
+        return self._local_stats()
+
+    def _local_stats(self):
+        return {
+            stream.name: {
+                "url": stream.url,
+                "connected": stream.connected,
+                "connects": stream.connects,
+                "stream_errors": stream.stream_errors,
+                "frames_received": stream.frames_received,
+                "frames_dropped": stream.frames_dropped,
+                "frames_inferred": stream.frames_inferred,
+                "inference_errors": stream.inference_errors,
+                "oversized_frames": stream.parser.oversized if stream.parser else 0,
+                "last_frame_at": stream.last_frame_at,
+            }
+            for stream in self._streams.values()
+        }
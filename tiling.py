@@ -0,0 +1,88 @@
+import numpy as np
+
+
+def tile_windows(width, height, tile_size, overlap):
+    """Bagi gambar menjadi jendela (x1, y1, x2, y2) berukuran tile_size yang saling tumpang tindih.
+
+    overlap adalah fraksi tile_size (0 - 0.5). Tile terakhir di tiap sumbu digeser ke tepi gambar
+    sehingga semua tile berukuran sama dan seluruh gambar tercakup.
+    """
+    tile_size = int(tile_size)
+    stride = max(1, int(tile_size * (1 - overlap)))
+
+    def starts(length):
+        if length <= tile_size:
+            return [0]
+        positions = list(range(0, length - tile_size, stride))
+        positions.append(length - tile_size)
+        return positions
+
+    return [
+        (x, y, min(x + tile_size, width), min(y + tile_size, height))
+        for y in starts(height)
+        for x in starts(width)
+    ]
+
+
+def _pairwise_ios(box, others):
+    # Intersection over smaller: kotak terpotong di tepi tile tetap dianggap duplikat kotak utuhnya
+    x1 = np.maximum(box[0], others[:, 0])
+    y1 = np.maximum(box[1], others[:, 1])
+    x2 = np.minimum(box[2], others[:, 2])
+    y2 = np.minimum(box[3], others[:, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area = (box[2] - box[0]) * (box[3] - box[1])
+    areas = (others[:, 2] - others[:, 0]) * (others[:, 3] - others[:, 1])
+    return inter / np.maximum(np.minimum(area, areas), 1e-6)
+
+
+def merge_tiles(results, offsets, threshold=0.5):
+    """Gabungkan hasil per tile (array (N, 6)) ke koordinat gambar asli dengan NMS lintas tile per kelas."""
+    shifted = []
+    for boxes, (dx, dy) in zip(results, offsets):
+        boxes = np.array(boxes, dtype=np.float32).reshape(-1, 6)
+        boxes[:, [0, 2]] += dx
+        boxes[:, [1, 3]] += dy
+        shifted.append(boxes)
+    boxes = np.concatenate(shifted) if shifted else np.zeros((0, 6), dtype=np.float32)
+    if len(boxes) == 0:
+        return boxes
+
+    boxes = boxes[np.argsort(-boxes[:, 4], kind="stable")]
+    keep = []
+    for cls in np.unique(boxes[:, 5]):
+        candidates = boxes[boxes[:, 5] == cls]
+        while len(candidates):
+            best = candidates[0]
+            keep.append(best)
+            rest = candidates[1:]
+            candidates = rest[_pairwise_ios(best, rest) < threshold]
+    keep = np.stack(keep)
+    return keep[np.argsort(-keep[:, 4], kind="stable")]
+
+
+class TooManyTiles(ValueError):
+    def __init__(self, width, height, tile_size, count, max_count):
+        super().__init__(
+            f"Gambar {width}x{height} dengan tile_size {tile_size} menghasilkan {count} tile "
+            f"(maksimal {max_count}); perbesar tile_size"
+        )
+
+
+def predict_tiles(predict_many, img, tile_size, overlap, threshold=0.5, max_tiles=0):
+    """Deteksi per tile dalam satu panggilan predict_many lalu gabungkan; kembalikan (boxes, jumlah tile).
+
+    Frame utuh ikut dijalankan agar objek besar yang terpotong di batas tile tetap terdeteksi,
+    kecuali jika satu tile sudah mencakup seluruh gambar. max_tiles > 0 membatasi jumlah tile
+    (TooManyTiles jika terlampaui).
+    """
+    height, width = img.shape[:2]
+    windows = tile_windows(width, height, tile_size, overlap)
+    if max_tiles and len(windows) > max_tiles:
+        raise TooManyTiles(width, height, tile_size, len(windows), max_tiles)
+    images = [img[y1:y2, x1:x2] for x1, y1, x2, y2 in windows]
+    offsets = [(x1, y1) for x1, y1, _, _ in windows]
+    if len(windows) > 1:
+        images.append(img)
+        offsets.append((0, 0))
+    return merge_tiles(predict_many(images), offsets, threshold=threshold), len(windows)